@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+"""
+Conversion backends and per-file backend selection
+Every backend turns one USDZ into one GLB: the pure-Python USDA converter
+and warm Blender workers.
+BackendSelector orders the backends that can take a file by expected time
+to a good GLB - predicted duration over success rate - learned per backend
+from the conversions recorded in jobs.db, for files of the same kind (usdc
+or not, textured or not). Until a backend has enough runs for a kind of
+file it keeps its configured priority.
+"""
+
+import os
+import time
+import random
+import shutil
+import tempfile
+import logging
+
+from usda_native import convert_usdz_native, np
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.exr', '.hdr', '.tga', '.bmp', '.tif', '.tiff', '.webp', '.ktx2')
+
+
+def file_features(path, graph):
+    """Cheap features of a USDZ used to pick its backend"""
+    files = graph.files()
+    return {
+        'size': os.path.getsize(path),
+        'layers': len(graph.reachable),
+        'usdc': bool(graph.opaque) or any(name.lower().endswith('.usdc') for name in graph.reachable),
+        'textures': sum(1 for name in files if name.lower().endswith(IMAGE_EXTENSIONS)),
+    }
+
+
+def feature_class(features):
+    """(usdc, textured): files whose backends succeed or fail alike"""
+    return bool(features['usdc']), bool(features['textures'])
+
+
+class ConversionBackend:
+    """One way of converting a USDZ to GLB
+
+    Inline backends convert while the archive is open. Blender is not inline:
+    files routed to it are extracted and converted later in one worker session.
+    """
+
+    name = None
+    inline = True
+
+    def available(self):
+        return True
+
+    def supports(self, features):
+        return True
+
+    def convert(self, usdz_path, glb_path, archive, graph, timeout):
+        """Write glb_path; returns a stats dict or raises (UnsupportedUsd when not applicable)"""
+        raise NotImplementedError
+
+
+class NativeBackend(ConversionBackend):
+    """In-process USDA converter for untextured text scans (needs NumPy)"""
+
+    name = 'native'
+
+    def available(self):
+        return np is not None
+
+    def supports(self, features):
+        return not features['usdc'] and not features['textures']
+
+    def convert(self, usdz_path, glb_path, archive, graph, timeout):
+        # In-process, so the converter checks the deadline itself (raises TimeoutError)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        return convert_usdz_native(archive, glb_path, graph.root, deadline)
+
+
+class BlenderBackend(ConversionBackend):
+    """Warm Blender workers; handles anything Blender's USD importer reads
+
+    The service batches Blender files itself (several per worker session),
+    so it is not inline there; convert() runs a single file on the pool.
+    """
+
+    name = 'blender'
+    inline = False
+
+    def __init__(self, pool=None, work_dir=None, profile=None):
+        self.pool = pool
+        self.work_dir = work_dir
+        self.profile = profile
+
+    def available(self):
+        return self.pool is not None
+
+    def convert(self, usdz_path, glb_path, archive, graph, timeout):
+        # Blender reads files from disk: extract what the root layer uses
+        extract_dir = tempfile.mkdtemp(dir=self.work_dir)
+        try:
+            paths = archive.extract(extract_dir, graph.files())
+            options = {'profile': self.profile} if self.profile else {}
+            result = self.pool.convert(paths[graph.root], glb_path, timeout, **options)
+        finally:
+            shutil.rmtree(extract_dir, ignore_errors=True)
+        if not result.get('success'):
+            raise RuntimeError(f"Blender: {result.get('error')}")
+        return {key: result[key] for key in ('import_time', 'export_time', 'peak_rss_mb') if key in result}
+
+
+class BackendSelector:
+    """Orders backends per file from recorded timings and success rates"""
+
+    def __init__(self, backends, model, min_samples=20, min_success_rate=0.5, exploration=0.05):
+        self.backends = {backend.name: backend for backend in backends}
+        self.priority = [backend.name for backend in backends]
+        self.model = model
+        self.min_samples = min_samples
+        self.min_success_rate = min_success_rate
+        self.exploration = exploration
+
+    def candidates(self, features):
+        return [name for name in self.priority
+                if self.backends[name].available() and self.backends[name].supports(features)]
+
+    def expected_time(self, name, features):
+        """(Predicted seconds per successful conversion, success rate), or None while not enough is known"""
+        rate, runs = self.model.success_rate(name, *feature_class(features))
+        if runs < self.min_samples:
+            return None
+        predicted = self.model.predict(name, features['size'], features['layers'])
+        if predicted is None:
+            return None
+        return predicted / max(rate, 0.01), rate
+
+    def order(self, features):
+        """Backends to try for one file, best first"""
+        known = []
+        unknown = []
+        unreliable = []
+        for name in self.candidates(features):
+            estimate = self.expected_time(name, features)
+            if estimate is None:
+                unknown.append(name)
+            elif estimate[1] < self.min_success_rate:
+                unreliable.append((estimate[0], name))
+            else:
+                known.append((estimate[0], name))
+        order = [name for _, name in sorted(known)] + unknown + [name for _, name in sorted(unreliable)]
+        # Occasionally try an unmeasured backend first so it gets measured at all
+        if unknown and order[0] not in unknown and random.random() < self.exploration:
+            explored = random.choice(unknown)
+            order.remove(explored)
+            order.insert(0, explored)
+        return order
+
+    def describe(self):
+        lines = []
+        for name in self.priority:
+            backend = self.backends[name]
+            if not backend.available():
+                lines.append(f"{name}: not available")
+                continue
+            lines.append(self.model.describe(name))
+        return lines
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+
+"""
+Synthetic RoomPlan-style USDZ generator
+Writes scans shaped like the ones RoomPlan uploads (walls, doors/windows and
+furniture boxes with UsdPreviewSurface materials, referenced from a root
+layer) with knobs for size, mesh density, layer count, textures and format.
+
+    python3 bench/generate_corpus.py --out bench/corpus              # preset matrix
+    python3 bench/generate_corpus.py --out /tmp/one --walls 8 --objects 200 \
+        --density 4 --layers 50 --texture-size 1024 --format usda
+
+usdc output needs the `usd-core` package (pxr) to write crate files.
+"""
+
+import os
+import sys
+import json
+import math
+import zlib
+import struct
+import zipfile
+import argparse
+
+import numpy as np
+
+try:
+    from pxr import Sdf
+except ImportError:  # Only needed for usdc output
+    Sdf = None
+
+USDZ_ALIGNMENT = 64
+WALL_HEIGHT = 2.77
+WALL_THICKNESS = 0.16
+
+CATEGORIES = {
+    'Chair': ((0.45, 0.9, 0.5), (1.0, 1.0, 1.0)),
+    'Table': ((1.2, 0.75, 0.8), (0.8, 0.6, 0.4)),
+    'Storage': ((0.8, 1.2, 0.45), (0.6, 0.6, 0.65)),
+    'Sofa': ((2.0, 0.85, 0.9), (0.4, 0.45, 0.6)),
+    'Bed': ((1.6, 0.5, 2.0), (0.9, 0.9, 0.85)),
+    'Television': ((1.2, 0.7, 0.1), (0.1, 0.1, 0.1)),
+}
+
+# Corpus used by the benchmark unless a custom one is given
+PRESETS = [
+    {'name': 'small', 'walls': 4, 'objects': 10, 'density': 1, 'layers': 14},
+    {'name': 'medium', 'walls': 8, 'objects': 60, 'density': 2, 'layers': 68},
+    {'name': 'large', 'walls': 16, 'objects': 300, 'density': 4, 'layers': 316},
+    {'name': 'dense', 'walls': 4, 'objects': 40, 'density': 16, 'layers': 44},
+    {'name': 'flat', 'walls': 8, 'objects': 60, 'density': 2, 'layers': 0},
+    {'name': 'grouped', 'walls': 8, 'objects': 60, 'density': 2, 'layers': 4},
+    {'name': 'textured', 'walls': 4, 'objects': 20, 'density': 1, 'layers': 24, 'texture_size': 1024},
+    {'name': 'crate', 'walls': 8, 'objects': 60, 'density': 2, 'layers': 68, 'format': 'usdc'},
+]
+
+
+# -- geometry ----------------------------------------------------------------
+
+def box_mesh(size, density):
+    """Box centered on the origin, each face split into density x density quads
+
+    Returns (points, normals, uvs, triangle indices) with per-face vertices,
+    as RoomPlan writes them.
+    """
+    half = np.asarray(size, dtype=np.float64) / 2
+    steps = np.linspace(-1.0, 1.0, density + 1)
+    u, v = np.meshgrid(steps, steps, indexing='ij')
+    u, v = u.reshape(-1), v.reshape(-1)
+    grid = np.arange((density + 1) ** 2).reshape(density + 1, density + 1)
+    quads = np.stack([grid[:-1, :-1], grid[1:, :-1], grid[1:, 1:], grid[:-1, 1:]], axis=-1).reshape(-1, 4)
+    quad_triangles = np.concatenate([quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]])
+
+    points, normals, uvs, triangles = [], [], [], []
+    for axis in range(3):
+        for sign in (-1.0, 1.0):
+            a, b = [i for i in range(3) if i != axis]
+            face = np.zeros((len(u), 3))
+            face[:, axis] = sign
+            face[:, a] = u
+            face[:, b] = v
+            normal = np.zeros(3)
+            normal[axis] = sign
+            # Wind counter-clockwise around the outward normal
+            a0, a1, a2 = face[quad_triangles[0]]
+            face_triangles = quad_triangles
+            if np.dot(np.cross(a1 - a0, a2 - a0), normal) < 0:
+                face_triangles = quad_triangles[:, [0, 2, 1]]
+            triangles.append(face_triangles + sum(len(p) for p in points))
+            points.append(face * half)
+            normals.append(np.tile(normal, (len(u), 1)))
+            uvs.append(np.stack([(u + 1) / 2, (v + 1) / 2], axis=1))
+    return np.vstack(points), np.vstack(normals), np.vstack(uvs), np.vstack(triangles)
+
+
+def _tuples(array, precision=7):
+    return ', '.join('(' + ', '.join(f'{x:.{precision}g}' for x in row) + ')' for row in array.tolist())
+
+
+def _ints(array):
+    return ', '.join(str(i) for i in array.reshape(-1).tolist())
+
+
+def _matrix(rotation_y, translation):
+    c, s = math.cos(rotation_y), math.sin(rotation_y)
+    rows = [(c, 0, -s, 0), (0, 1, 0, 0), (s, 0, c, 0), (translation[0], translation[1], translation[2], 1)]
+    return '( ' + ', '.join('(' + ', '.join(f'{x:.9g}' for x in row) + ')' for row in rows) + ' )'
+
+
+# -- textures ----------------------------------------------------------------
+
+def png_bytes(pixels):
+    """Encode an (h, w, 3) uint8 array as PNG"""
+    height, width, _ = pixels.shape
+    raw = np.hstack([np.zeros((height, 1), dtype=np.uint8), pixels.reshape(height, -1)]).tobytes()
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body) & 0xFFFFFFFF)
+
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)),
+        chunk(b'IDAT', zlib.compress(raw, 6)),
+        chunk(b'IEND', b''),
+    ])
+
+
+def texture(size, color, rng):
+    """Fabric-like noise over a base color, roughly as compressible as a photo"""
+    base = np.asarray(color) * 200 + 30
+    noise = rng.normal(0, 18, (size, size, 1))
+    y, x = np.mgrid[0:size, 0:size]
+    weave = 12 * np.sin(x * 0.35)[..., None] * np.sin(y * 0.35)[..., None]
+    return np.clip(base + noise + weave, 0, 255).astype(np.uint8)
+
+
+# -- layers ------------------------------------------------------------------
+
+class ObjectSpec:
+    def __init__(self, name, category, size, color, rotation, translation):
+        self.name = name
+        self.category = category
+        self.size = size
+        self.color = color
+        self.rotation = rotation
+        self.translation = translation
+
+
+def scene_objects(walls, objects, rng):
+    """Wall, opening and furniture boxes for a rectangular-ish room"""
+    specs = []
+    radius = max(2.0, walls * 0.9)
+    for index in range(walls):
+        angle = 2 * math.pi * index / walls
+        length = 2 * radius * math.sin(math.pi / walls) + WALL_THICKNESS
+        position = (radius * math.cos(angle), 0.0, radius * math.sin(angle))
+        rotation = angle + math.pi / 2
+        specs.append(ObjectSpec(f"Wall{index}", 'Wall', (length, WALL_HEIGHT, WALL_THICKNESS),
+                                (1.0, 1.0, 1.0), rotation, position))
+        if index % 2 == 0:
+            kind = 'Door' if index % 4 == 0 else 'Window'
+            size = (0.9, 2.1, 0.08) if kind == 'Door' else (1.4, 1.2, 0.08)
+            specs.append(ObjectSpec(f"{kind}{index}", kind, size, (1.0, 1.0, 1.0), rotation, position))
+
+    names = list(CATEGORIES)
+    for index in range(objects):
+        category = names[index % len(names)]
+        size, color = CATEGORIES[category]
+        jitter = rng.uniform(0.8, 1.2, 3)
+        scaled = tuple(float(s * j) for s, j in zip(size, jitter))
+        r = rng.uniform(0, radius * 0.7)
+        a = rng.uniform(0, 2 * math.pi)
+        position = (r * math.cos(a), scaled[1] / 2 - WALL_HEIGHT / 2, r * math.sin(a))
+        specs.append(ObjectSpec(f"{category}{index}", category, scaled, color, rng.uniform(0, 2 * math.pi), position))
+    return specs
+
+
+def mesh_prim(spec, root_path, density, texture_path, indent):
+    points, normals, uvs, triangles = box_mesh(spec.size, density)
+    pad = ' ' * indent
+    material = f"{root_path}/{spec.name}/{spec.name}_color"
+    lines = [
+        f'{pad}def Xform "{spec.name}" (',
+        f'{pad}    customData = {{',
+        f'{pad}        string Category = "{spec.category}"',
+        f'{pad}    }}',
+        f'{pad}    kind = "component"',
+        f'{pad})',
+        f'{pad}{{',
+        f'{pad}    def Mesh "{spec.name}"',
+        f'{pad}    {{',
+        f'{pad}        int[] faceVertexCounts = [{", ".join(["3"] * len(triangles))}]',
+        f'{pad}        int[] faceVertexIndices = [{_ints(triangles)}]',
+        f'{pad}        rel material:binding = <{material}>',
+        f'{pad}        normal3f[] normals = [{_tuples(normals, 3)}]',
+        f'{pad}        point3f[] points = [{_tuples(points)}]',
+    ]
+    if texture_path:
+        lines += [
+            f'{pad}        texCoord2f[] primvars:st = [{_tuples(uvs, 5)}] (',
+            f'{pad}            interpolation = "vertex"',
+            f'{pad}        )',
+        ]
+    lines += [
+        f'{pad}        uniform token subdivisionScheme = "none"',
+        f'{pad}        matrix4d xformOp:transform = {_matrix(spec.rotation, spec.translation)}',
+        f'{pad}        uniform token[] xformOpOrder = ["xformOp:transform"]',
+        f'{pad}    }}',
+        '',
+        f'{pad}    def Material "{spec.name}_color"',
+        f'{pad}    {{',
+        f'{pad}        token outputs:surface.connect = <{material}/surfaceShader.outputs:surface>',
+        '',
+        f'{pad}        def Shader "surfaceShader"',
+        f'{pad}        {{',
+        f'{pad}            uniform token info:id = "UsdPreviewSurface"',
+    ]
+    if texture_path:
+        lines += [
+            f'{pad}            color3f inputs:diffuseColor.connect = <{material}/diffuseTexture.outputs:rgb>',
+        ]
+    else:
+        lines += [
+            f'{pad}            color3f inputs:diffuseColor = ({spec.color[0]:.3g}, {spec.color[1]:.3g}, {spec.color[2]:.3g})',
+        ]
+    lines += [
+        f'{pad}            float inputs:roughness = 0.5',
+        f'{pad}            token outputs:surface',
+        f'{pad}        }}',
+    ]
+    if texture_path:
+        lines += [
+            '',
+            f'{pad}        def Shader "stReader"',
+            f'{pad}        {{',
+            f'{pad}            uniform token info:id = "UsdPrimvarReader_float2"',
+            f'{pad}            string inputs:varname = "st"',
+            f'{pad}            float2 outputs:result',
+            f'{pad}        }}',
+            '',
+            f'{pad}        def Shader "diffuseTexture"',
+            f'{pad}        {{',
+            f'{pad}            uniform token info:id = "UsdUVTexture"',
+            f'{pad}            asset inputs:file = @{texture_path}@',
+            f'{pad}            float2 inputs:st.connect = <{material}/stReader.outputs:result>',
+            f'{pad}            float3 outputs:rgb',
+            f'{pad}        }}',
+        ]
+    lines += [f'{pad}    }}', f'{pad}}}']
+    return '\n'.join(lines)
+
+
+def layer_header(default_prim):
+    return '\n'.join([
+        '#usda 1.0',
+        '(',
+        f'    defaultPrim = "{default_prim}"',
+        '    metersPerUnit = 1',
+        '    upAxis = "Y"',
+        ')',
+        '',
+    ])
+
+
+def build_scan(name, walls=4, objects=10, density=1, layers=None, texture_size=0, format='usda', seed=0):
+    """Ordered {archive name: bytes} for one scan; the root layer comes first"""
+    if format == 'usdc' and Sdf is None:
+        raise RuntimeError("usdc output needs the usd-core package (pxr)")
+    rng = np.random.default_rng(seed)
+    specs = scene_objects(walls, objects, rng)
+    extension = '.' + format
+    root_prim = name.replace('-', '_')
+    root_name = f"{name}{extension}"
+    files = {}
+
+    textures = {}
+    if texture_size:
+        for spec in specs:
+            textures[spec.name] = f"textures/{spec.name}.png"
+            files_key = textures[spec.name]
+            files[files_key] = png_bytes(texture(texture_size, spec.color, rng))
+
+    # Objects are spread round-robin over the requested number of layers
+    layer_count = len(specs) if layers is None else layers
+    groups = [[] for _ in range(min(layer_count, len(specs)))]
+    for index, spec in enumerate(specs):
+        if groups:
+            groups[index % len(groups)].append(spec)
+
+    root_body = []
+    if not groups:
+        for spec in specs:
+            root_body.append(mesh_prim(spec, f"/{root_prim}", density, textures.get(spec.name), 4))
+    else:
+        for index, group in enumerate(groups):
+            layer_prim = group[0].name if len(group) == 1 else f"Group{index}"
+            layer_name = f"assets/{group[0].category}/{layer_prim}{extension}"
+            # Texture paths are relative to the layer that authors them
+            body = '\n\n'.join(
+                mesh_prim(spec, f"/{layer_prim}", density,
+                          textures.get(spec.name) and '../../' + textures[spec.name], 4)
+                for spec in group
+            )
+            text = layer_header(layer_prim) + f'def Xform "{layer_prim}"\n{{\n{body}\n}}\n'
+            files[layer_name] = text
+            root_body.append('\n'.join([
+                f'    def Xform "{layer_prim}_grp" (',
+                '        kind = "group"',
+                f'        prepend references = @./{layer_name}@',
+                '    )',
+                '    {',
+                '    }',
+            ]))
+
+    root_text = layer_header(root_prim) + f'def Xform "{root_prim}" (\n    kind = "assembly"\n)\n{{\n'
+    root_text += '\n\n'.join(root_body) + '\n}\n'
+
+    ordered = {root_name: root_text}
+    ordered.update(files)
+    return {
+        name: _encode_layer(data, format) if name.endswith(extension) else data
+        for name, data in ordered.items()
+    }
+
+
+def _encode_layer(text, format):
+    if format == 'usda':
+        return text.encode('utf-8')
+    layer = Sdf.Layer.CreateAnonymous('.usda')
+    layer.ImportFromString(text)
+    import tempfile
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'layer.usdc')
+        layer.Export(path)
+        with open(path, 'rb') as f:
+            return f.read()
+
+
+def write_usdz(path, files):
+    """Stored (uncompressed) zip with every entry's data 64-byte aligned"""
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED) as archive:
+        for name, data in files.items():
+            info = zipfile.ZipInfo(name, date_time=(2025, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_STORED
+            header_end = archive.fp.tell() + 30 + len(name.encode('utf-8'))
+            padding = (-(header_end + 4)) % USDZ_ALIGNMENT
+            # Extra field 0x1986 is what usdzip uses for alignment padding
+            info.extra = struct.pack('<HH', 0x1986, padding) + b'\x00' * padding
+            archive.writestr(info, data)
+
+
+def generate(out_dir, name, **params):
+    files = build_scan(name, **params)
+    path = os.path.join(out_dir, f"{name}.usdz")
+    write_usdz(path, files)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', required=True, help='output directory')
+    parser.add_argument('--name', default='scan')
+    parser.add_argument('--walls', type=int)
+    parser.add_argument('--objects', type=int)
+    parser.add_argument('--density', type=int, default=1, help='quads per box face edge')
+    parser.add_argument('--layers', type=int, help='referenced layers (0 = everything in the root)')
+    parser.add_argument('--texture-size', type=int, default=0, help='PNG texture per object (0 = none)')
+    parser.add_argument('--format', choices=('usda', 'usdc'), default='usda')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    if args.walls is None and args.objects is None:
+        specs = PRESETS
+    else:
+        specs = [{
+            'name': args.name,
+            'walls': args.walls or 4,
+            'objects': args.objects or 0,
+            'density': args.density,
+            'layers': args.layers,
+            'texture_size': args.texture_size,
+            'format': args.format,
+        }]
+
+    manifest = []
+    for spec in specs:
+        params = {key: value for key, value in spec.items() if key != 'name'}
+        params.setdefault('seed', args.seed)
+        try:
+            path = generate(args.out, spec['name'], **params)
+        except RuntimeError as e:
+            print(f"skipped {spec['name']}: {e}", file=sys.stderr)
+            continue
+        size = os.path.getsize(path)
+        manifest.append({'file': os.path.basename(path), 'size': size, 'params': params})
+        print(f"{path}: {size / (1024 * 1024):.2f} MB")
+
+    with open(os.path.join(args.out, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
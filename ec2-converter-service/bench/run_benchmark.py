@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+
+"""
+Per-stage conversion benchmark
+Converts every USDZ in a corpus with each backend and records how long each
+stage took, then writes the runs and p50/p95 summaries to JSON.
+
+    python3 bench/generate_corpus.py --out bench/corpus
+    python3 bench/run_benchmark.py bench/corpus --repeat 5 --output results.json
+    python3 bench/run_benchmark.py bench/corpus --compare results.json
+    python3 bench/run_benchmark.py bench/corpus --backend blender --profile fast --profile small
+
+Stages (seconds):
+  root      open the archive and find the root layer (layer graph)
+  extract   write the layers Blender needs to disk (blender only)
+  import    parse/compose the stage (native) or Blender's USD import
+  export    build the GLB (native) or Blender's glTF export
+  optimize  glb_optimize on the output
+  total     all of the above
+
+Peak RSS is the converting process's high-water mark (VmHWM): a fresh
+process per native run, the warm worker for Blender runs. Output size is
+the GLB as uploaded (after optimize). With --profile, each Blender option
+profile is reported as its own backend (blender:fast, blender:small, ...).
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import socket
+import argparse
+import platform
+import tempfile
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from usdz_reader import UsdzArchive  # noqa: E402
+from layer_graph import LayerGraph  # noqa: E402
+from blender_pool import (  # noqa: E402
+    BLENDER_PROFILES, DEFAULT_PROFILE, BlenderWorkerPool, read_peak_rss_mb, reset_peak_rss
+)
+from usda_native import NativeConverter, UnsupportedUsd  # noqa: E402
+
+try:
+    from glb_optimize import GlbOptimizeError, optimize_glb
+except ImportError:  # NumPy missing
+    optimize_glb = GlbOptimizeError = None
+
+BACKENDS = ('native', 'blender')
+STAGES = ('root', 'extract', 'import', 'export', 'optimize', 'total')
+BLENDER_TIMEOUT = 1800
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _optimize(glb_path, stages):
+    if optimize_glb is None:
+        return
+    start = time.perf_counter()
+    try:
+        optimize_glb(glb_path)
+    except GlbOptimizeError:
+        return  # e.g. Draco output of the small profile
+    stages['optimize'] = time.perf_counter() - start
+
+
+def run_native(usdz_path, work_dir, optimize):
+    """One native conversion; meant to run in a fresh process"""
+    reset_peak_rss(os.getpid())
+    glb_path = os.path.join(work_dir, 'native.glb')
+    stages = {}
+    result = {'stages': stages}
+    start = time.perf_counter()
+    try:
+        with UsdzArchive(usdz_path) as archive:
+            graph = LayerGraph(archive)
+            stages['root'] = time.perf_counter() - start
+
+            mark = time.perf_counter()
+            converter = NativeConverter(archive, graph.root)
+            stages['import'] = time.perf_counter() - mark
+
+            mark = time.perf_counter()
+            result['glb_size'] = converter.convert(glb_path)
+            stages['export'] = time.perf_counter() - mark
+        if optimize:
+            _optimize(glb_path, stages)
+        result['output_size'] = os.path.getsize(glb_path)
+        result['status'] = 'ok'
+    except UnsupportedUsd as e:
+        result.update(status='unsupported', error=str(e))
+    except Exception as e:
+        result.update(status='failed', error=f"{type(e).__name__}: {e}")
+    stages['total'] = time.perf_counter() - start
+    result['peak_rss_mb'] = read_peak_rss_mb(os.getpid())
+    return result
+
+
+def run_blender(pool, usdz_path, work_dir, optimize, profile=DEFAULT_PROFILE):
+    """One conversion on a warm Blender worker"""
+    glb_path = os.path.join(work_dir, 'blender.glb')
+    extract_dir = os.path.join(work_dir, 'extract')
+    stages = {}
+    result = {'stages': stages}
+
+    # Starting a worker is a one-off cost, not part of a conversion
+    worker = pool.acquire()
+    try:
+        start = time.perf_counter()
+        with UsdzArchive(usdz_path) as archive:
+            graph = LayerGraph(archive)
+            stages['root'] = time.perf_counter() - start
+
+            mark = time.perf_counter()
+            paths = archive.extract(extract_dir, graph.files())
+            stages['extract'] = time.perf_counter() - mark
+
+        reset_peak_rss(worker.process.pid)
+        reply = worker.convert(paths[graph.root], glb_path, BLENDER_TIMEOUT, profile)
+        result['peak_rss_mb'] = read_peak_rss_mb(worker.process.pid)
+        if not reply.get('success'):
+            result.update(status='failed', error=reply.get('error'))
+        else:
+            stages['import'] = reply['import_time']
+            stages['export'] = reply['export_time']
+            result['glb_size'] = os.path.getsize(glb_path)
+            if optimize:
+                _optimize(glb_path, stages)
+            result['output_size'] = os.path.getsize(glb_path)
+            result['status'] = 'ok'
+    except subprocess.TimeoutExpired:
+        result.update(status='failed', error=f"timeout after {BLENDER_TIMEOUT}s")
+    except Exception as e:
+        result.update(status='failed', error=f"{type(e).__name__}: {e}")
+    finally:
+        pool.release(worker)
+        shutil.rmtree(extract_dir, ignore_errors=True)
+    # Includes the pipe round trip on top of the worker-reported import/export
+    stages['total'] = time.perf_counter() - start
+    return result
+
+
+def summarize(runs):
+    """p50/p95/mean per backend and stage over successful runs"""
+    summary = {}
+    for backend in sorted({run['backend'] for run in runs}):
+        backend_runs = [run for run in runs if run['backend'] == backend]
+        ok = [run for run in backend_runs if run['status'] == 'ok']
+        entry = {
+            'runs': len(backend_runs),
+            'ok': len(ok),
+            'unsupported': sum(1 for run in backend_runs if run['status'] == 'unsupported'),
+            'failed': sum(1 for run in backend_runs if run['status'] == 'failed'),
+            'stages': {},
+        }
+        for stage in STAGES:
+            values = [run['stages'][stage] for run in ok if stage in run['stages']]
+            if values:
+                entry['stages'][stage] = {
+                    'p50': percentile(values, 0.5),
+                    'p95': percentile(values, 0.95),
+                    'mean': sum(values) / len(values),
+                    'n': len(values),
+                }
+        rss = [run['peak_rss_mb'] for run in ok if run.get('peak_rss_mb') is not None]
+        if rss:
+            entry['peak_rss_mb'] = {'p50': percentile(rss, 0.5), 'p95': percentile(rss, 0.95), 'max': max(rss)}
+        sizes = [run['output_size'] for run in ok if run.get('output_size') is not None]
+        if sizes:
+            entry['output_size'] = {'p50': percentile(sizes, 0.5), 'mean': sum(sizes) / len(sizes)}
+        summary[backend] = entry
+    return summary
+
+
+def per_file(runs):
+    """p50 total and peak RSS per file and backend"""
+    files = {}
+    for run in runs:
+        if run['status'] != 'ok':
+            continue
+        files.setdefault(run['file'], {}).setdefault(run['backend'], []).append(run)
+    return {
+        name: {
+            backend: {
+                'total_p50': percentile([run['stages']['total'] for run in backend_runs], 0.5),
+                'peak_rss_mb': max((run.get('peak_rss_mb') or 0) for run in backend_runs),
+                'glb_size': backend_runs[0].get('glb_size'),
+                'output_size': backend_runs[0].get('output_size'),
+            }
+            for backend, backend_runs in backends.items()
+        }
+        for name, backends in sorted(files.items())
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SERVICE_DIR,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'host': socket.gethostname(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'commit': commit,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+
+
+def print_summary(summary):
+    for backend, entry in summary.items():
+        print(f"\n{backend}: {entry['ok']}/{entry['runs']} ok, "
+              f"{entry['unsupported']} unsupported, {entry['failed']} failed")
+        for stage, stats in entry['stages'].items():
+            print(f"  {stage:<9} p50 {stats['p50']:8.3f}s  p95 {stats['p95']:8.3f}s  (n={stats['n']})")
+        if 'peak_rss_mb' in entry:
+            rss = entry['peak_rss_mb']
+            print(f"  peak RSS  p50 {rss['p50']:8.1f}MB max {rss['max']:8.1f}MB")
+        if 'output_size' in entry:
+            size = entry['output_size']
+            print(f"  GLB size  p50 {size['p50'] / 1024:8.1f}KB mean {size['mean'] / 1024:8.1f}KB")
+
+
+def print_comparison(summary, previous):
+    print(f"\nChange in p50 vs {previous.get('environment', {}).get('commit') or 'previous run'}:")
+    for backend, entry in summary.items():
+        before = previous.get('summary', {}).get(backend, {}).get('stages', {})
+        for stage, stats in entry['stages'].items():
+            if stage not in before or not before[stage]['p50']:
+                continue
+            old = before[stage]['p50']
+            change = (stats['p50'] - old) / old * 100
+            print(f"  {backend:<8} {stage:<9} {old:8.3f}s -> {stats['p50']:8.3f}s ({change:+.1f}%)")
+        old_size = previous.get('summary', {}).get(backend, {}).get('output_size')
+        if old_size and 'output_size' in entry and old_size['mean']:
+            change = (entry['output_size']['mean'] - old_size['mean']) / old_size['mean'] * 100
+            print(f"  {backend:<8} GLB size  {old_size['mean'] / 1024:7.1f}KB -> "
+                  f"{entry['output_size']['mean'] / 1024:7.1f}KB ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus', help='directory of .usdz files (or a single file)')
+    parser.add_argument('--backend', action='append', choices=BACKENDS,
+                        help='backend to run (repeatable; default: all)')
+    parser.add_argument('--profile', action='append', choices=sorted(BLENDER_PROFILES),
+                        help=f'Blender option profile (repeatable; default: {DEFAULT_PROFILE})')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-optimize', action='store_true', help='skip the optimize stage')
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', help='previous results JSON to compare p50s against')
+    args = parser.parse_args()
+
+    if os.path.isdir(args.corpus):
+        files = sorted(os.path.join(args.corpus, name) for name in os.listdir(args.corpus)
+                       if name.lower().endswith('.usdz'))
+    else:
+        files = [args.corpus]
+    if not files:
+        parser.error(f"no .usdz files in {args.corpus}")
+
+    backends = args.backend or list(BACKENDS)
+    if 'blender' in backends and args.profile:
+        # Each profile is compared as a backend of its own
+        index = backends.index('blender')
+        backends[index:index + 1] = [f"blender:{profile}" for profile in args.profile]
+    optimize = not args.no_optimize
+    work_dir = tempfile.mkdtemp(prefix='usdz-bench-')
+    pool = BlenderWorkerPool(1, work_dir) if any(b.startswith('blender') for b in backends) else None
+    runs = []
+    try:
+        # One process per native run, so each peak RSS is that run's alone
+        with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+            for path in files:
+                name = os.path.basename(path)
+                for backend in backends:
+                    for iteration in range(args.repeat):
+                        if backend == 'native':
+                            result = executor.submit(run_native, path, work_dir, optimize).result()
+                        else:
+                            profile = backend.partition(':')[2] or DEFAULT_PROFILE
+                            result = run_blender(pool, path, work_dir, optimize, profile)
+                        result.update(file=name, backend=backend, iteration=iteration,
+                                      usdz_size=os.path.getsize(path))
+                        runs.append(result)
+                        status = result['status'] if result['status'] != 'ok' else f"{result['stages']['total']:.3f}s"
+                        print(f"{name} [{backend} #{iteration + 1}] {status}")
+                        if result['status'] == 'unsupported':
+                            break  # deterministic; no point repeating
+    finally:
+        if pool:
+            pool.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    summary = summarize(runs)
+    results = {
+        'environment': environment(),
+        'corpus': os.path.abspath(args.corpus),
+        'repeat': args.repeat,
+        'optimize': optimize,
+        'profiles': {backend: BLENDER_PROFILES[backend.partition(':')[2]]
+                     for backend in backends if backend.startswith('blender:')},
+        'summary': summary,
+        'files': per_file(runs),
+        'runs': runs,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print_summary(summary)
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            print_comparison(summary, json.load(f))
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
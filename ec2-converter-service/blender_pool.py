@@ -0,0 +1,598 @@
+#!/usr/bin/env python3
+
+"""
+Warm Blender worker pool
+Keeps long-lived `blender --background` processes that take conversion jobs
+over stdin/stdout, so per-file latency is USD import + GLB export only.
+Jobs may be batches of (usd, glb) pairs converted in one session, and may
+name an import/export option profile (BLENDER_PROFILES).
+
+The worker script also runs standalone on a manifest (a JSON list of
+[usd, glb] pairs) and writes per-item results as JSON:
+    blender --background --factory-startup --python worker.py -- \
+        --manifest manifest.json --results results.json
+"""
+
+import os
+import json
+import queue
+import threading
+import subprocess
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+READY_MARKER = '@@USDZ_WORKER_READY@@'
+RESULT_MARKER = '@@USDZ_WORKER_RESULT@@'
+ITEM_MARKER = '@@USDZ_WORKER_ITEM@@'
+
+# Skipped by the fast and small profiles: nothing a floor-plan GLB shows
+LEAN_IMPORT = {
+    'import_cameras': False,
+    'import_lights': False,
+    'import_volumes': False,
+    'import_guide': False,
+    'import_proxy': False,
+    'import_render': True,
+    'import_subdiv': False,
+    'import_visible_only': True,
+}
+LEAN_EXPORT = {
+    'export_cameras': False,
+    'export_lights': False,
+    'export_animations': False,
+    'export_morph': False,
+    'export_skins': False,
+    'export_extras': False,
+    'export_tangents': False,
+    'export_unused_images': False,
+    'export_unused_textures': False,
+}
+
+# USD import / glTF export operator options per profile. Options the running
+# Blender does not have are skipped (and reported), so one table serves 3.x-4.x.
+BLENDER_PROFILES = {
+    # Blender's defaults: everything the USD describes
+    'faithful': {'import': {}, 'export': {}},
+    # Geometry and materials only
+    'fast': {'import': LEAN_IMPORT, 'export': LEAN_EXPORT},
+    # ...with Draco-compressed meshes (glb_optimize leaves these as they are)
+    'small': {
+        'import': LEAN_IMPORT,
+        'export': dict(
+            LEAN_EXPORT,
+            export_draco_mesh_compression_enable=True,
+            export_draco_mesh_compression_level=6,
+            export_draco_position_quantization=14,
+            export_draco_normal_quantization=10,
+            export_draco_texcoord_quantization=12,
+        ),
+    },
+}
+DEFAULT_PROFILE = 'faithful'
+
+
+def profile_options(profile):
+    """{'import': ..., 'export': ...} operator options of a named profile"""
+    if profile not in BLENDER_PROFILES:
+        raise ValueError(f"Unknown Blender profile {profile!r} (have {', '.join(BLENDER_PROFILES)})")
+    return BLENDER_PROFILES[profile]
+
+# Script executed inside Blender. Reads one JSON job per line from stdin and
+# answers with one RESULT_MARKER line per job on stdout; batch jobs
+# ({"items": [...]}) also report each item as an ITEM_MARKER line.
+WORKER_SCRIPT = '''
+import bpy
+import sys
+import json
+import time
+import traceback
+
+READY_MARKER = "''' + READY_MARKER + '''"
+RESULT_MARKER = "''' + RESULT_MARKER + '''"
+ITEM_MARKER = "''' + ITEM_MARKER + '''"
+
+DATA_COLLECTIONS = (
+    'objects', 'meshes', 'materials', 'images', 'textures', 'node_groups',
+    'cameras', 'lights', 'curves', 'actions', 'armatures', 'collections',
+)
+
+
+def status_mb(field):
+    """A /proc/self/status memory field in MB (VmRSS, VmHWM), or None"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def reset_peak_rss():
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def failure(e):
+    return {'success': False, 'error': str(e) or type(e).__name__,
+            'oom': isinstance(e, MemoryError), 'peak_rss_mb': status_mb('VmHWM')}
+
+
+def supported_options(operator, options, skipped):
+    """The options this Blender's operator has; the rest are added to skipped"""
+    names = set(operator.get_rna_type().properties.keys())
+    for name in options:
+        if name not in names:
+            skipped.append(name)
+    return {name: value for name, value in options.items() if name in names}
+
+
+def reset_scene():
+    """Remove everything the previous job imported"""
+    for name in DATA_COLLECTIONS:
+        collection = getattr(bpy.data, name, None)
+        if collection is None:
+            continue
+        for block in list(collection):
+            try:
+                collection.remove(block)
+            except Exception:
+                pass
+
+
+def convert(job):
+    start = time.time()
+    usd_file = job['usd_file']
+    glb_file = job['glb_file']
+    skipped = []
+    import_options = supported_options(bpy.ops.wm.usd_import, job.get('import_options') or {}, skipped)
+    export_options = supported_options(bpy.ops.export_scene.gltf, job.get('export_options') or {}, skipped)
+
+    reset_scene()
+    reset_peak_rss()
+    rss_before = status_mb('VmRSS')
+
+    print(f"[{time.time()-start:.1f}s] Importing USD: {usd_file}", flush=True)
+    bpy.ops.wm.usd_import(filepath=usd_file, **import_options)
+    import_time = time.time() - start
+    print(f"[{import_time:.1f}s] Import complete", flush=True)
+
+    if len(bpy.data.objects) == 0:
+        raise RuntimeError("No objects imported from USD")
+
+    print(f"[{time.time()-start:.1f}s] Imported {len(bpy.data.objects)} objects", flush=True)
+    print(f"[{time.time()-start:.1f}s] Exporting GLB: {glb_file}", flush=True)
+
+    bpy.ops.export_scene.gltf(
+        filepath=glb_file,
+        export_format='GLB',
+        **export_options
+    )
+
+    elapsed = time.time() - start
+    print(f"[{elapsed:.1f}s] SUCCESS: Conversion complete", flush=True)
+    return {
+        'success': True,
+        'objects': len(bpy.data.objects),
+        'import_time': import_time,
+        'export_time': elapsed - import_time,
+        'elapsed': elapsed,
+        'rss_before_mb': rss_before,
+        'peak_rss_mb': status_mb('VmHWM'),
+        'skipped_options': skipped,
+    }
+
+
+def convert_items(items, report=None):
+    """Convert every item; a failed item does not stop the others"""
+    results = []
+    for index, item in enumerate(items):
+        try:
+            result = convert(item)
+        except Exception as e:
+            traceback.print_exc()
+            print(f"ERROR: {item.get('usd_file')}: {e}", flush=True)
+            result = failure(e)
+        result.update(index=index, usd_file=item.get('usd_file'), glb_file=item.get('glb_file'))
+        if report:
+            report(result)
+        results.append(result)
+    reset_scene()
+    return results
+
+
+def convert_batch(job):
+    results = convert_items(
+        job['items'],
+        report=lambda result: print(ITEM_MARKER + json.dumps(result), flush=True)
+    )
+    return {
+        'success': all(result['success'] for result in results),
+        'items': len(results),
+        'failed': sum(1 for result in results if not result['success']),
+    }
+
+
+def run_manifest(manifest_path, results_path):
+    """Standalone batch: [[usd, glb], ...] in, per-item results JSON out"""
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+    items = [
+        item if isinstance(item, dict) else {'usd_file': item[0], 'glb_file': item[1]}
+        for item in manifest
+    ]
+    start = time.time()
+    results = convert_items(items)
+    with open(results_path, 'w') as f:
+        json.dump({'elapsed': time.time() - start, 'items': results}, f, indent=2)
+    return all(result['success'] for result in results)
+
+
+bpy.ops.wm.read_factory_settings(use_empty=True)
+
+args = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+if '--manifest' in args:
+    manifest_path = args[args.index('--manifest') + 1]
+    results_path = args[args.index('--results') + 1] if '--results' in args else manifest_path + '.results.json'
+    sys.exit(0 if run_manifest(manifest_path, results_path) else 1)
+
+print(READY_MARKER, flush=True)
+
+for line in sys.stdin:
+    line = line.strip()
+    if not line:
+        continue
+    try:
+        job = json.loads(line)
+        result = convert_batch(job) if 'items' in job else convert(job)
+    except Exception as e:
+        traceback.print_exc()
+        print(f"ERROR: {e}", flush=True)
+        result = failure(e)
+    print(RESULT_MARKER + json.dumps(result), flush=True)
+'''
+
+# Blender output lines worth forwarding to the service log
+PROGRESS_HINTS = ['[', 's]', 'SUCCESS', 'ERROR', 'Imported', 'Exporting']
+
+
+def _read_status_mb(pid, field):
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def read_rss_mb(pid):
+    """Resident set size of a process in MB (Linux /proc), or None"""
+    return _read_status_mb(pid, 'VmRSS')
+
+
+def read_peak_rss_mb(pid):
+    """Peak resident set size (high-water mark) of a process in MB, or None"""
+    return _read_status_mb(pid, 'VmHWM')
+
+
+def reset_peak_rss(pid):
+    """Reset the RSS high-water mark to the current RSS; False if not permitted"""
+    try:
+        with open(f'/proc/{pid}/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _job(usd_file, glb_file, profile):
+    options = profile_options(profile)
+    return {
+        'usd_file': usd_file,
+        'glb_file': glb_file,
+        'import_options': options['import'],
+        'export_options': options['export'],
+    }
+
+
+class BlenderWorker:
+    """One long-lived Blender process serving conversion jobs over a pipe"""
+
+    def __init__(self, script_path, worker_id, startup_timeout=120, memory_limiter=None):
+        self.script_path = script_path
+        self.worker_id = worker_id
+        self.startup_timeout = startup_timeout
+        self.memory_limiter = memory_limiter
+        self.memory_handle = None
+        self.process = None
+        self.jobs_done = 0
+        self.started_at = None
+        self._results = queue.Queue()
+        self._reader = None
+
+    def start(self):
+        """Launch Blender and wait until the worker script is ready"""
+        start = time.time()
+        self.process = subprocess.Popen(
+            ['blender', '--background', '--factory-startup', '--python', self.script_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1
+        )
+        if self.memory_limiter:
+            self.memory_handle = self.memory_limiter.apply(self.process.pid, f"blender-{self.worker_id}")
+        self._reader = threading.Thread(target=self._read_output, daemon=True)
+        self._reader.start()
+
+        ready = self._wait_for(READY_MARKER, self.startup_timeout)
+        if ready is None:
+            self.stop()
+            raise RuntimeError(f"Blender worker {self.worker_id} failed to start")
+
+        self.started_at = time.time()
+        logger.info(f"🔥 Blender worker {self.worker_id} ready (pid {self.process.pid}, "
+                    f"startup {self.started_at - start:.1f}s)")
+
+    def _read_output(self):
+        """Forward Blender output and collect protocol lines"""
+        for line in self.process.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith((RESULT_MARKER, ITEM_MARKER)) or line == READY_MARKER:
+                self._results.put(line)
+            elif any(x in line for x in PROGRESS_HINTS):
+                logger.info(f"   Blender[{self.worker_id}]: {line}")
+        # EOF - process exited
+        self._results.put(None)
+
+    def _wait_for(self, marker, timeout):
+        try:
+            line = self._results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if line is None or not line.startswith(marker):
+            return None
+        return line[len(marker):]
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def _exit_code(self):
+        """Exit code once the process has gone (output EOF comes just before exit)"""
+        try:
+            return self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            return self.process.poll()
+
+    def _oom_kills(self):
+        return self.memory_handle.oom_kills() if self.memory_handle else None
+
+    def _check_oom(self, result, oom_kills_before):
+        """Mark a failure caused by the worker's memory limit"""
+        if result.get('success') or result.get('oom'):
+            return result
+        after = self._oom_kills()
+        if after is not None and oom_kills_before is not None and after > oom_kills_before:
+            result['oom'] = True
+            result['error'] = f"out of memory (limit {self.memory_handle.limit_mb:.0f} MB): {result.get('error')}"
+        return result
+
+    def rss_mb(self):
+        if not self.is_alive():
+            return None
+        return read_rss_mb(self.process.pid)
+
+    def convert(self, usd_file, glb_file, timeout, profile=DEFAULT_PROFILE):
+        """Run one job; raises subprocess.TimeoutExpired if it does not finish in time"""
+        job = _job(usd_file, glb_file, profile)
+        oom_kills = self._oom_kills()
+        try:
+            self.process.stdin.write(json.dumps(job) + '\n')
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            return {'success': False, 'error': f"worker pipe closed: {e}"}
+
+        try:
+            line = self._results.get(timeout=timeout)
+        except queue.Empty:
+            self.stop()
+            raise subprocess.TimeoutExpired(['blender', self.script_path], timeout)
+
+        self.jobs_done += 1
+        if line is None:
+            result = {'success': False, 'error': f"worker exited with code {self._exit_code()}"}
+        else:
+            result = json.loads(line[len(RESULT_MARKER):])
+        return self._check_oom(result, oom_kills)
+
+    def convert_batch(self, items, timeout, profiles=None):
+        """Run (usd_file, glb_file) pairs in one job; returns one result per item
+
+        `timeout` applies to each item, or is a list with one timeout per item.
+        `profiles` names the option profile of each item (default: faithful).
+        Items after a timeout or a crash are reported with 'not_run' set, so
+        the caller can run them again on a fresh worker.
+        """
+        timeouts = list(timeout) if isinstance(timeout, (list, tuple)) else [timeout] * len(items)
+        profiles = profiles or [DEFAULT_PROFILE] * len(items)
+        job = {'items': [
+            _job(usd_file, glb_file, profile) for (usd_file, glb_file), profile in zip(items, profiles)
+        ]}
+        oom_kills = self._oom_kills()
+        try:
+            self.process.stdin.write(json.dumps(job) + '\n')
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            return [{'success': False, 'error': f"worker pipe closed: {e}"} for _ in items]
+
+        results = []
+        while len(results) < len(items):
+            timeout = timeouts[len(results)]
+            try:
+                line = self._results.get(timeout=timeout)
+            except queue.Empty:
+                self.stop()
+                results.append({'success': False, 'error': f"timeout after {timeout:.0f}s"})
+                break
+            if line is None:
+                results.append(self._check_oom(
+                    {'success': False, 'error': f"worker exited with code {self._exit_code()}"},
+                    oom_kills
+                ))
+                break
+            if line.startswith(ITEM_MARKER):
+                results.append(json.loads(line[len(ITEM_MARKER):]))
+                self.jobs_done += 1
+            elif line.startswith(RESULT_MARKER):
+                # The batch job itself failed (e.g. malformed)
+                error = json.loads(line[len(RESULT_MARKER):]).get('error', 'batch failed')
+                results.append({'success': False, 'error': error})
+                break
+        else:
+            # Consume the batch summary line
+            if self._wait_for(RESULT_MARKER, max(timeouts)) is None:
+                self.stop()
+
+        while len(results) < len(items):
+            results.append({'success': False, 'error': 'not run: batch aborted', 'not_run': True})
+        return results
+
+    def stop(self):
+        """Terminate the Blender process"""
+        if self.process is None:
+            return
+        try:
+            if self.process.poll() is None:
+                self.process.stdin.close()
+                self.process.terminate()
+                try:
+                    self.process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+                    self.process.wait()
+        except OSError:
+            pass
+        if self.memory_handle:
+            self.memory_handle.release()
+        logger.info(f"🛑 Blender worker {self.worker_id} stopped after {self.jobs_done} job(s)")
+
+
+class BlenderWorkerPool:
+    """Pool of warm Blender workers, recycled after N jobs or an RSS threshold"""
+
+    def __init__(self, size, script_dir, max_jobs_per_worker=50, max_rss_mb=2048,
+                 memory_limiter=None, memory_gate=None):
+        self.size = size
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_rss_mb = max_rss_mb
+        self.memory_limiter = memory_limiter
+        self.memory_gate = memory_gate
+        self.script_path = os.path.join(script_dir, f'blender_worker_{os.getpid()}.py')
+        with open(self.script_path, 'w') as f:
+            f.write(WORKER_SCRIPT)
+
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = set()
+        self._next_id = 0
+        for _ in range(size):
+            self._idle.put(None)  # slot without a running worker yet
+
+    def _spawn(self):
+        with self._lock:
+            self._next_id += 1
+            worker_id = self._next_id
+        worker = BlenderWorker(self.script_path, worker_id, memory_limiter=self.memory_limiter)
+        worker.start()
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _retire(self, worker, reason):
+        logger.info(f"♻️  Recycling Blender worker {worker.worker_id}: {reason}")
+        worker.stop()
+        with self._lock:
+            self._workers.discard(worker)
+
+    def _needs_recycle(self, worker):
+        if not worker.is_alive():
+            return "process exited"
+        if worker.jobs_done >= self.max_jobs_per_worker:
+            return f"{worker.jobs_done} jobs done"
+        rss = worker.rss_mb()
+        if rss is not None and rss > self.max_rss_mb:
+            return f"RSS {rss:.0f} MB > {self.max_rss_mb} MB"
+        return None
+
+    def acquire(self):
+        """Take an idle worker, starting one if the slot is empty"""
+        worker = self._idle.get()
+        if worker is None or not worker.is_alive():
+            try:
+                worker = self._spawn()
+            except Exception:
+                self._idle.put(None)
+                raise
+        return worker
+
+    def release(self, worker):
+        """Return a worker to the pool, recycling it if needed"""
+        reason = self._needs_recycle(worker)
+        if reason:
+            self._retire(worker, reason)
+            self._idle.put(None)
+        else:
+            self._idle.put(worker)
+
+    def _admit(self, worker, memory_mb):
+        if self.memory_gate is None or not memory_mb:
+            return None
+        return self.memory_gate.admit(memory_mb, worker.process.pid)
+
+    def convert(self, usd_file, glb_file, timeout, memory_mb=None, profile=DEFAULT_PROFILE):
+        """Convert one USD file to GLB on a warm worker
+
+        With a memory gate, the job waits until its estimated memory fits.
+        """
+        worker = self.acquire()
+        ticket = None
+        try:
+            ticket = self._admit(worker, memory_mb)
+            return worker.convert(usd_file, glb_file, timeout, profile)
+        finally:
+            if ticket is not None:
+                self.memory_gate.release(ticket)
+            self.release(worker)
+
+    def convert_batch(self, items, timeout, memory_mb=None, profiles=None):
+        """Convert several (usd_file, glb_file) pairs in one Blender session"""
+        worker = self.acquire()
+        ticket = None
+        try:
+            ticket = self._admit(worker, memory_mb)
+            return worker.convert_batch(items, timeout, profiles)
+        finally:
+            if ticket is not None:
+                self.memory_gate.release(ticket)
+            self.release(worker)
+
+    def shutdown(self):
+        """Stop all workers and remove the worker script"""
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
+        if os.path.exists(self.script_path):
+            os.remove(self.script_path)
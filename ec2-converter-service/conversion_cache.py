@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+
+"""
+Content-addressed conversion cache
+Maps the MD5 of a USDZ to the S3 key of a GLB already converted from the same
+bytes, so a re-upload under a new key is satisfied by a server-side copy.
+MD5 is used because it is what S3 reports as the ETag of single-part uploads,
+which lets most hits skip the download as well as the conversion.
+"""
+
+import os
+import json
+import math
+import time
+import hashlib
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS glb_cache (
+    content_md5 TEXT PRIMARY KEY,
+    glb_key TEXT NOT NULL,
+    glb_size INTEGER,
+    glb_etag TEXT,
+    companion_etags TEXT,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS glb_cache_last_used ON glb_cache (last_used_at);
+'''
+
+# Columns added after the table was first created
+MIGRATIONS = (
+    'ALTER TABLE glb_cache ADD COLUMN glb_etag TEXT',
+    'ALTER TABLE glb_cache ADD COLUMN companion_etags TEXT',
+)
+
+
+def etag_md5(etag):
+    """Content MD5 from an S3 ETag, or None for multipart ETags ("<md5>-<parts>")"""
+    etag = (etag or '').strip('"')
+    if not etag or '-' in etag or len(etag) != 32:
+        return None
+    return etag.lower()
+
+
+def file_md5(path, chunk_size=8 * 1024 * 1024):
+    digest = hashlib.md5(usedforsecurity=False)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def multipart_etag(path, part_size):
+    """ETag S3 assigns to a multipart upload of this file (MD5 of the part MD5s + -<parts>)"""
+    digests = []
+    with open(path, 'rb') as f:
+        for part in iter(lambda: f.read(part_size), b''):
+            digests.append(hashlib.md5(part, usedforsecurity=False).digest())
+    combined = hashlib.md5(b''.join(digests), usedforsecurity=False).hexdigest()
+    return f"{combined}-{len(digests)}"
+
+# Part sizes (MiB) used by common S3 clients: boto3/AWS CLI, SDK minimum, others
+COMMON_PART_SIZES_MB = (8, 5, 16, 15, 32, 64, 100)
+
+
+def etag_matches_file(etag, path, part_sizes=()):
+    """Whether an S3 ETag is the ETag of this file's bytes
+
+    Multipart ETags depend on the part size, so the given part sizes are tried
+    first, then common client defaults and the whole-MiB size that yields the
+    object's part count. Only sizes producing that part count are hashed.
+    """
+    etag = (etag or '').strip('"').lower()
+    if not etag:
+        return False
+    if '-' not in etag:
+        return etag == file_md5(path)
+
+    try:
+        parts = int(etag.rsplit('-', 1)[1])
+    except ValueError:
+        return False
+    size = os.path.getsize(path)
+    mib = 1024 * 1024
+    candidates = list(part_sizes) + [mb * mib for mb in COMMON_PART_SIZES_MB]
+    candidates.append(math.ceil(size / parts / mib) * mib)
+    for part_size in dict.fromkeys(candidates):
+        if part_size and math.ceil(size / part_size) == parts and multipart_etag(path, part_size) == etag:
+            return True
+    return False
+
+
+class ConversionCache:
+    """SQLite-backed content hash -> GLB key index with LRU/TTL eviction"""
+
+    def __init__(self, db_path, max_entries=100000, ttl_seconds=90 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        for statement in MIGRATIONS:
+            try:
+                self._conn.execute(statement)
+            except sqlite3.OperationalError:
+                pass  # Column exists already
+
+    def get(self, content_md5):
+        """(GLB key, its ETag, companion ETags) for this content, or None; counts the hit or miss
+
+        The key may have been overwritten since: callers compare the ETag with
+        the object's current one before trusting the entry. Companions are the
+        other objects of the conversion (LODs, chunks) as {key: ETag}, or None
+        for entries written before they were recorded.
+        """
+        if not content_md5:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT glb_key, glb_etag, created_at, companion_etags FROM glb_cache WHERE content_md5 = ?',
+                (content_md5,)
+            ).fetchone()
+            if row and now - row[2] <= self.ttl_seconds:
+                self._conn.execute(
+                    'UPDATE glb_cache SET last_used_at = ?, hits = hits + 1 WHERE content_md5 = ?',
+                    (now, content_md5)
+                )
+                self.hits += 1
+                return row[0], row[1], json.loads(row[3]) if row[3] is not None else None
+            if row:
+                # Expired
+                self._conn.execute('DELETE FROM glb_cache WHERE content_md5 = ?', (content_md5,))
+            self.misses += 1
+            return None
+
+    def put(self, content_md5, glb_key, glb_size=None, glb_etag=None, companion_etags=None):
+        if not content_md5:
+            return
+        now = time.time()
+        companions = json.dumps(companion_etags, sort_keys=True) if companion_etags is not None else None
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO glb_cache (content_md5, glb_key, glb_size, glb_etag, companion_etags, '
+                'created_at, last_used_at) VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (content_md5) DO UPDATE SET glb_key = excluded.glb_key, '
+                'glb_size = excluded.glb_size, glb_etag = excluded.glb_etag, '
+                'companion_etags = excluded.companion_etags, '
+                'created_at = excluded.created_at, last_used_at = excluded.last_used_at',
+                (content_md5, glb_key, glb_size, glb_etag, companions, now, now)
+            )
+        self.evict()
+
+    def invalidate(self, content_md5):
+        """Drop an entry whose GLB no longer exists or was overwritten"""
+        with self._lock:
+            self._conn.execute('DELETE FROM glb_cache WHERE content_md5 = ?', (content_md5,))
+
+    def evict(self):
+        """Remove expired entries, then least recently used ones over max_entries"""
+        with self._lock:
+            self._conn.execute(
+                'DELETE FROM glb_cache WHERE created_at < ?',
+                (time.time() - self.ttl_seconds,)
+            )
+            count = self._conn.execute('SELECT COUNT(*) FROM glb_cache').fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    'DELETE FROM glb_cache WHERE content_md5 IN ('
+                    'SELECT content_md5 FROM glb_cache ORDER BY last_used_at LIMIT ?)',
+                    (excess,)
+                )
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
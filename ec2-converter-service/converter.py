@@ -8,23 +8,115 @@ TESTED AND WORKING - Based on test-converter.py
 
 import os
 import sys
+import json
 import time
+import hashlib
 import subprocess
 import tempfile
+import shutil
 import logging
+import threading
 from pathlib import Path
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from blender_pool import BlenderWorkerPool, profile_options
+from pipeline import Stage, StagedPipeline
+from scheduler import SizeScheduler
+from s3_events import SQSEventSource
+from s3_listing import IncrementalLister
+from job_store import JobStore
+from conversion_cache import ConversionCache, etag_md5, etag_matches_file, file_md5
+from usdz_reader import UsdzArchive, UsdzError
+from usda_native import UnsupportedUsd
+from backends import (
+    BackendSelector, BlenderBackend, NativeBackend, feature_class, file_features
+)
+from layer_graph import analyze_usdz
+from metrics import MetricsRegistry, MetricsServer
+from throughput_model import ThroughputModel, glb_triangles
+from memory_limits import MemoryLimiter, MemoryGate, total_memory_mb
+from textures import TextureProcessor
+try:
+    from glb_optimize import GlbOptimizeError, optimize_glb
+    from glb_lod import build_lods, lod_name
+    from glb_chunks import CHUNK_MODES, GlbChunkError, chunk_dir_name, chunk_manifest_name, split_glb
+except ImportError:  # NumPy missing - GLBs are uploaded as exported
+    optimize_glb = GlbOptimizeError = build_lods = lod_name = None
+    split_glb = GlbChunkError = chunk_dir_name = chunk_manifest_name = CHUNK_MODES = None
 
 # Configuration
 S3_BUCKET = "your-home"
 S3_PREFIX = "staging/floor-plan/"
 CHECK_INTERVAL = 30  # seconds
+SQS_QUEUE_URL = None  # Set to consume S3 ObjectCreated notifications instead of polling
+SQS_ENDPOINT_URL = None  # e.g. "http://localhost:9324" for a local ElasticMQ stand-in
+SQS_VISIBILITY_TIMEOUT = 2400  # Longer than a conversion; extended while a file waits or converts, so messages are not redelivered mid-job
+RECONCILE_INTERVAL = 3600  # Full listing sweep (seconds); regular polls only list new keys
+S3_PARTITION_FORMAT = None  # e.g. "%Y/%m/%d/" if uploads land in date-partitioned prefixes
+PARTITION_LOOKBACK_DAYS = 1  # Partitions before the watermark day that are still listed
+S3_LIST_AFTER_LAST_KEY = True  # Polls list only keys sorting after the newest one seen; others wait for the full sweep
+LISTING_OVERLAP_SECONDS = 300  # Re-list objects this far behind the LastModified watermark
 TEMP_DIR = os.path.expanduser("~/usdz-converter")
-PROCESSED_LOG = os.path.join(TEMP_DIR, "processed.txt")
+PROCESSED_LOG = os.path.join(TEMP_DIR, "processed.txt")  # Legacy history, imported into JOB_DB once
+JOB_DB = os.path.join(TEMP_DIR, "jobs.db")
+MAX_ATTEMPTS = 3  # Conversion attempts per (key, ETag, size) before giving up
+CACHE_ENABLED = True  # Reuse the GLB of byte-identical USDZ re-uploads
+CACHE_MAX_ENTRIES = 100000  # Least recently used entries beyond this are evicted
+CACHE_TTL_DAYS = 90
+LISTING_WATERMARK = os.path.join(TEMP_DIR, "listing-watermark.json")
 DELETE_USDZ_AFTER = False
-CONVERSION_TIMEOUT = 1800  # 30 minutes
+CONVERSION_TIMEOUT = 1800  # 30 minutes; also the cap of adaptive timeouts
+ADAPTIVE_TIMEOUT = True  # Per-job timeout from the throughput of past conversions
+TIMEOUT_MULTIPLIER = 4  # Timeout = predicted duration x this (doubled on each retry)
+MIN_CONVERSION_TIMEOUT = 120  # Floor of adaptive timeouts (seconds)
+TIMEOUT_MODEL_MIN_RUNS = 20  # Conversions recorded before timeouts adapt
+NATIVE_CONVERSION_ENABLED = True  # Convert simple USDA scans without Blender (needs numpy)
+BACKEND_SELECTION = True  # Pick each file's backend from recorded timings; False = native, then Blender
+BACKEND_MIN_RUNS = 20  # Runs of a backend on a kind of file before its timings are trusted
+BACKEND_MIN_SUCCESS_RATE = 0.5  # Backends failing more often are only tried last
+BACKEND_EXPLORATION = 0.05  # Share of files sent to a backend that has not been measured yet
+GLB_OPTIMIZE = True  # Weld, reorder and narrow GLB geometry after conversion (needs numpy)
+GLB_QUANTIZE = True  # ...and store it with KHR_mesh_quantization
+GLB_INSTANCING = 'nodes'  # Share repeated meshes: 'nodes', 'gpu' (EXT_mesh_gpu_instancing) or None
+TEXTURE_MAX_SIZE = 2048  # Longest side of textures, in pixels, before Blender reads them (None to keep; needs pillow)
+TEXTURE_FORMAT = 'webp'  # Re-encode GLB textures: 'webp' (EXT_texture_webp), 'ktx2' (needs toktx) or None
+TEXTURE_QUALITY = 85  # WebP quality
+TEXTURE_WORKERS = None  # Texture processes (None = one per core)
+TEXTURE_CACHE_MAX_MB = 1024  # Processed textures kept by content hash
+LOD_LEVELS = ()  # Extra <name>.lodN.glb outputs as (share of triangles kept, texture size), e.g. ((0.5, 1024), (0.15, 512))
+LOD_MIN_TRIANGLES = 5000  # Primitives with fewer triangles are copied into every LOD unchanged
+CHUNK_MODE = None  # Also upload the scene split into GLB chunks plus <name>.chunks.json: 'category', 'room' or None
 MAX_FILE_SIZE_MB = 500  # Warning threshold
+CONVERSION_WORKERS = 1  # Parallel conversions (one warm Blender process each)
+DOWNLOAD_WORKERS = 1  # Parallel USDZ downloads
+DOWNLOAD_PREFETCH = 2  # Batches downloaded ahead of the conversion stage
+BATCH_SIZE = 8  # Small files converted together in one Blender session
+BATCH_MAX_FILE_MB = 20  # Larger files are converted on their own
+UPLOAD_WORKERS = 2  # Parallel GLB uploads
+UPLOAD_QUEUE_SIZE = 4  # Converted batches allowed to wait for upload
+LARGE_FILE_MB = 100  # Files above this are converted in the large-file lane
+LARGE_LANE_WORKERS = 1  # Concurrent large conversions, each with its own Blender worker (0 = no separate lane)
+SCHEDULER_AGING_SECONDS = 600  # Smallest files go first; a file waiting this long ranks as half its size
+BLENDER_WORKER_MAX_JOBS = 50  # Recycle a worker after this many conversions
+BLENDER_WORKER_MAX_RSS_MB = 2048  # ...or once its memory grows past this
+BLENDER_PROFILE = 'faithful'  # Blender import/export options: 'faithful', 'fast' or 'small' (see blender_pool.py)
+BLENDER_PROFILE_BY_PREFIX = {}  # e.g. {"staging/floor-plan/previews/": "small"}; longest matching prefix wins
+BLENDER_MEMORY_LIMIT_MB = None  # Hard memory limit per Blender worker (None = RAM minus MEMORY_RESERVE_MB)
+BLENDER_MEMORY_LIMIT_MODE = 'cgroup'  # 'cgroup' (needs systemd Delegate=yes), 'rlimit', 'auto' (cgroup, else rlimit) or None
+MEMORY_ADMISSION = True  # Start a Blender job only when its estimated memory is available
+MEMORY_RESERVE_MB = 256  # Memory kept free for the service itself and the OS
+BLENDER_MEMORY_BASE_MB = 200  # Estimate before enough runs are recorded: base + per MB of USDZ
+BLENDER_MEMORY_PER_MB = 8
+MEMORY_ESTIMATE_MARGIN = 1.25  # Learned estimates are padded by this factor
+S3_MULTIPART_THRESHOLD_MB = 16  # Files above this are transferred as parallel ranged parts
+S3_PART_SIZE_MB = 16  # Size of each ranged GET / multipart upload part
+S3_MAX_CONCURRENCY = 16  # Parts in flight per transfer
+S3_UPLOAD_PART_SIZE_MB = 16  # Multipart upload part size (S3 minimum is 5)
+SKIP_UNCHANGED_UPLOADS = True  # Don't re-upload a GLB identical to the existing object
+METRICS_PORT = 9108  # Prometheus /metrics endpoint (None to disable)
+METRICS_HOST = "0.0.0.0"  # Restrict scraping with the instance security group
 
 # Setup logging
 logging.basicConfig(
@@ -37,47 +129,219 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize S3 client
-s3_client = boto3.client('s3', region_name='ap-southeast-1')
+# Initialize S3 client - one connection pool shared by every transfer worker
+S3_POOL_CONNECTIONS = S3_MAX_CONCURRENCY * (DOWNLOAD_WORKERS + UPLOAD_WORKERS + 2 * LARGE_LANE_WORKERS) + 4  # + HEAD/LIST/copy
+s3_client = boto3.client(
+    's3',
+    region_name='ap-southeast-1',
+    config=Config(max_pool_connections=S3_POOL_CONNECTIONS, retries={'max_attempts': 5, 'mode': 'standard'})
+)
+transfer_config = TransferConfig(
+    multipart_threshold=S3_MULTIPART_THRESHOLD_MB * 1024 * 1024,
+    multipart_chunksize=S3_PART_SIZE_MB * 1024 * 1024,
+    max_concurrency=S3_MAX_CONCURRENCY,
+    use_threads=True
+)
+upload_transfer_config = TransferConfig(
+    multipart_threshold=S3_MULTIPART_THRESHOLD_MB * 1024 * 1024,
+    multipart_chunksize=S3_UPLOAD_PART_SIZE_MB * 1024 * 1024,
+    max_concurrency=S3_MAX_CONCURRENCY,
+    use_threads=True
+)
 
 # Create temp directory
 os.makedirs(TEMP_DIR, exist_ok=True)
 
+def transfer_rate(num_bytes, seconds):
+    """Human readable throughput of one transfer"""
+    if seconds <= 0:
+        return "n/a"
+    return f"{num_bytes / seconds / (1024 * 1024):.1f} MB/s ({num_bytes * 8 / seconds / 1e6:.0f} Mbit/s)"
+
+def peak_rss_note(result):
+    """', peak RSS N MB' for a Blender result that reports it"""
+    if result.get('peak_rss_mb') is None:
+        return ""
+    return f", peak RSS {result['peak_rss_mb']:.0f} MB"
+
 class USDZConverter:
     def __init__(self):
-        self.processed_files = set()
-        self.load_processed_files()
-    
-    def load_processed_files(self):
-        """Load list of already processed files"""
-        if os.path.exists(PROCESSED_LOG):
-            with open(PROCESSED_LOG, 'r') as f:
-                self.processed_files = set(line.strip() for line in f)
-            logger.info(f"Loaded {len(self.processed_files)} processed files from history")
-    
-    def save_processed_file(self, key):
-        """Save processed file to history"""
-        self.processed_files.add(key)
-        with open(PROCESSED_LOG, 'a') as f:
-            f.write(f"{key}\n")
-    
-    def list_usdz_files(self):
-        """List all USDZ files in S3 bucket"""
-        try:
-            response = s3_client.list_objects_v2(
-                Bucket=S3_BUCKET,
-                Prefix=S3_PREFIX
+        self.job_store = JobStore(JOB_DB, max_attempts=MAX_ATTEMPTS)
+        self.job_store.import_legacy_log(PROCESSED_LOG)
+        self.cache = None
+        if CACHE_ENABLED:
+            self.cache = ConversionCache(
+                JOB_DB,
+                max_entries=CACHE_MAX_ENTRIES,
+                ttl_seconds=CACHE_TTL_DAYS * 24 * 3600
             )
-            
-            if 'Contents' not in response:
-                return []
-            
-            usdz_files = [
-                obj['Key'] for obj in response['Contents']
-                if obj['Key'].lower().endswith('.usdz')
-            ]
-            
-            return usdz_files
+        self.throughput = ThroughputModel(
+            JOB_DB,
+            multiplier=TIMEOUT_MULTIPLIER,
+            min_deadline=MIN_CONVERSION_TIMEOUT,
+            max_deadline=CONVERSION_TIMEOUT,
+            min_samples=TIMEOUT_MODEL_MIN_RUNS
+        )
+        memory_limit = BLENDER_MEMORY_LIMIT_MB
+        if memory_limit is None and total_memory_mb():
+            memory_limit = total_memory_mb() - MEMORY_RESERVE_MB
+        for profile in [BLENDER_PROFILE, *BLENDER_PROFILE_BY_PREFIX.values()]:
+            profile_options(profile)  # Fail at startup on a typo
+        self.skipped_options = set()
+        self.memory_limiter = MemoryLimiter(memory_limit, mode=BLENDER_MEMORY_LIMIT_MODE)
+        self.memory_gate = MemoryGate(reserve_mb=MEMORY_RESERVE_MB) if MEMORY_ADMISSION else None
+        self.blender_pool = BlenderWorkerPool(
+            size=CONVERSION_WORKERS + LARGE_LANE_WORKERS,
+            script_dir=TEMP_DIR,
+            max_jobs_per_worker=BLENDER_WORKER_MAX_JOBS,
+            max_rss_mb=BLENDER_WORKER_MAX_RSS_MB,
+            memory_limiter=self.memory_limiter,
+            memory_gate=self.memory_gate
+        )
+        # Blender is not inline: its files are batched by convert_many, not sent through convert()
+        backends = [BlenderBackend(self.blender_pool, work_dir=TEMP_DIR, profile=BLENDER_PROFILE)]
+        if NATIVE_CONVERSION_ENABLED:
+            backends.insert(0, NativeBackend())
+        self.selector = BackendSelector(
+            backends,
+            self.throughput,
+            min_samples=BACKEND_MIN_RUNS,
+            min_success_rate=BACKEND_MIN_SUCCESS_RATE,
+            exploration=BACKEND_EXPLORATION
+        )
+        self.textures = TextureProcessor(
+            os.path.join(TEMP_DIR, 'texture-cache'),
+            max_size=TEXTURE_MAX_SIZE,
+            image_format=TEXTURE_FORMAT,
+            quality=TEXTURE_QUALITY,
+            workers=TEXTURE_WORKERS,
+            cache_max_mb=TEXTURE_CACHE_MAX_MB
+        )
+        self.lod_levels = LOD_LEVELS
+        if LOD_LEVELS and build_lods is None:
+            logger.warning("⚠️  numpy is not installed - LOD_LEVELS ignored, only full-detail GLBs are written")
+            self.lod_levels = ()
+        self.chunk_mode = CHUNK_MODE
+        if CHUNK_MODE and split_glb is None:
+            logger.warning("⚠️  numpy is not installed - CHUNK_MODE ignored, scenes are not split")
+            self.chunk_mode = None
+        elif CHUNK_MODE and CHUNK_MODE not in CHUNK_MODES:
+            raise ValueError(f"Unknown CHUNK_MODE {CHUNK_MODE!r} (have {', '.join(CHUNK_MODES)})")
+        # Every post-processing setting that changes the output bytes, as in effect
+        # (missing numpy or pillow turns steps off), so cache entries written under
+        # other settings are misses
+        output_settings = json.dumps([
+            bool(GLB_OPTIMIZE and optimize_glb), GLB_QUANTIZE, GLB_INSTANCING,
+            self.textures.available and self.textures.max_size,
+            self.textures.available and self.textures.image_format, self.textures.quality,
+            LOD_MIN_TRIANGLES,
+        ])
+        self.output_signature = hashlib.md5(output_settings.encode(), usedforsecurity=False).hexdigest()[:12]
+        self.pipeline = StagedPipeline(
+            stages=[
+                Stage('download', self.download_batch, workers=DOWNLOAD_WORKERS, queue_size=1),
+                Stage('convert', self.convert_stage, workers=CONVERSION_WORKERS, queue_size=DOWNLOAD_PREFETCH),
+                Stage('upload', self.upload_batch, workers=UPLOAD_WORKERS, queue_size=UPLOAD_QUEUE_SIZE),
+            ],
+            on_complete=self.finish_batch
+        )
+        # Large files get their own capped lane (and Blender worker) so they
+        # never sit in front of small scans
+        self.scheduler = SizeScheduler(aging_seconds=SCHEDULER_AGING_SECONDS)
+        self.large_pipeline = None
+        self.large_lane = None
+        if LARGE_LANE_WORKERS:
+            self.large_pipeline = StagedPipeline(
+                stages=[
+                    Stage('download', self.download_batch, workers=1, queue_size=1),
+                    Stage('convert', self.convert_stage, workers=LARGE_LANE_WORKERS, queue_size=1),
+                    Stage('upload', self.upload_batch, workers=1, queue_size=1),
+                ],
+                on_complete=self.finish_batch
+            )
+        self.create_metrics()
+        self.metrics_server = None
+        self.lister = IncrementalLister(
+            s3_client,
+            S3_BUCKET,
+            S3_PREFIX,
+            state_path=LISTING_WATERMARK,
+            partition_format=S3_PARTITION_FORMAT,
+            partition_lookback_days=PARTITION_LOOKBACK_DAYS,
+            list_after_last_key=S3_LIST_AFTER_LAST_KEY,
+            overlap_seconds=LISTING_OVERLAP_SECONDS
+        )
+        self.event_source = None
+        self.event_handles = {}  # SQS receipt handle -> keys it announced that are still converting
+        self.event_lock = threading.Lock()
+        if SQS_QUEUE_URL:
+            sqs_client = boto3.client('sqs', region_name='ap-southeast-1', endpoint_url=SQS_ENDPOINT_URL)
+            self.event_source = SQSEventSource(
+                sqs_client,
+                SQS_QUEUE_URL,
+                visibility_timeout=SQS_VISIBILITY_TIMEOUT
+            )
+    
+    def create_metrics(self):
+        """Latency histograms, byte counters, queue gauges and failure counts for /metrics"""
+        self.metrics = MetricsRegistry()
+        self.stage_seconds = self.metrics.histogram(
+            'usdz_stage_duration_seconds',
+            'Time spent in each step of a conversion',
+            labels=('stage',)
+        )
+        self.job_seconds = self.metrics.histogram(
+            'usdz_job_duration_seconds',
+            'End-to-end time from picking up a USDZ to its GLB being in S3',
+            labels=('result',)
+        )
+        self.bytes_downloaded = self.metrics.counter('usdz_downloaded_bytes_total', 'USDZ bytes downloaded from S3')
+        self.bytes_uploaded = self.metrics.counter('usdz_uploaded_bytes_total', 'GLB bytes uploaded to S3')
+        self.uploads_skipped = self.metrics.counter(
+            'usdz_uploads_skipped_total',
+            'GLB uploads skipped because the object in S3 was identical'
+        )
+        self.conversions = self.metrics.counter(
+            'usdz_conversions_total',
+            'Successful conversions by backend',
+            labels=('backend',)
+        )
+        self.failures = self.metrics.counter('usdz_job_failures_total', 'Failed jobs by reason', labels=('reason',))
+        self.blender_peak_rss = self.metrics.histogram(
+            'usdz_blender_peak_rss_megabytes',
+            'Peak resident memory of a Blender worker during one conversion',
+            buckets=(256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+        )
+        self.jobs_in_flight = self.metrics.gauge('usdz_jobs_in_flight', 'Jobs picked up and not finished yet')
+        self.metrics.gauge(
+            'usdz_queue_depth',
+            'Batches waiting in front of each pipeline stage',
+            labels=('stage',),
+            callback=self.queue_depths
+        )
+    
+    def queue_depths(self):
+        """Work waiting per pipeline stage, large-file lane included"""
+        depths = self.pipeline.queue_depths()
+        if self.large_pipeline:
+            for stage, depth in self.large_pipeline.queue_depths().items():
+                depths[f"large_{stage}"] = depth
+            depths['large_waiting'] = len(self.scheduler)
+        return depths
+    
+    def start_metrics_server(self):
+        if METRICS_PORT is None:
+            return
+        try:
+            self.metrics_server = MetricsServer(self.metrics, METRICS_HOST, METRICS_PORT).start()
+            logger.info(f"📈 Metrics: http://{METRICS_HOST}:{self.metrics_server.port}/metrics")
+        except OSError as e:
+            logger.warning(f"⚠️  Metrics endpoint not started: {e}")
+    
+    def list_usdz_files(self, full=False):
+        """List USDZ objects added since the last poll (all of them when full=True)"""
+        try:
+            return self.lister.list_objects(full=full)
         except ClientError as e:
             logger.error(f"Error listing S3 objects: {e}")
             return []
@@ -86,10 +350,14 @@ class USDZConverter:
         """Download file from S3"""
         try:
             logger.info(f"📥 Downloading: {key}")
-            s3_client.download_file(S3_BUCKET, key, local_path)
+            transfer_start = time.time()
+            s3_client.download_file(S3_BUCKET, key, local_path, Config=transfer_config)
+            elapsed = time.time() - transfer_start
             file_size = os.path.getsize(local_path)
             file_size_mb = file_size / (1024 * 1024)
-            logger.info(f"✅ Downloaded {file_size:,} bytes ({file_size_mb:.2f} MB)")
+            self.bytes_downloaded.inc(file_size)
+            logger.info(f"✅ Downloaded {file_size:,} bytes ({file_size_mb:.2f} MB) "
+                        f"in {elapsed:.1f}s - {transfer_rate(file_size, elapsed)}")
             
             if file_size_mb > MAX_FILE_SIZE_MB:
                 logger.warning(f"⚠️  Large file: {file_size_mb:.2f} MB - conversion may take 10+ minutes")
@@ -101,275 +369,1097 @@ class USDZConverter:
             logger.error(f"❌ Download failed: {e}")
             return False
     
-    def upload_to_s3(self, local_path, key):
-        """Upload file to S3"""
+    def is_unchanged_in_s3(self, local_path, key, file_size):
+        """Whether the object at key already holds exactly these bytes"""
+        try:
+            head = s3_client.head_object(Bucket=S3_BUCKET, Key=key)
+        except ClientError:
+            return False
+        if head['ContentLength'] != file_size:
+            return False
+        return etag_matches_file(
+            head['ETag'],
+            local_path,
+            part_sizes=(S3_UPLOAD_PART_SIZE_MB * 1024 * 1024,)
+        )
+    
+    def upload_to_s3(self, local_path, key, content_type='model/gltf-binary'):
+        """Upload file to S3 (skipped when the existing object is identical)"""
         try:
             file_size = os.path.getsize(local_path)
             file_size_mb = file_size / (1024 * 1024)
+            
+            if SKIP_UNCHANGED_UPLOADS and self.is_unchanged_in_s3(local_path, key, file_size):
+                logger.info(f"⏭️  Unchanged, upload skipped: s3://{S3_BUCKET}/{key} ({file_size_mb:.2f} MB)")
+                self.uploads_skipped.inc()
+                return True
+            
             logger.info(f"📤 Uploading: {key} ({file_size_mb:.2f} MB)")
             
+            transfer_start = time.time()
             s3_client.upload_file(
                 local_path,
                 S3_BUCKET,
                 key,
-                ExtraArgs={'ContentType': 'model/gltf-binary'}
+                ExtraArgs={'ContentType': content_type},
+                Config=upload_transfer_config
             )
-            logger.info(f"✅ Uploaded to S3: s3://{S3_BUCKET}/{key}")
+            elapsed = time.time() - transfer_start
+            self.bytes_uploaded.inc(file_size)
+            logger.info(f"✅ Uploaded to S3: s3://{S3_BUCKET}/{key} in {elapsed:.1f}s - {transfer_rate(file_size, elapsed)}")
             return True
         except ClientError as e:
             logger.error(f"❌ Upload failed: {e}")
             return False
     
-    def convert_usdz_to_glb(self, usdz_path, glb_path):
-        """Convert USDZ to GLB using Blender - TESTED AND WORKING"""
-        start_time = time.time()
-        
+    def copy_in_s3(self, source_key, key, content_type='model/gltf-binary'):
+        """Server-side copy of an existing GLB"""
+        if source_key == key:
+            return True
         try:
-            # Extract USDZ (it's a ZIP file)
-            extract_dir = tempfile.mkdtemp(dir=TEMP_DIR)
-            logger.info(f"📦 Extracting USDZ to: {extract_dir}")
-            
-            result = subprocess.run(
-                ['unzip', '-q', '-o', usdz_path, '-d', extract_dir],
-                capture_output=True,
-                text=True,
-                timeout=60
+            logger.info(f"📋 Copying {source_key} → {key}")
+            s3_client.copy_object(
+                Bucket=S3_BUCKET,
+                Key=key,
+                CopySource={'Bucket': S3_BUCKET, 'Key': source_key},
+                ContentType=content_type,
+                MetadataDirective='REPLACE'
             )
+            logger.info(f"✅ Copied to S3: s3://{S3_BUCKET}/{key}")
+            return True
+        except ClientError as e:
+            logger.error(f"❌ Copy failed: {e}")
+            return False
+    
+    def convert_inline(self, conversion, usdz_path, archive, graph):
+        """Try the inline backends at the head of the file's backend order
+        
+        Stops at the first success, or at Blender (which runs batched later).
+        """
+        while conversion['backends'] and self.selector.backends[conversion['backends'][0]].inline:
+            backend = self.selector.backends[conversion['backends'].pop(0)]
+            glb_path = conversion['glb_path']
+            timeout = self.conversion_timeout(conversion, conversion['attempt'], backend.name)
+            backend_start = time.time()
+            try:
+                stats = backend.convert(usdz_path, glb_path, archive, graph, timeout) or {}
+            except UnsupportedUsd as e:
+                logger.info(f"↪️  {backend.name} not applicable ({e})")
+                stats, conversion['error'] = None, 'unsupported'
+            except (subprocess.TimeoutExpired, TimeoutError):
+                logger.warning(f"⚠️  {backend.name} timed out after {timeout:.0f}s")
+                stats, conversion['error'] = None, 'timeout'
+            except Exception as e:
+                logger.warning(f"⚠️  {backend.name} failed ({e})")
+                stats, conversion['error'] = None, 'error'
+            elapsed = time.time() - backend_start
             
-            if result.returncode != 0:
-                logger.error(f"❌ Extraction failed: {result.stderr}")
-                return False
-            
-            extraction_time = time.time() - start_time
-            logger.info(f"✅ Extracted in {extraction_time:.1f} seconds")
-            
-            # Find main USD file
-            usd_files = list(Path(extract_dir).rglob('*.usda'))
-            if not usd_files:
-                usd_files = list(Path(extract_dir).rglob('*.usdc'))
-            
-            if not usd_files:
-                logger.error("❌ No USD file found in USDZ")
-                return False
-            
-            main_usd = str(usd_files[0])
-            usd_size = os.path.getsize(main_usd) / (1024 * 1024)
-            logger.info(f"✅ Found USD: {Path(main_usd).name} ({usd_size:.2f} MB)")
+            if stats is None:
+                if os.path.exists(glb_path):
+                    os.remove(glb_path)
+                self.record_throughput(conversion, backend.name, elapsed, False)
+                continue
             
-            # Create Blender conversion script
-            blender_script = Path(TEMP_DIR) / f'convert_{os.getpid()}.py'
-            script_content = '''
-import bpy
-import sys
-import traceback
-import time
-
-start = time.time()
-
-try:
-    # Clear scene
-    bpy.ops.wm.read_factory_settings(use_empty=True)
-    
-    usd_file = r"''' + main_usd + '''"
-    glb_file = r"''' + glb_path + '''"
-    
-    print(f"[{time.time()-start:.1f}s] Importing USD: {usd_file}")
-    
-    # Import USD
-    bpy.ops.wm.usd_import(filepath=usd_file)
+            self.stage_seconds.observe(elapsed, stage=f"{backend.name.replace('-', '_')}_convert")
+            if 'meshes' in stats:
+                logger.info(f"⚡ Native conversion: {stats['meshes']} meshes, {stats['triangles']:,} triangles "
+                            f"from {stats['layers']} layers in {elapsed:.2f}s")
+            else:
+                logger.info(f"⚡ {backend.name} conversion in {elapsed:.2f}s")
+            ok = self.check_glb(glb_path, conversion['start'])
+            self.record_throughput(conversion, backend.name, elapsed, ok)
+            conversion['backend'] = backend.name
+            conversion['ok'] = ok
+            conversion['error'] = None if ok else 'no_output'
+            conversion['elapsed'] = time.time() - conversion['start']
+            if ok:
+                return True
+        return False
     
-    print(f"[{time.time()-start:.1f}s] Import complete")
+    def log_layer_graph(self, graph):
+        summary = graph.summary()
+        logger.info(f"🗂️  Root layer: {summary['root']} (defaultPrim: {summary['default_prim']})")
+        logger.info(f"   {summary['layers']} layer(s) referenced, {summary['layer_bytes'] / (1024 * 1024):.2f} MB")
+        if summary['unreferenced']:
+            logger.info(f"   Skipping {summary['unreferenced']} unreferenced layer(s)")
+        if summary['opaque']:
+            logger.info(f"   {summary['opaque']} binary layer(s) - dependencies unknown, extracting everything")
+        return summary
     
-    # Check if anything was imported
-    if len(bpy.data.objects) == 0:
-        print("ERROR: No objects imported from USD")
-        sys.exit(1)
+    def check_glb(self, glb_path, start_time):
+        """Check if GLB was created"""
+        if os.path.exists(glb_path) and os.path.getsize(glb_path) > 0:
+            file_size = os.path.getsize(glb_path)
+            file_size_mb = file_size / (1024 * 1024)
+            total_time = time.time() - start_time
+            logger.info(f"✅ GLB created: {file_size:,} bytes ({file_size_mb:.2f} MB)")
+            logger.info(f"⏱️  Total conversion time: {total_time:.1f} seconds ({total_time/60:.1f} minutes)")
+            return True
+        else:
+            logger.error(f"❌ GLB file not created or empty")
+            return False
     
-    print(f"[{time.time()-start:.1f}s] Imported {len(bpy.data.objects)} objects")
-    print(f"[{time.time()-start:.1f}s] Exporting GLB: {glb_file}")
+    def conversion_timeout(self, conversion, attempt, backend='blender'):
+        """Timeout for one file: a multiple of its predicted conversion time on the backend"""
+        if not ADAPTIVE_TIMEOUT:
+            return CONVERSION_TIMEOUT
+        timeout, predicted = self.throughput.deadline(backend, conversion['size'], conversion['layers'], attempt)
+        if predicted is not None and backend == 'blender':
+            logger.info(f"⏱️  Predicted Blender time {predicted:.1f}s - timeout {timeout:.0f}s (attempt {attempt})")
+        return timeout
     
-    # Export as GLB
-    bpy.ops.export_scene.gltf(
-        filepath=glb_file,
-        export_format='GLB'
-    )
+    def estimate_memory(self, conversion):
+        """Memory (MB) a Blender worker is expected to add while converting one file"""
+        predicted = self.throughput.predict_memory('blender', conversion['size'], conversion['layers'])
+        if predicted is not None:
+            return predicted * MEMORY_ESTIMATE_MARGIN
+        return BLENDER_MEMORY_BASE_MB + BLENDER_MEMORY_PER_MB * conversion['size'] / (1024 * 1024)
     
-    elapsed = time.time() - start
-    print(f"[{elapsed:.1f}s] SUCCESS: Conversion complete")
-    sys.exit(0)
+    def record_throughput(self, conversion, backend, duration, ok, result=None):
+        """Feed one conversion into the throughput model behind adaptive timeouts"""
+        triangles = None
+        if ok:
+            try:
+                triangles = glb_triangles(conversion['glb_path'])
+            except Exception as e:
+                logger.debug(f"Could not count triangles: {e}")
+        result = result or {}
+        peak, before = result.get('peak_rss_mb'), result.get('rss_before_mb')
+        memory = max(peak - before, 0.0) if peak is not None and before is not None else None
+        usdc, textured = feature_class(conversion['features'])
+        self.throughput.record(backend, conversion['size'], conversion['layers'], triangles, duration, ok=ok,
+                               peak_rss_mb=peak, memory_mb=memory,
+                               usdc=usdc, textures=conversion['features']['textures'])
     
-except Exception as e:
-    elapsed = time.time() - start
-    print(f"[{elapsed:.1f}s] ERROR: {e}")
-    traceback.print_exc()
-    sys.exit(1)
-'''
+    def prepare_conversion(self, usdz_path, glb_path, attempt=1, profile=BLENDER_PROFILE):
+        """Read the USDZ and run it through its backends; extract when Blender comes up
+        
+        Returns a conversion record whose 'ok' is None while Blender is still needed.
+        """
+        conversion = {
+            'usdz_path': usdz_path,
+            'glb_path': glb_path,
+            'attempt': attempt,
+            'profile': profile,
+            'start': time.time(),
+            'ok': False,
+            'elapsed': 0.0,
+            'extract_dir': None,
+            'main_usd': None,
+            'backend': None,
+            'error': None,
+            'size': None,
+            'layers': None,
+            'features': None,
+            'backends': [],
+            'timeout': CONVERSION_TIMEOUT,
+            'memory_mb': None,
+        }
+        try:
+            try:
+                archive = UsdzArchive(usdz_path)
+            except (UsdzError, OSError) as e:
+                logger.error(f"❌ Cannot read USDZ: {e}")
+                conversion['error'] = 'unreadable'
+                return conversion
             
-            with open(blender_script, 'w') as f:
-                f.write(script_content)
+            with archive:
+                try:
+                    graph = analyze_usdz(archive)
+                except UsdzError as e:
+                    logger.error(f"❌ {e}")
+                    conversion['error'] = 'unreadable'
+                    return conversion
+                self.log_layer_graph(graph)
+                features = file_features(usdz_path, graph)
+                conversion['features'] = features
+                conversion['size'] = features['size']
+                conversion['layers'] = features['layers']
+                if BACKEND_SELECTION:
+                    conversion['backends'] = self.selector.order(features)
+                else:
+                    conversion['backends'] = self.selector.candidates(features)
+                kind = ', '.join(
+                    ['usdc' if features['usdc'] else 'usda']
+                    + ([f"{features['textures']} texture(s)"] if features['textures'] else [])
+                )
+                logger.info(f"🧭 Backends ({kind}): {' → '.join(conversion['backends']) or 'none'}")
+                
+                if self.convert_inline(conversion, usdz_path, archive, graph):
+                    return conversion
+                if not conversion['backends']:
+                    conversion['error'] = conversion['error'] or 'no_backend'
+                    conversion['elapsed'] = time.time() - conversion['start']
+                    return conversion
+                conversion['backends'].pop(0)  # Blender
+                
+                # Extract only what the root layer uses - Blender needs files on disk
+                extract_dir = tempfile.mkdtemp(dir=TEMP_DIR)
+                conversion['extract_dir'] = extract_dir
+                logger.info(f"📦 Extracting USDZ to: {extract_dir}")
+                extract_start = time.time()
+                try:
+                    paths = archive.extract(extract_dir, graph.files())
+                except (UsdzError, OSError) as e:
+                    logger.error(f"❌ Extraction failed: {e}")
+                    conversion['error'] = 'extract'
+                    return conversion
+                self.stage_seconds.observe(time.time() - extract_start, stage='extract')
             
-            # Run Blender conversion
-            logger.info(f"🔄 Converting with Blender (timeout: {CONVERSION_TIMEOUT}s / {CONVERSION_TIMEOUT//60} minutes)...")
-            logger.info(f"⏱️  Started at: {time.strftime('%H:%M:%S')}")
+            extraction_time = time.time() - conversion['start']
+            logger.info(f"✅ Extracted {len(paths)} file(s) in {extraction_time:.1f} seconds")
+            self.downscale_textures(paths.values())
             
-            conversion_start = time.time()
+            conversion['main_usd'] = paths[graph.root]
+            conversion['elapsed'] = time.time() - conversion['start']
+            conversion['backend'] = 'blender'
+            conversion['timeout'] = self.conversion_timeout(conversion, attempt)
+            conversion['memory_mb'] = self.estimate_memory(conversion)
+            conversion['ok'] = None
+        except Exception as e:
+            logger.error(f"❌ Conversion error: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            conversion['error'] = 'error'
+        return conversion
+    
+    def record_blender_result(self, conversion, result):
+        """Time the Blender steps and check the output of one conversion"""
+        skipped = set(result.get('skipped_options') or ()) - self.skipped_options
+        if skipped:
+            self.skipped_options |= skipped
+            logger.warning(f"⚠️  This Blender has no {', '.join(sorted(skipped))} option(s) - ignored")
+        if result.get('success'):
+            self.stage_seconds.observe(result['import_time'], stage='blender_import')
+            self.stage_seconds.observe(result['export_time'], stage='blender_export')
+        if result.get('peak_rss_mb') is not None:
+            self.blender_peak_rss.observe(result['peak_rss_mb'])
+        conversion['ok'] = self.check_glb(conversion['glb_path'], conversion['start'])
+        if not conversion['ok']:
+            if result.get('oom'):
+                conversion['error'] = 'memory'
+            else:
+                conversion['error'] = 'no_output' if result.get('success') else 'blender'
+        if str(result.get('error', '')).startswith('timeout'):
+            conversion['ok'] = False
+            conversion['error'] = 'timeout'
+            self.record_throughput(conversion, 'blender', conversion['timeout'], False)
+        else:
+            # Failed runs count too, as for the other backends: they make up its success rate
+            elapsed = result.get('elapsed', time.time() - conversion['start'])
+            self.record_throughput(conversion, 'blender', elapsed, conversion['ok'], result)
+    
+    def run_blender(self, conversion):
+        """Convert one extracted USD on a warm Blender worker"""
+        start_time = conversion['start']
+        timeout = conversion['timeout']
+        try:
+            logger.info(f"🔄 Converting with Blender, {conversion['profile']} profile "
+                        f"(timeout: {timeout:.0f}s / {timeout / 60:.1f} minutes)...")
+            logger.info(f"⏱️  Started at: {time.strftime('%H:%M:%S')}")
             
-            # Run Blender and capture output
-            process = subprocess.Popen(
-                ['blender', '--background', '--python', str(blender_script)],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1
+            result = self.blender_pool.convert(
+                conversion['main_usd'], conversion['glb_path'],
+                timeout=timeout,
+                memory_mb=conversion['memory_mb'],
+                profile=conversion['profile']
             )
             
-            # Print output as it comes
-            blender_output = []
-            for line in process.stdout:
-                line = line.strip()
-                if line:
-                    blender_output.append(line)
-                    # Show progress lines
-                    if any(x in line for x in ['[', 's]', 'SUCCESS', 'ERROR', 'Imported', 'Exporting']):
-                        logger.info(f"   Blender: {line}")
-            
-            process.wait(timeout=CONVERSION_TIMEOUT)
-            conversion_time = time.time() - conversion_start
-            
-            # Clean up extract directory
-            subprocess.run(['rm', '-rf', extract_dir], check=False)
-            if blender_script.exists():
-                blender_script.unlink()
-            
-            # Check if GLB was created
-            if os.path.exists(glb_path) and os.path.getsize(glb_path) > 0:
-                file_size = os.path.getsize(glb_path)
-                file_size_mb = file_size / (1024 * 1024)
-                total_time = time.time() - start_time
-                logger.info(f"✅ GLB created: {file_size:,} bytes ({file_size_mb:.2f} MB)")
-                logger.info(f"⏱️  Total conversion time: {total_time:.1f} seconds ({total_time/60:.1f} minutes)")
-                return True
+            if result.get('success'):
+                logger.info(f"⏱️  Blender import {result['import_time']:.1f}s, export {result['export_time']:.1f}s"
+                            f"{peak_rss_note(result)}")
             else:
-                logger.error(f"❌ GLB file not created or empty")
-                logger.error(f"Blender exit code: {process.returncode}")
-                return False
+                logger.error(f"❌ Blender error: {result.get('error')}")
+            
+            self.record_blender_result(conversion, result)
                 
         except subprocess.TimeoutExpired:
             elapsed = time.time() - start_time
             logger.error(f"❌ Conversion timeout after {elapsed:.1f} seconds ({elapsed/60:.1f} minutes)")
             logger.error(f"   File may be too large or complex for this instance")
-            return False
+            conversion['ok'] = False
+            conversion['error'] = 'timeout'
+            self.record_throughput(conversion, 'blender', timeout, False)
         except Exception as e:
             logger.error(f"❌ Conversion error: {e}")
             import traceback
             logger.error(traceback.format_exc())
-            return False
+            conversion['ok'] = False
+            conversion['error'] = 'error'
+        conversion['elapsed'] = time.time() - start_time
     
-    def process_file(self, usdz_key):
-        """Process a single USDZ file"""
-        logger.info(f"\n{'='*70}")
-        logger.info(f"🎯 Processing: {usdz_key}")
-        logger.info(f"{'='*70}")
+    def run_blender_batch(self, conversions):
+        """Convert several extracted USDs in one Blender session
+        
+        Returns the conversions Blender never got to because an earlier item
+        of the batch timed out or crashed the worker; they are left untouched.
+        """
+        timeouts = [conversion['timeout'] for conversion in conversions]
+        logger.info(f"🔄 Converting a batch of {len(conversions)} with Blender "
+                    f"(timeout: {min(timeouts):.0f}-{max(timeouts):.0f}s per file)...")
+        batch_start = time.time()
+        try:
+            results = self.blender_pool.convert_batch(
+                [(conversion['main_usd'], conversion['glb_path']) for conversion in conversions],
+                timeout=timeouts,
+                memory_mb=max(conversion['memory_mb'] or 0 for conversion in conversions),
+                profiles=[conversion['profile'] for conversion in conversions]
+            )
+        except Exception as e:
+            logger.error(f"❌ Batch conversion error: {e}")
+            results = [{'success': False, 'error': str(e)} for _ in conversions]
+        
+        not_run = []
+        for conversion, result in zip(conversions, results):
+            name = Path(conversion['glb_path']).name
+            if result.get('not_run'):
+                not_run.append(conversion)
+                continue
+            if result.get('success'):
+                logger.info(f"⏱️  {name}: Blender import {result['import_time']:.1f}s, export {result['export_time']:.1f}s"
+                            f"{peak_rss_note(result)}")
+            else:
+                logger.error(f"❌ {name}: Blender error: {result.get('error')}")
+            self.record_blender_result(conversion, result)
+            conversion['elapsed'] += result.get('elapsed', 0.0)
+        logger.info(f"📦 Batch of {len(conversions)} done in {time.time() - batch_start:.1f}s "
+                    f"({sum(1 for c in conversions if c['ok'])} succeeded"
+                    f"{f', {len(not_run)} not run' if not_run else ''})")
+        return not_run
+    
+    def convert_many(self, pairs, attempts=None, profiles=None):
+        """Convert (usdz_path, glb_path) pairs; the ones needing Blender share one session
         
+        `attempts` (one per pair) lengthens the timeout of retried files;
+        `profiles` (one per pair) picks their Blender options.
+        Returns one conversion record per pair ('ok', 'elapsed').
+        """
+        attempts = attempts or [1] * len(pairs)
+        profiles = profiles or [BLENDER_PROFILE] * len(pairs)
+        conversions = [
+            self.prepare_conversion(usdz_path, glb_path, attempt, profile)
+            for (usdz_path, glb_path), attempt, profile in zip(pairs, attempts, profiles)
+        ]
+        pending = [conversion for conversion in conversions if conversion['ok'] is None]
+        try:
+            # Files a failed neighbour kept from running go again on a fresh
+            # worker; that is not an attempt of theirs (each round settles at
+            # least the file that failed, so this ends)
+            remaining = pending
+            while len(remaining) > 1:
+                remaining = self.run_blender_batch(remaining)
+                if remaining:
+                    logger.info(f"🔁 Re-running {len(remaining)} file(s) the aborted batch did not reach")
+            if remaining:
+                self.run_blender(remaining[0])
+            for conversion in pending:
+                if not conversion['ok'] and conversion['backends']:
+                    self.fall_back(conversion)
+        finally:
+            # Clean up extract directories
+            for conversion in conversions:
+                if conversion['extract_dir']:
+                    shutil.rmtree(conversion['extract_dir'], ignore_errors=True)
+        return conversions
+    
+    def fall_back(self, conversion):
+        """Try the inline backends ranked after Blender on a file Blender failed"""
+        logger.info(f"↪️  Blender failed - trying {' → '.join(conversion['backends'])}")
+        if os.path.exists(conversion['glb_path']):
+            os.remove(conversion['glb_path'])
+        try:
+            with UsdzArchive(conversion['usdz_path']) as archive:
+                self.convert_inline(conversion, conversion['usdz_path'], archive, analyze_usdz(archive))
+        except (UsdzError, OSError) as e:
+            logger.error(f"❌ Cannot read USDZ: {e}")
+    
+    def convert_usdz_to_glb(self, usdz_path, glb_path):
+        """Convert USDZ to GLB - native fast path for simple scans, Blender otherwise"""
+        return bool(self.convert_many([(usdz_path, glb_path)])[0]['ok'])
+    
+    def profile_for(self, key):
+        """Blender profile of an S3 key: the longest matching BLENDER_PROFILE_BY_PREFIX entry"""
+        matches = [prefix for prefix in BLENDER_PROFILE_BY_PREFIX if key.startswith(prefix)]
+        return BLENDER_PROFILE_BY_PREFIX[max(matches, key=len)] if matches else BLENDER_PROFILE
+    
+    def cache_key(self, job):
+        """Cache entries are per content, Blender profile, output settings, LOD levels and chunk mode"""
+        key = job.get('content_md5')
+        if not key:
+            return key
+        if job['profile'] != BLENDER_PROFILE:
+            key = f"{key}:{job['profile']}"
+        key = f"{key}:out-{self.output_signature}"
+        if self.lod_levels:
+            key = f"{key}:lod" + ','.join(f"{ratio:g}x{size or 0}" for ratio, size in self.lod_levels)
+        if self.chunk_mode:
+            key = f"{key}:chunks-{self.chunk_mode}"
+        return key
+    
+    def new_job(self, obj):
+        """Create the per-file job record passed between pipeline stages"""
+        usdz_key = obj['Key']
+        # Each job gets its own work dir so concurrent jobs never collide
         # Create temp file paths - PRESERVE ORIGINAL FILENAME
+        work_dir = tempfile.mkdtemp(dir=TEMP_DIR, prefix='job_')
         usdz_filename = Path(usdz_key).name
         glb_filename = usdz_filename.rsplit('.', 1)[0] + '.glb'
-        glb_key = usdz_key.rsplit('.', 1)[0] + '.glb'
+        self.jobs_in_flight.inc()
+        return {
+            'key': usdz_key,
+            'size': obj.get('Size'),
+            'etag': obj.get('ETag'),
+            'glb_key': usdz_key.rsplit('.', 1)[0] + '.glb',
+            'work_dir': work_dir,
+            'usdz_temp': os.path.join(work_dir, usdz_filename),
+            'glb_temp': os.path.join(work_dir, glb_filename),
+            'start': time.time(),
+            'timings': {},
+            'error': None,
+            'error_detail': None,
+            'failed': False,
+            'attempt': 1,
+            'profile': self.profile_for(usdz_key),
+            'lod_files': [],
+            'chunk_files': [],
+            'chunk_manifest': None,
+        }
+    
+    def download_stage(self, job):
+        """Step 1: Download USDZ"""
+        logger.info(f"🎯 Processing: {job['key']}")
+        
+        # Jobs keyed only by name (manual runs) need the object identity first
+        if job['etag'] is None or job['size'] is None:
+            try:
+                head = s3_client.head_object(Bucket=S3_BUCKET, Key=job['key'])
+                job['etag'] = head['ETag']
+                job['size'] = head['ContentLength']
+            except ClientError as e:
+                logger.error(f"❌ Could not read object metadata: {e}")
+                job['error'] = 'download'
+                return False
+        
+        job['attempt'] = self.job_store.start(job['key'], job['etag'], job['size'])
         
-        usdz_temp = os.path.join(TEMP_DIR, usdz_filename)
-        glb_temp = os.path.join(TEMP_DIR, glb_filename)
+        # Single-part ETags are the content MD5: a cache hit skips the download too
+        content_md5 = etag_md5(job['etag']) if self.cache else None
+        if content_md5 and self.use_cached_glb(job, content_md5):
+            return True
         
-        process_start = time.time()
+        stage_start = time.time()
+        ok = self.download_from_s3(job['key'], job['usdz_temp'])
+        job['timings']['download'] = time.time() - stage_start
+        self.stage_seconds.observe(job['timings']['download'], stage='download')
+        if not ok:
+            job['error'] = 'download'
+            return False
+        
+        if self.cache and content_md5 is None:
+            content_md5 = file_md5(job['usdz_temp'])
+            if self.use_cached_glb(job, content_md5):
+                return True
+        job['content_md5'] = content_md5
+        return True
+    
+    def use_cached_glb(self, job, content_md5):
+        """Satisfy the job from an existing GLB of identical content, if any"""
+        job['content_md5'] = content_md5
+        entry = self.cache.get(self.cache_key(job))
+        if not entry:
+            return False
+        cached_key, cached_etag, companions = entry
         
         try:
-            # Step 1: Download USDZ
-            if not self.download_from_s3(usdz_key, usdz_temp):
-                return False
-            
-            # Step 2: Convert to GLB
-            if not self.convert_usdz_to_glb(usdz_temp, glb_temp):
+            head = s3_client.head_object(Bucket=S3_BUCKET, Key=cached_key)
+        except ClientError:
+            logger.info(f"♻️  Cached GLB {cached_key} is gone - converting again")
+            self.cache.invalidate(self.cache_key(job))
+            return False
+        # The key may since hold the GLB of other content (its USDZ was re-uploaded)
+        if not cached_etag or head['ETag'] != cached_etag:
+            logger.info(f"♻️  Cached GLB {cached_key} has been overwritten - converting again")
+            self.cache.invalidate(self.cache_key(job))
+            return False
+        # The LODs and chunks copied with it are checked the same way
+        if companions is None and (self.lod_levels or self.chunk_mode):
+            logger.info(f"♻️  Cached GLB {cached_key} has no recorded LOD/chunk ETags - converting again")
+            self.cache.invalidate(self.cache_key(job))
+            return False
+        for key, etag in (companions or {}).items():
+            if self.object_etag(key) != etag:
+                logger.info(f"♻️  {key} of cached GLB {cached_key} is gone or overwritten - converting again")
+                self.cache.invalidate(self.cache_key(job))
                 return False
-            
-            # Step 3: Upload GLB
-            if not self.upload_to_s3(glb_temp, glb_key):
+        
+        logger.info(f"♻️  Cache hit: identical content already converted to {cached_key}")
+        job['cached_glb_key'] = cached_key
+        return True
+    
+    def convert_stage(self, batch):
+        """Step 2: Convert a batch of USDZs to GLB (Blender jobs share one session)"""
+        jobs = [job for job in batch if not job['failed'] and not job.get('cached_glb_key')]
+        conversions = self.convert_many(
+            [(job['usdz_temp'], job['glb_temp']) for job in jobs],
+            attempts=[job['attempt'] for job in jobs],
+            profiles=[job['profile'] for job in jobs]
+        )
+        for job, conversion in zip(jobs, conversions):
+            # The USDZ is no longer needed once converted
+            if os.path.exists(job['usdz_temp']):
+                os.remove(job['usdz_temp'])
+            if not conversion['ok']:
+                job['error'] = 'convert'
+                job['error_detail'] = conversion['error']
+                job['failed'] = True
+                continue
+            self.conversions.inc(backend=conversion['backend'])
+            optimize_start = time.time()
+            # LODs are cut from the exported GLB, before it is quantized
+            job['lod_files'] = self.write_lods(job['glb_temp'])
+            job['chunk_manifest'], job['chunk_files'] = self.write_chunks(job['glb_temp'])
+            for glb_path in [job['glb_temp']] + job['lod_files'] + job['chunk_files']:
+                self.optimize_output(glb_path)
+                self.transcode_textures(glb_path)
+            if job['chunk_manifest']:
+                self.finish_manifest(job['chunk_manifest'], job['chunk_files'])
+            job['timings']['convert'] = conversion['elapsed'] + time.time() - optimize_start
+            job['glb_size'] = os.path.getsize(job['glb_temp'])
+        return any(not job['failed'] for job in batch)
+    
+    def write_lods(self, glb_path):
+        """Write the LOD_LEVELS GLBs next to glb_path; returns their paths ([] if any failed)"""
+        if not self.lod_levels:
+            return []
+        lod_start = time.time()
+        try:
+            written = build_lods(glb_path, self.lod_levels, min_triangles=LOD_MIN_TRIANGLES, textures=self.textures)
+        except GlbOptimizeError as e:
+            logger.info(f"🔻 No LODs: {e}")
+            return []
+        except Exception as e:
+            logger.warning(f"⚠️  LOD generation skipped: {e}")
+            return []
+        self.stage_seconds.observe(time.time() - lod_start, stage='lod')
+        for path, stats in written:
+            logger.info(f"🔻 {Path(path).name}: {stats['triangles_before']:,} → {stats['triangles_after']:,} triangles "
+                        f"({stats['simplified_primitives']} primitive(s) simplified, "
+                        f"{stats['images']} texture(s) downscaled), {stats['size']:,} bytes")
+        logger.info(f"🔻 {len(written)} LOD(s) in {time.time() - lod_start:.2f}s")
+        return [path for path, _ in written]
+    
+    def write_chunks(self, glb_path):
+        """Split the GLB per CHUNK_MODE; returns (manifest path, chunk paths), or (None, []) if not split"""
+        if not self.chunk_mode:
+            return None, []
+        chunk_start = time.time()
+        try:
+            manifest, paths = split_glb(glb_path, chunk_dir_name(glb_path), mode=self.chunk_mode)
+        except (GlbChunkError, GlbOptimizeError) as e:
+            logger.info(f"🧩 Scene not split: {e}")
+            return None, []
+        except Exception as e:
+            logger.warning(f"⚠️  Scene splitting skipped: {e}")
+            return None, []
+        manifest_path = chunk_manifest_name(glb_path)
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+        self.stage_seconds.observe(time.time() - chunk_start, stage='chunk')
+        logger.info(f"🧩 Split into {len(paths)} chunk(s) by {self.chunk_mode}: "
+                    f"{', '.join(chunk['name'] for chunk in manifest['chunks'])} "
+                    f"in {time.time() - chunk_start:.2f}s")
+        return manifest_path, paths
+    
+    def finish_manifest(self, manifest_path, chunk_paths):
+        """Record the final (optimized, transcoded) chunk sizes in the manifest"""
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        for chunk, path in zip(manifest['chunks'], chunk_paths):
+            chunk['size'] = os.path.getsize(path)
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+    
+    def copy_chunks(self, cached_glb_key, glb_key):
+        """Copy the chunks and manifest of a cached conversion next to glb_key"""
+        try:
+            body = s3_client.get_object(Bucket=S3_BUCKET, Key=chunk_manifest_name(cached_glb_key))['Body']
+            manifest = json.loads(body.read())
+        except ClientError as e:
+            logger.error(f"❌ Cached chunk manifest unreadable: {e}")
+            return False
+        # Chunk files are relative to the manifest: keep them under this key's own chunk directory
+        source_dir = cached_glb_key.rsplit('/', 1)[0] + '/' if '/' in cached_glb_key else ''
+        target_dir = glb_key.rsplit('/', 1)[0] + '/' if '/' in glb_key else ''
+        chunk_dir = chunk_dir_name(glb_key).rsplit('/', 1)[-1]
+        for chunk in manifest['chunks']:
+            source_key = source_dir + chunk['file']
+            chunk['file'] = f"{chunk_dir}/{chunk['file'].rsplit('/', 1)[-1]}"
+            if not self.copy_in_s3(source_key, target_dir + chunk['file']):
                 return False
+        try:
+            s3_client.put_object(
+                Bucket=S3_BUCKET,
+                Key=chunk_manifest_name(glb_key),
+                Body=json.dumps(manifest).encode(),
+                ContentType='application/json'
+            )
+        except ClientError as e:
+            logger.error(f"❌ Chunk manifest upload failed: {e}")
+            return False
+        return True
+    
+    def downscale_textures(self, paths):
+        """Shrink extracted textures to TEXTURE_MAX_SIZE before Blender loads them"""
+        resize_start = time.time()
+        stats = self.textures.downscale_files(paths)
+        if not stats['images']:
+            return
+        self.stage_seconds.observe(time.time() - resize_start, stage='texture_resize')
+        logger.info(f"🖼️  Textures: {stats['images']} image(s), {stats['processed']} processed, "
+                    f"{stats['cached']} from cache, {stats['bytes_before']:,} → {stats['bytes_after']:,} bytes "
+                    f"in {time.time() - resize_start:.2f}s")
+    
+    def transcode_textures(self, glb_path):
+        """Re-encode the GLB's embedded textures as WebP/KTX2"""
+        transcode_start = time.time()
+        try:
+            stats = self.textures.transcode_glb(glb_path)
+        except Exception as e:
+            logger.warning(f"⚠️  Texture transcoding skipped: {e}")
+            return
+        if not stats:
+            return
+        self.stage_seconds.observe(time.time() - transcode_start, stage='texture_transcode')
+        logger.info(f"🖼️  Transcoded {stats['images']} GLB texture(s) to {TEXTURE_FORMAT}: "
+                    f"{stats['size_before']:,} → {stats['size_after']:,} bytes "
+                    f"({stats['cached']} from cache) in {time.time() - transcode_start:.2f}s")
+    
+    def optimize_output(self, glb_path):
+        """Compact the GLB geometry in place; the unoptimized file is kept on failure"""
+        if not GLB_OPTIMIZE or optimize_glb is None:
+            return
+        optimize_start = time.time()
+        try:
+            stats = optimize_glb(glb_path, quantize=GLB_QUANTIZE, instancing=GLB_INSTANCING)
+        except GlbOptimizeError as e:
+            logger.info(f"🗜️  GLB kept as exported: {e}")
+            return
+        except Exception as e:
+            logger.warning(f"⚠️  GLB optimization skipped: {e}")
+            return
+        self.stage_seconds.observe(time.time() - optimize_start, stage='optimize')
+        saved = stats['size_before'] - stats['size_after']
+        logger.info(f"🗜️  Optimized GLB: {stats['size_before']:,} → {stats['size_after']:,} bytes "
+                    f"(-{saved / max(stats['size_before'], 1):.0%}), "
+                    f"{stats['vertices_before']:,} → {stats['vertices_after']:,} vertices "
+                    f"in {time.time() - optimize_start:.2f}s")
+        if stats['merged_meshes']:
+            logger.info(f"   {stats['merged_meshes']} repeated mesh(es) shared, "
+                        f"{stats['gpu_instances']} GPU instance(s)")
+    
+    def object_etag(self, key):
+        """Current ETag of an S3 object, or None if it cannot be read"""
+        try:
+            return s3_client.head_object(Bucket=S3_BUCKET, Key=key)['ETag']
+        except ClientError:
+            return None
+    
+    def companion_etags(self, job):
+        """{key: ETag} of the LODs, chunks and chunk manifest uploaded with the GLB, or None if one is unreadable"""
+        keys = [lod_name(job['glb_key'], level) for level in range(1, len(job['lod_files']) + 1)]
+        keys += [f"{chunk_dir_name(job['glb_key'])}/{os.path.basename(path)}" for path in job['chunk_files']]
+        if job['chunk_manifest']:
+            keys.append(chunk_manifest_name(job['glb_key']))
+        etags = {key: self.object_etag(key) for key in keys}
+        if None in etags.values():
+            logger.warning("⚠️  Could not read the ETags of every LOD/chunk - not caching this conversion")
+            return None
+        return etags
+    
+    def upload_stage(self, job):
+        """Step 3: Upload GLB"""
+        stage_start = time.time()
+        if job.get('cached_glb_key'):
+            ok = self.copy_in_s3(job['cached_glb_key'], job['glb_key'])
+            for level in range(1, len(self.lod_levels) + 1):
+                ok = ok and self.copy_in_s3(lod_name(job['cached_glb_key'], level), lod_name(job['glb_key'], level))
+            if self.chunk_mode:
+                ok = ok and self.copy_chunks(job['cached_glb_key'], job['glb_key'])
+        else:
+            ok = self.upload_to_s3(job['glb_temp'], job['glb_key'])
+            for level, lod_path in enumerate(job['lod_files'], start=1):
+                ok = ok and self.upload_to_s3(lod_path, lod_name(job['glb_key'], level))
+            for chunk_path in job['chunk_files']:
+                chunk_key = f"{chunk_dir_name(job['glb_key'])}/{os.path.basename(chunk_path)}"
+                ok = ok and self.upload_to_s3(chunk_path, chunk_key)
+            # The manifest goes last, so it never lists a chunk that is not uploaded yet
+            if job['chunk_manifest']:
+                ok = ok and self.upload_to_s3(job['chunk_manifest'], chunk_manifest_name(job['glb_key']),
+                                              content_type='application/json')
+        job['timings']['upload'] = time.time() - stage_start
+        self.stage_seconds.observe(job['timings']['upload'], stage='upload')
+        if not ok:
+            job['error'] = 'upload'
+            return False
+        
+        try:
+            head = s3_client.head_object(Bucket=S3_BUCKET, Key=job['glb_key'])
+            job['output_etag'] = head['ETag']
+        except ClientError as e:
+            logger.warning(f"⚠️  Could not read output ETag: {e}")
+        if self.cache and not job.get('cached_glb_key'):
+            job['companion_etags'] = self.companion_etags(job)
+        return True
+    
+    def run_per_job(self, batch, stage):
+        """Apply a per-file stage to every job of a batch still in flight"""
+        for job in batch:
+            if job['failed']:
+                continue
+            try:
+                ok = stage(job)
+            except Exception as e:
+                logger.error(f"❌ {job['key']}: {e}")
+                import traceback
+                logger.error(traceback.format_exc())
+                ok = False
+            if not ok:
+                job['failed'] = True
+        return any(not job['failed'] for job in batch)
+    
+    def download_batch(self, batch):
+        """Step 1: Download every USDZ of a batch"""
+        return self.run_per_job(batch, self.download_stage)
+    
+    def upload_batch(self, batch):
+        """Step 3: Upload every GLB of a batch"""
+        return self.run_per_job(batch, self.upload_stage)
+    
+    def finish_batch(self, batch, success):
+        for job in batch:
+            self.finish_job(job, success and not job['failed'])
+    
+    def record_job_metrics(self, job, success):
+        total_time = time.time() - job['start']
+        self.jobs_in_flight.dec()
+        if success:
+            self.job_seconds.observe(total_time, result='success')
+            return
+        self.job_seconds.observe(total_time, result='failure')
+        reason = job['error'] or 'failed'
+        if job['error_detail']:
+            reason = f"{reason}_{job['error_detail']}"
+        self.failures.inc(reason=reason)
+    
+    def finish_job(self, job, success):
+        """Record the outcome of a job and clean up its temp files"""
+        usdz_key = job['key']
+        self.record_job_metrics(job, success)
+        self.scheduler.discard(usdz_key)
+        try:
+            self.job_store.finish(
+                usdz_key,
+                job['etag'],
+                job['size'],
+                success=success,
+                error=None if success else (job['error'] or 'failed'),
+                output_key=job['glb_key'] if success else None,
+                output_etag=job.get('output_etag'),
+                timings=job['timings']
+            )
             
-            # Mark as processed
-            self.save_processed_file(usdz_key)
-            
-            # Delete USDZ if configured
-            if DELETE_USDZ_AFTER:
-                try:
-                    s3_client.delete_object(Bucket=S3_BUCKET, Key=usdz_key)
-                    logger.info(f"🗑️  Deleted source USDZ from S3")
-                except ClientError as e:
-                    logger.warning(f"⚠️  Could not delete USDZ: {e}")
-            
-            total_time = time.time() - process_start
-            logger.info(f"{'='*70}")
-            logger.info(f"✅✅✅ Successfully processed: {usdz_key}")
-            logger.info(f"📤 Output: {glb_key}")
-            logger.info(f"⏱️  Total processing time: {total_time:.1f} seconds ({total_time/60:.1f} minutes)")
-            logger.info(f"{'='*70}\n")
-            return True
+            # Entries promise every LOD and the chunks, so a job missing any is not cached
+            if (success and self.cache and not job.get('cached_glb_key')
+                    and len(job['lod_files']) == len(self.lod_levels)
+                    and (job['chunk_manifest'] or not self.chunk_mode)
+                    and job.get('companion_etags') is not None):
+                self.cache.put(self.cache_key(job), job['glb_key'], job.get('glb_size'), job.get('output_etag'),
+                               job['companion_etags'])
             
+            if success:
+                # Delete USDZ if configured
+                if DELETE_USDZ_AFTER:
+                    try:
+                        s3_client.delete_object(Bucket=S3_BUCKET, Key=usdz_key)
+                        logger.info(f"🗑️  Deleted source USDZ from S3")
+                    except ClientError as e:
+                        logger.warning(f"⚠️  Could not delete USDZ: {e}")
+                
+                total_time = time.time() - job['start']
+                logger.info(f"{'='*70}")
+                logger.info(f"✅✅✅ Successfully processed: {usdz_key}")
+                logger.info(f"📤 Output: {job['glb_key']}")
+                logger.info(f"⏱️  Total processing time: {total_time:.1f} seconds ({total_time/60:.1f} minutes)")
+                logger.info(f"{'='*70}\n")
+            else:
+                # Failed jobs are retried on later polls until MAX_ATTEMPTS
+                logger.error(f"❌ Conversion failed for {usdz_key} ({job['error'] or 'failed'})")
+            self.settle_events(usdz_key, success)
+        finally:
+            # Clean up temp files
+            shutil.rmtree(job['work_dir'], ignore_errors=True)
+    
+    def settle_events(self, key, success):
+        """Acknowledge the SQS messages whose keys have all been converted
+        
+        A failure leaves its messages in the queue, so SQS redelivers them
+        after the visibility timeout and the key is retried (or, after
+        MAX_ATTEMPTS, acknowledged as done).
+        """
+        if self.event_source is None:
+            return
+        handles = []
+        with self.event_lock:
+            for handle, keys in list(self.event_handles.items()):
+                if key not in keys:
+                    continue
+                keys.discard(key)
+                if not success:
+                    del self.event_handles[handle]
+                elif not keys:
+                    del self.event_handles[handle]
+                    handles.append(handle)
+        if handles:
+            self.event_source.ack(handles)
+    
+    def extend_events(self):
+        """Push back the visibility timeout of every message whose keys are still converting"""
+        with self.event_lock:
+            handles = list(self.event_handles)
+        if not handles:
+            return
+        failed = self.event_source.extend(handles, SQS_VISIBILITY_TIMEOUT)
+        if failed:
+            # Redelivered already: handle_events registers the new copy when it arrives
+            with self.event_lock:
+                for handle in failed:
+                    self.event_handles.pop(handle, None)
+    
+    def run_event_heartbeat(self):
+        """Background loop keeping in-progress SQS messages invisible, however long the large-file lane takes"""
+        while True:
+            time.sleep(SQS_VISIBILITY_TIMEOUT / 3)
+            try:
+                self.extend_events()
+            except Exception as e:
+                logger.error(f"❌ SQS heartbeat error: {e}")
+    
+    def process_file(self, usdz_key):
+        """Process a single USDZ file (download, convert, upload in sequence)"""
+        logger.info(f"\n{'='*70}")
+        
+        job = self.new_job({'Key': usdz_key})
+        success = False
+        try:
+            success = (
+                self.download_stage(job)
+                and self.convert_stage([job])
+                and self.upload_stage(job)
+            )
         except Exception as e:
             logger.error(f"❌ Processing failed: {e}")
             import traceback
             logger.error(traceback.format_exc())
-            return False
         finally:
-            # Clean up temp files
-            for temp_file in [usdz_temp, glb_temp]:
-                if os.path.exists(temp_file):
-                    try:
-                        os.remove(temp_file)
-                    except:
-                        pass
+            self.finish_job(job, success)
+        return success
+    
+    def make_batches(self, objects):
+        """Group small files so they share a Blender session; large files go alone"""
+        batch = []
+        for obj in objects:
+            size = obj.get('Size')
+            if BATCH_SIZE > 1 and size is not None and size <= BATCH_MAX_FILE_MB * 1024 * 1024:
+                batch.append(self.new_job(obj))
+                if len(batch) >= BATCH_SIZE:
+                    yield batch
+                    batch = []
+            else:
+                yield [self.new_job(obj)]
+        if batch:
+            yield batch
+    
+    def is_large(self, obj):
+        size = obj.get('Size')
+        return size is not None and size > LARGE_FILE_MB * 1024 * 1024
+    
+    def legacy_output_exists(self, obj):
+        """Whether a key imported from processed.txt still has a GLB at least as new as the upload"""
+        glb_key = obj['Key'].rsplit('.', 1)[0] + '.glb'
+        try:
+            head = s3_client.head_object(Bucket=S3_BUCKET, Key=glb_key)
+        except ClientError:
+            return False
+        if obj.get('LastModified') is not None and head['LastModified'] < obj['LastModified']:
+            return False  # Re-uploaded since it was converted
+        return True
+    
+    def pending_files(self, objects):
+        """Objects still to convert that are not already waiting in the large-file lane"""
+        pending = self.job_store.filter_new(objects, legacy_check=self.legacy_output_exists)
+        return [obj for obj in pending if obj['Key'] not in self.scheduler]
+    
+    def process_files(self, objects):
+        """Process files through the download -> convert -> upload pipeline, smallest first
+        
+        Large files are handed to the large-file lane and processed in the
+        background, so this returns once the small ones are done.
+        """
+        if self.large_pipeline:
+            large = [obj for obj in objects if self.is_large(obj)]
+            if large:
+                queued = self.scheduler.push(large)
+                logger.info(f"🐘 {queued} large file(s) queued for the large-file lane "
+                            f"({len(self.scheduler)} waiting, {self.scheduler.active()} running)")
+                self.start_large_lane()
+                objects = [obj for obj in objects if not self.is_large(obj)]
+        self.pipeline.run(self.make_batches(self.scheduler.order(objects)))
+    
+    def start_large_lane(self):
+        if self.large_lane is None or not self.large_lane.is_alive():
+            self.large_lane = threading.Thread(target=self.run_large_lane, name='large-lane', daemon=True)
+            self.large_lane.start()
+    
+    def large_jobs(self):
+        """Jobs for the large-file lane, best aged size first, until its queue is empty"""
+        while True:
+            obj = self.scheduler.pop()
+            if obj is None:
+                return
+            yield [self.new_job(obj)]
+    
+    def run_large_lane(self):
+        """Background loop of the large-file lane"""
+        while True:
+            self.scheduler.wait()
+            try:
+                self.large_pipeline.run(self.large_jobs())
+            except Exception as e:
+                logger.error(f"❌ Large-file lane error: {e}")
+                import traceback
+                logger.error(traceback.format_exc())
+                time.sleep(CHECK_INTERVAL)
+    
+    def log_cache_stats(self):
+        if self.cache:
+            stats = self.cache.stats()
+            logger.info(f"♻️  Cache: {stats['hits']} hit(s), {stats['misses']} miss(es) "
+                        f"({stats['hit_rate']:.0%} hit rate)")
+    
+    def sweep(self, full=False):
+        """List the prefix and process every USDZ not converted yet"""
+        usdz_files = self.list_usdz_files(full=full)
+        
+        # Find new files (unseen, changed content, or failed with retries left)
+        new_files = self.pending_files(usdz_files)
+        
+        if new_files:
+            logger.info(f"📋 Found {len(new_files)} new USDZ file(s)")
+            self.process_files(new_files)
+            self.log_cache_stats()
+        
+        # Everything listed is handled - move the watermark past it
+        self.lister.commit()
+        return len(new_files)
+    
+    def handle_events(self):
+        """Long-poll S3 notifications and process the USDZ files they announce"""
+        objects, handles = self.event_source.poll()
+        
+        candidates = {}
+        announced = {}
+        for obj in objects:
+            key = obj['Key']
+            if obj['Bucket'] != S3_BUCKET or not key.startswith(S3_PREFIX):
+                continue
+            if not key.lower().endswith('.usdz'):
+                continue
+            candidates[key] = obj
+            announced.setdefault(key, set()).add(obj['ReceiptHandle'])
+        new_files = self.pending_files(list(candidates.values()))
+        
+        # Messages are acknowledged once every key they announce is converted
+        # (see settle_events), so a crash or failure means redelivery. Keys
+        # already done, or already waiting in the large-file lane, settle now
+        # or with that job.
+        converting = {obj['Key'] for obj in new_files}
+        converting.update(key for key in announced if key in self.scheduler)
+        with self.event_lock:
+            for key in converting:
+                for handle in announced[key]:
+                    self.event_handles.setdefault(handle, set()).add(key)
+            settled = [handle for handle in handles if handle not in self.event_handles]
+        if settled:
+            self.event_source.ack(settled)
+        
+        if new_files:
+            logger.info(f"📨 {len(new_files)} new USDZ file(s) from S3 events")
+            self.process_files(new_files)
+            self.log_cache_stats()
+        return len(new_files)
     
     def run(self):
         """Main loop - monitor and process files"""
         logger.info("🚀 USDZ to GLB Conversion Service Started")
         logger.info(f"📦 Monitoring: s3://{S3_BUCKET}/{S3_PREFIX}")
-        logger.info(f"⏱️  Check interval: {CHECK_INTERVAL}s")
+        if self.event_source:
+            logger.info(f"📨 S3 events from: {SQS_QUEUE_URL}")
+        else:
+            logger.info(f"⏱️  Check interval: {CHECK_INTERVAL}s")
+        if S3_PARTITION_FORMAT:
+            logger.info(f"🗂️  Date partitions: {S3_PREFIX}{S3_PARTITION_FORMAT}")
+        logger.info(f"🔁 Reconciliation sweep every {RECONCILE_INTERVAL}s")
         logger.info(f"⏱️  Conversion timeout: {CONVERSION_TIMEOUT}s ({CONVERSION_TIMEOUT//60} minutes)")
+        if ADAPTIVE_TIMEOUT:
+            logger.info(f"⏱️  Adaptive timeouts: {TIMEOUT_MULTIPLIER}x predicted, min {MIN_CONVERSION_TIMEOUT}s - "
+                        f"{self.throughput.describe('blender')}")
+        logger.info(f"🧭 Backend selection: {'learned' if BACKEND_SELECTION else 'fixed order'}")
+        for line in self.selector.describe():
+            logger.info(f"   {line}")
         logger.info(f"⚠️  Large file warning threshold: {MAX_FILE_SIZE_MB} MB")
+        logger.info(f"🔀 Pipeline: prefetch {DOWNLOAD_PREFETCH} → {CONVERSION_WORKERS} converter(s) → {UPLOAD_WORKERS} uploader(s)")
+        if LARGE_LANE_WORKERS:
+            logger.info(f"🐘 Large-file lane: files over {LARGE_FILE_MB} MB, {LARGE_LANE_WORKERS} at a time")
+        logger.info(f"🎛️  Blender profile: {BLENDER_PROFILE}"
+                    f"{''.join(f', {profile} for {prefix}' for prefix, profile in BLENDER_PROFILE_BY_PREFIX.items())}")
+        if self.textures.available:
+            logger.info(f"🖼️  Textures: max {TEXTURE_MAX_SIZE or 'original'} px, "
+                        f"GLB format {self.textures.image_format or 'as exported'}, {self.textures.workers} process(es)")
+        elif TEXTURE_MAX_SIZE or TEXTURE_FORMAT:
+            logger.info("🖼️  Pillow not installed - textures are left as exported")
+        logger.info(f"🔥 Blender workers: {CONVERSION_WORKERS + LARGE_LANE_WORKERS} (recycle after {BLENDER_WORKER_MAX_JOBS} jobs or {BLENDER_WORKER_MAX_RSS_MB} MB)")
+        logger.info(f"🧠 Blender memory limit: {self.memory_limiter.describe()}"
+                    f"{', admission by estimated memory' if self.memory_gate else ''}")
         logger.info(f"📁 Working directory: {TEMP_DIR}")
-        logger.info(f"📝 Processed files log: {PROCESSED_LOG}")
+        logger.info(f"📝 Job database: {JOB_DB} ({self.job_store.counts()})")
         logger.info(f"{'='*70}\n")
+        self.start_metrics_server()
+        if self.event_source:
+            threading.Thread(target=self.run_event_heartbeat, name='sqs-heartbeat', daemon=True).start()
         
+        last_sweep = 0
         while True:
             try:
-                # List USDZ files
-                usdz_files = self.list_usdz_files()
+                # Incremental polls and events can miss keys that sort before
+                # the watermark; a periodic full listing reconciles them
+                if time.time() - last_sweep >= RECONCILE_INTERVAL:
+                    logger.info(f"🔁 Reconciliation sweep of s3://{S3_BUCKET}/{S3_PREFIX}")
+                    self.sweep(full=True)
+                    last_sweep = time.time()
                 
-                # Find new files
-                new_files = [
-                    f for f in usdz_files
-                    if f not in self.processed_files
-                ]
-                
-                if new_files:
-                    logger.info(f"📋 Found {len(new_files)} new USDZ file(s)")
-                    
-                    for usdz_key in new_files:
-                        success = self.process_file(usdz_key)
-                        if success:
-                            logger.info(f"✅ Conversion successful for {usdz_key}")
-                        else:
-                            logger.error(f"❌ Conversion failed for {usdz_key}")
-                            # Still mark as processed to avoid infinite retry
-                            self.save_processed_file(usdz_key)
-                        
-                        time.sleep(2)  # Small delay between files
+                if self.event_source:
+                    self.handle_events()
                 else:
-                    logger.info(f"No new USDZ files. Next check in {CHECK_INTERVAL}s...")
-                
-                # Wait before next check
-                time.sleep(CHECK_INTERVAL)
+                    if not self.sweep():
+                        logger.info(f"No new USDZ files. Next check in {CHECK_INTERVAL}s...")
+                    
+                    # Wait before next check
+                    time.sleep(CHECK_INTERVAL)
                 
             except KeyboardInterrupt:
                 logger.info("\n🛑 Service stopped by user")
+                self.blender_pool.shutdown()
+                self.textures.shutdown()
                 break
             except Exception as e:
                 logger.error(f"❌ Unexpected error in main loop: {e}")
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+
+"""
+GLB container helpers
+Read/write binary glTF 2.0 and build the JSON + BIN chunk from NumPy arrays
+"""
+
+import json
+import struct
+
+import numpy as np
+
+GLB_MAGIC = 0x46546C67  # "glTF"
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+
+COMPONENT_TYPES = {
+    np.dtype(np.int8): 5120,
+    np.dtype(np.uint8): 5121,
+    np.dtype(np.int16): 5122,
+    np.dtype(np.uint16): 5123,
+    np.dtype(np.uint32): 5125,
+    np.dtype(np.float32): 5126,
+}
+COMPONENT_DTYPES = {code: dtype for dtype, code in COMPONENT_TYPES.items()}
+
+ACCESSOR_TYPES = {1: 'SCALAR', 2: 'VEC2', 3: 'VEC3', 4: 'VEC4', 16: 'MAT4'}
+ACCESSOR_WIDTHS = {name: width for width, name in ACCESSOR_TYPES.items()}
+
+
+def _pad(data, fill=b'\x00', alignment=4):
+    remainder = len(data) % alignment
+    return data + fill * ((alignment - remainder) % alignment)
+
+
+def read_glb(path_or_bytes):
+    """Parse a GLB file; returns (gltf_json_dict, bin_bytes)"""
+    if isinstance(path_or_bytes, (bytes, bytearray, memoryview)):
+        data = bytes(path_or_bytes)
+    else:
+        with open(path_or_bytes, 'rb') as f:
+            data = f.read()
+
+    magic, version, length = struct.unpack_from('<III', data, 0)
+    if magic != GLB_MAGIC or version != 2:
+        raise ValueError("Not a glTF 2.0 binary file")
+
+    gltf = None
+    binary = b''
+    offset = 12
+    while offset < length:
+        chunk_length, chunk_type = struct.unpack_from('<II', data, offset)
+        chunk = data[offset + 8:offset + 8 + chunk_length]
+        if chunk_type == CHUNK_JSON:
+            gltf = json.loads(chunk.decode('utf-8'))
+        elif chunk_type == CHUNK_BIN and not binary:
+            binary = chunk
+        offset += 8 + chunk_length
+
+    if gltf is None:
+        raise ValueError("GLB has no JSON chunk")
+    return gltf, binary
+
+
+def glb_bytes(gltf, binary):
+    """Serialize glTF JSON and BIN chunk into a GLB"""
+    binary = _pad(bytes(binary))
+    if gltf.get('buffers'):
+        gltf['buffers'][0]['byteLength'] = len(binary)
+    json_chunk = _pad(json.dumps(gltf, separators=(',', ':')).encode('utf-8'), fill=b' ')
+
+    total = 12 + 8 + len(json_chunk) + (8 + len(binary) if binary else 0)
+    parts = [
+        struct.pack('<III', GLB_MAGIC, 2, total),
+        struct.pack('<II', len(json_chunk), CHUNK_JSON),
+        json_chunk,
+    ]
+    if binary:
+        parts.append(struct.pack('<II', len(binary), CHUNK_BIN))
+        parts.append(binary)
+    return b''.join(parts)
+
+
+def write_glb(path, gltf, binary):
+    data = glb_bytes(gltf, binary)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+def accessor_array(gltf, binary, index):
+    """Accessor contents as a NumPy array of shape (count, width)"""
+    accessor = gltf['accessors'][index]
+    dtype = COMPONENT_DTYPES[accessor['componentType']]
+    width = ACCESSOR_WIDTHS[accessor['type']]
+    count = accessor['count']
+
+    if 'bufferView' not in accessor:
+        array = np.zeros((count, width), dtype=dtype)
+    else:
+        view = gltf['bufferViews'][accessor['bufferView']]
+        start = view.get('byteOffset', 0) + accessor.get('byteOffset', 0)
+        element_size = dtype.itemsize * width
+        stride = view.get('byteStride') or element_size
+        if stride == element_size:
+            array = np.frombuffer(binary, dtype=dtype, count=count * width, offset=start)
+            array = array.reshape(count, width).copy()
+        else:
+            raw = np.frombuffer(binary, dtype=np.uint8, count=stride * (count - 1) + element_size, offset=start)
+            rows = np.lib.stride_tricks.as_strided(raw, shape=(count, element_size), strides=(stride, 1))
+            array = np.ascontiguousarray(rows).view(dtype).reshape(count, width)
+
+    if 'sparse' in accessor:
+        sparse = accessor['sparse']
+        idx_view = gltf['bufferViews'][sparse['indices']['bufferView']]
+        idx_dtype = COMPONENT_DTYPES[sparse['indices']['componentType']]
+        indices = np.frombuffer(
+            binary, dtype=idx_dtype, count=sparse['count'],
+            offset=idx_view.get('byteOffset', 0) + sparse['indices'].get('byteOffset', 0)
+        )
+        val_view = gltf['bufferViews'][sparse['values']['bufferView']]
+        values = np.frombuffer(
+            binary, dtype=dtype, count=sparse['count'] * width,
+            offset=val_view.get('byteOffset', 0) + sparse['values'].get('byteOffset', 0)
+        ).reshape(-1, width)
+        array = array.copy()
+        array[indices] = values
+    return array
+
+
+class GlbBuilder:
+    """Accumulates glTF JSON and a single BIN buffer"""
+
+    def __init__(self, gltf=None, generator='usdz-glb-conversion-service'):
+        if gltf is None:
+            gltf = {
+                'asset': {'version': '2.0', 'generator': generator},
+                'scene': 0,
+                'scenes': [{'nodes': []}],
+            }
+        self.gltf = gltf
+        self._chunks = []
+        self._length = 0
+
+    def _list(self, name):
+        return self.gltf.setdefault(name, [])
+
+    def add_buffer_view(self, data, target=None, byte_stride=None):
+        data = bytes(data)
+        offset = self._length
+        self._chunks.append(_pad(data))
+        self._length += len(self._chunks[-1])
+        view = {'buffer': 0, 'byteOffset': offset, 'byteLength': len(data)}
+        if target:
+            view['target'] = target
+        if byte_stride:
+            view['byteStride'] = byte_stride
+        views = self._list('bufferViews')
+        views.append(view)
+        return len(views) - 1
+
+    def add_accessor(self, array, target=None, normalized=False, minmax=False):
+        """Append a (count, width) or (count,) array as its own buffer view"""
+        array = np.ascontiguousarray(array)
+        if array.ndim == 1:
+            array = array.reshape(-1, 1)
+        count, width = array.shape
+        dtype = array.dtype
+        element_size = dtype.itemsize * width
+
+        # Vertex attributes must start and stride on 4-byte boundaries
+        byte_stride = None
+        data = array.tobytes()
+        if target == ARRAY_BUFFER and element_size % 4:
+            byte_stride = element_size + (4 - element_size % 4)
+            padded = np.zeros((count, byte_stride), dtype=np.uint8)
+            padded[:, :element_size] = array.view(np.uint8).reshape(count, element_size)
+            data = padded.tobytes()
+
+        accessor = {
+            'bufferView': self.add_buffer_view(data, target=target, byte_stride=byte_stride),
+            'componentType': COMPONENT_TYPES[dtype],
+            'count': int(count),
+            'type': ACCESSOR_TYPES[width],
+        }
+        if normalized:
+            accessor['normalized'] = True
+        if minmax and count:
+            cast = float if dtype.kind == 'f' else int
+            accessor['min'] = [cast(v) for v in array.min(axis=0)]
+            accessor['max'] = [cast(v) for v in array.max(axis=0)]
+        accessors = self._list('accessors')
+        accessors.append(accessor)
+        return len(accessors) - 1
+
+    def add_indices(self, indices):
+        """Index accessor using the narrowest component type that fits"""
+        indices = np.asarray(indices).reshape(-1)
+        top = int(indices.max()) if indices.size else 0
+        if top < 255:
+            dtype = np.uint8
+        elif top < 65535:
+            dtype = np.uint16
+        else:
+            dtype = np.uint32
+        return self.add_accessor(indices.astype(dtype), target=ELEMENT_ARRAY_BUFFER)
+
+    def add(self, name, item):
+        items = self._list(name)
+        items.append(item)
+        return len(items) - 1
+
+    def add_node(self, node, parent=None):
+        index = self.add('nodes', node)
+        if parent is None:
+            self.gltf['scenes'][self.gltf.get('scene', 0)]['nodes'].append(index)
+        else:
+            self.gltf['nodes'][parent].setdefault('children', []).append(index)
+        return index
+
+    def use_extension(self, name, required=False):
+        used = self._list('extensionsUsed')
+        if name not in used:
+            used.append(name)
+        if required:
+            required_list = self._list('extensionsRequired')
+            if name not in required_list:
+                required_list.append(name)
+
+    def binary(self):
+        return b''.join(self._chunks)
+
+    def finish(self):
+        """Final (gltf, binary) with the buffer entry filled in"""
+        binary = self.binary()
+        if binary:
+            self.gltf['buffers'] = [{'byteLength': len(binary)}]
+        else:
+            self.gltf.pop('buffers', None)
+        return self.gltf, binary
+
+    def write(self, path):
+        gltf, binary = self.finish()
+        return write_glb(path, gltf, binary)
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+
+"""
+Chunked output for progressive loading
+Splits a converted RoomPlan GLB into one GLB per category - the architecture
+(walls, doors, windows), the floor and each furniture category of
+Object_grp - or per room and category, assigning every wall and object to
+the nearest labelled section (room) of Section_grp. Each chunk is placed in
+world space, so a client can add the chunks to one scene in any order, and
+a manifest lists them with their bounding boxes, walls first. Nodes outside
+RoomPlan's groups go to an 'Other' chunk.
+"""
+
+import os
+import re
+import copy
+
+import numpy as np
+
+from glb import read_glb, write_glb
+from glb_optimize import GlbOptimizer, gltf_matrix, node_matrix
+
+CHUNK_MODES = ('category', 'room')
+MANIFEST_VERSION = 1
+CONTAINER_GROUPS = ('Model_grp', 'Object_grp')  # RoomPlan groups whose children are categories
+SECTION_GROUP = 'Section_grp'  # Labelled sections (rooms) of a capture
+OTHER_CATEGORY = 'Other'
+CATEGORY_PRIORITY = {'Arch': 0, 'Floor': 1}  # Loaded first; other categories follow, then OTHER_CATEGORY
+TRIANGLES = 4
+
+
+class GlbChunkError(Exception):
+    """The GLB can't be split into chunks"""
+
+
+def chunk_manifest_name(name):
+    """<name>.chunks.json for a GLB path or S3 key"""
+    return f"{name.rsplit('.', 1)[0]}.chunks.json"
+
+
+def chunk_dir_name(name):
+    """<name>.chunks - the chunk GLBs' directory (or S3 prefix), next to the manifest"""
+    return f"{name.rsplit('.', 1)[0]}.chunks"
+
+
+def _base_name(node):
+    """Node name without Blender's .001 de-duplication suffix"""
+    return re.sub(r'\.\d{3}$', '', node.get('name', ''))
+
+
+def _category(group_name):
+    """'Chair_grp' -> 'Chair', 'Wall_0_grp' -> 'Wall'"""
+    return re.sub(r'(_\d+)?_grp$', '', group_name)
+
+
+def _slug(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or 'chunk'
+
+
+class SceneSplitter:
+    """Chunks of one parsed GLB, written as standalone GLBs"""
+
+    def __init__(self, gltf, binary):
+        if gltf.get('skins') or gltf.get('animations'):
+            raise GlbChunkError("skinned or animated scenes are not split")
+        self.gltf = gltf
+        self.binary = binary
+        self.nodes = gltf.get('nodes', [])
+        scene = gltf.get('scenes', [{}])[gltf.get('scene', 0)] if gltf.get('scenes') else {}
+        self.roots = scene.get('nodes', [])
+        self.world = {}
+        for root in self.roots:
+            self._place(root, np.eye(4))
+
+    def _place(self, index, parent):
+        self.world[index] = parent @ node_matrix(self.nodes[index])
+        for child in self.nodes[index].get('children', []):
+            self._place(child, self.world[index])
+
+    def _subtree(self, index):
+        yield index
+        for child in self.nodes[index].get('children', []):
+            yield from self._subtree(child)
+
+    # -- grouping ------------------------------------------------------------
+
+    def units(self):
+        """(category, node) of every top-level piece of the scene"""
+        units = []
+
+        def visit(index, category):
+            node = self.nodes[index]
+            name = _base_name(node)
+            if name == SECTION_GROUP:
+                return
+            if category is None and name.endswith('_grp') and name not in CONTAINER_GROUPS:
+                category = _category(name)
+                if 'mesh' in node or not node.get('children'):
+                    units.append((category, index))
+                    return
+                # One unit per wall, floor or object, so each can go to its own room
+                for child in node['children']:
+                    units.append((category, child))
+                return
+            if 'mesh' in node:
+                units.append((category or OTHER_CATEGORY, index))
+                return
+            for child in node.get('children', []):
+                visit(child, category)
+
+        for root in self.roots:
+            visit(root, None)
+        return units
+
+    def rooms(self):
+        """(name, world position) of the sections (rooms) of the capture"""
+        rooms = []
+        for index, node in enumerate(self.nodes):
+            if _base_name(node) == SECTION_GROUP and index in self.world:
+                for child in node.get('children', []):
+                    rooms.append((_base_name(self.nodes[child]), self.world[child][:3, 3].copy()))
+        return rooms
+
+    def chunks(self, mode='category'):
+        """{(room, category): [node, ...]}; room is None when splitting by category"""
+        if mode not in CHUNK_MODES:
+            raise ValueError(f"Unknown chunk mode {mode!r} (have {', '.join(CHUNK_MODES)})")
+        rooms = self.rooms() if mode == 'room' else []
+        chunks = {}
+        for category, index in self.units():
+            if self.bounds([index]) is None:
+                continue  # No geometry (e.g. an empty group)
+            room = None
+            if rooms:
+                low, high = self.bounds([index])
+                center = (np.array(low) + np.array(high)) / 2
+                room = min(rooms, key=lambda r: float(np.linalg.norm(r[1] - center)))[0]
+            chunks.setdefault((room, category), []).append(index)
+        return chunks
+
+    # -- geometry ------------------------------------------------------------
+
+    def bounds(self, roots):
+        """World-space ([min], [max]) of the meshes under roots, or None"""
+        accessors = self.gltf.get('accessors', [])
+        corners = []
+        for root in roots:
+            for index in self._subtree(root):
+                node = self.nodes[index]
+                if 'mesh' not in node:
+                    continue
+                for primitive in self.gltf['meshes'][node['mesh']]['primitives']:
+                    position = accessors[primitive['attributes']['POSITION']]
+                    if 'min' not in position or 'max' not in position:
+                        continue
+                    low, high = position['min'], position['max']
+                    box = np.array([[x, y, z, 1.0] for x in (low[0], high[0])
+                                    for y in (low[1], high[1]) for z in (low[2], high[2])])
+                    corners.append((box @ self.world[index].T)[:, :3])
+        if not corners:
+            return None
+        corners = np.vstack(corners)
+        return corners.min(axis=0).tolist(), corners.max(axis=0).tolist()
+
+    def triangles(self, roots):
+        accessors = self.gltf.get('accessors', [])
+        count = 0
+        for root in roots:
+            for index in self._subtree(root):
+                if 'mesh' not in self.nodes[index]:
+                    continue
+                for primitive in self.gltf['meshes'][self.nodes[index]['mesh']]['primitives']:
+                    if primitive.get('mode', TRIANGLES) != TRIANGLES:
+                        continue
+                    source = primitive.get('indices', primitive['attributes'].get('POSITION'))
+                    count += accessors[source]['count'] // 3
+        return count
+
+    # -- writing -------------------------------------------------------------
+
+    def subset(self, roots):
+        """glTF JSON with only the subtrees under roots, each root placed in world space"""
+        gltf = copy.deepcopy(self.gltf)
+        for name in ('skins', 'animations', 'cameras', 'scenes', 'scene'):
+            gltf.pop(name, None)
+
+        kept = [index for root in roots for index in self._subtree(root)]
+        node_map = {old: new for new, old in enumerate(kept)}
+        nodes = []
+        for old in kept:
+            node = copy.deepcopy(self.nodes[old])
+            node.pop('camera', None)
+            node.pop('extensions', None)  # e.g. KHR_lights_punctual lights, dropped with the lights
+            if 'children' in node:
+                node['children'] = [node_map[child] for child in node['children']]
+            if old in roots:
+                for name in ('translation', 'rotation', 'scale', 'matrix'):
+                    node.pop(name, None)
+                if not np.allclose(self.world[old], np.eye(4), atol=1e-9):
+                    node['matrix'] = gltf_matrix(self.world[old])
+            nodes.append(node)
+        gltf['nodes'] = nodes
+        gltf['scenes'] = [{'nodes': [node_map[root] for root in roots]}]
+        gltf['scene'] = 0
+        gltf.pop('extensions', None)  # Scene-level lights and variants are not carried over
+
+        mesh_map = self._keep(gltf, 'meshes', sorted({node['mesh'] for node in nodes if 'mesh' in node}))
+        for node in nodes:
+            if 'mesh' in node:
+                node['mesh'] = mesh_map[node['mesh']]
+
+        used = sorted({primitive['material'] for mesh in gltf['meshes']
+                       for primitive in mesh['primitives'] if 'material' in primitive})
+        material_map = self._keep(gltf, 'materials', used)
+        for mesh in gltf['meshes']:
+            for primitive in mesh['primitives']:
+                primitive.get('extensions', {}).pop('KHR_materials_variants', None)
+                if 'material' in primitive:
+                    primitive['material'] = material_map[primitive['material']]
+
+        references = [ref for material in gltf.get('materials', []) for ref in _texture_refs(material)]
+        texture_map = self._keep(gltf, 'textures', sorted({ref['index'] for ref in references}))
+        for ref in references:
+            ref['index'] = texture_map[ref['index']]
+
+        sources = [holder for texture in gltf.get('textures', []) for holder in _image_refs(texture)]
+        image_map = self._keep(gltf, 'images', sorted({holder['source'] for holder in sources}))
+        for holder in sources:
+            holder['source'] = image_map[holder['source']]
+        return gltf
+
+    @staticmethod
+    def _keep(gltf, name, indices):
+        """Keep only the listed entries of gltf[name]; returns old -> new index"""
+        items = gltf.get(name, [])
+        gltf[name] = [items[index] for index in indices]
+        if not gltf[name]:
+            gltf.pop(name)
+        return {old: new for new, old in enumerate(indices)}
+
+    def write(self, roots, path):
+        """Write the chunk under roots as a GLB; only the data it uses is copied"""
+        optimizer = GlbOptimizer(self.subset(roots), self.binary, quantize=False, reorder=False, instancing=None)
+        gltf, binary = optimizer.run()
+        return write_glb(path, gltf, binary)
+
+
+def _texture_refs(value):
+    """textureInfo dicts ({'index': ...}) anywhere in a material"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key.endswith('Texture') and isinstance(item, dict) and 'index' in item:
+                yield item
+            else:
+                yield from _texture_refs(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _texture_refs(item)
+
+
+def _image_refs(texture):
+    """Dicts holding a texture's image 'source' (core or extension, e.g. EXT_texture_webp)"""
+    if 'source' in texture:
+        yield texture
+    for extension in texture.get('extensions', {}).values():
+        if isinstance(extension, dict) and 'source' in extension:
+            yield extension
+
+
+def _priority(category):
+    if category == OTHER_CATEGORY:
+        return len(CATEGORY_PRIORITY) + 1
+    return CATEGORY_PRIORITY.get(category, len(CATEGORY_PRIORITY))
+
+
+def split_glb(glb_path, out_dir, mode='category'):
+    """Write each chunk of glb_path into out_dir; returns (manifest, chunk paths)
+
+    Chunk 'file' entries are relative to out_dir's parent, where the
+    manifest goes. Raises GlbChunkError (or GlbOptimizeError) for GLBs that
+    can't be split.
+    """
+    gltf, binary = read_glb(glb_path)
+    splitter = SceneSplitter(gltf, binary)
+    chunks = splitter.chunks(mode)
+    os.makedirs(out_dir, exist_ok=True)
+
+    entries = []
+    paths = []
+    # Walls and floors of every room first, then furniture
+    for (room, category), roots in sorted(
+            chunks.items(), key=lambda item: (_priority(item[0][1]), item[0][1], item[0][0] or '')):
+        file_name = _slug(category if room is None else f"{room}-{category}") + '.glb'
+        while any(path.endswith('/' + file_name) for path in paths):
+            file_name = file_name[:-4] + '-1.glb'
+        path = os.path.join(out_dir, file_name)
+        splitter.write(roots, path)
+        low, high = splitter.bounds(roots)
+        paths.append(path)
+        entries.append({
+            'name': category if room is None else f"{room}/{category}",
+            'file': f"{os.path.basename(out_dir)}/{file_name}",
+            'room': room,
+            'category': category,
+            'priority': _priority(category),
+            'bounds': {'min': low, 'max': high},
+            'triangles': splitter.triangles(roots),
+        })
+
+    scene_bounds = splitter.bounds(splitter.roots)
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'mode': mode,
+        'bounds': {'min': scene_bounds[0], 'max': scene_bounds[1]} if scene_bounds else None,
+        'rooms': [{'name': name, 'center': center.tolist()} for name, center in splitter.rooms()],
+        'chunks': entries,
+    }
+    return manifest, paths
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+"""
+Levels of detail
+Writes reduced copies of a converted GLB (<name>.lod1.glb, <name>.lod2.glb,
+...) from one read of the file. Dense triangle primitives are simplified by
+quadric-error vertex clustering (Lindstrom 2000): vertices are binned on a
+grid sized to hit the target triangle count and every cell collapses to the
+point minimising the summed plane quadrics of its triangles. Repeated
+meshes are merged first, as in glb_optimize, and welded vertices and their
+quadrics are computed once and shared by all levels. A level never has more
+triangles than the one before it: on small meshes a coarser grid can split
+fewer cells' triangles apart than a finer one, and the previous level's
+result is then reused. Small primitives (RoomPlan's walls and boxes) are
+copied unchanged, and embedded textures are downscaled per level.
+"""
+
+import json
+
+import numpy as np
+
+from glb import accessor_array, read_glb, write_glb
+from glb_optimize import GlbOptimizer, MAX_REORDER_TRIANGLES, reorder_vertices, tipsify, weld
+
+MAX_GRID_RESOLUTION = 2048  # Cells along the longest side of a primitive
+GRID_SEARCH_STEPS = 12
+TRIANGLE_TOLERANCE = 0.1  # Accept a level within this share of its target
+REGULARIZATION = 1e-3  # Pull towards the cell's mean where the quadric is degenerate (flat areas)
+
+
+def lod_name(name, level):
+    """<name>.lod<level>.glb for a GLB path or S3 key"""
+    return f"{name.rsplit('.', 1)[0]}.lod{level}.glb"
+
+
+def vertex_quadrics(positions, triangles):
+    """Area-weighted sum of the plane quadrics of each vertex's triangles, as (n, 16)"""
+    p0, p1, p2 = (positions[triangles[:, k]] for k in range(3))
+    normal = np.cross(p1 - p0, p2 - p0)
+    doubled_area = np.linalg.norm(normal, axis=1)
+    unit = normal / np.where(doubled_area > 0, doubled_area, 1.0)[:, None]
+    plane = np.hstack([unit, -(unit * p0).sum(axis=1, keepdims=True)])
+    face = (plane[:, :, None] * plane[:, None, :]).reshape(-1, 16) * (doubled_area / 2)[:, None]
+
+    corners = triangles.reshape(-1)
+    return np.stack([
+        np.bincount(corners, weights=np.repeat(face[:, k], 3), minlength=len(positions))
+        for k in range(16)
+    ], axis=1)
+
+
+def _cluster(positions, triangles, low, cell_size, resolution):
+    """(cluster of each vertex, grid cell of each vertex, surviving triangles) for one grid"""
+    cells = np.clip(np.floor((positions - low) / cell_size), 0, resolution - 1).astype(np.int64)
+    keys = (cells[:, 0] * resolution + cells[:, 1]) * resolution + cells[:, 2]
+    _, cluster = np.unique(keys, return_inverse=True)
+    cluster = cluster.reshape(-1)
+
+    collapsed = cluster[triangles]
+    a, b, c = collapsed[:, 0], collapsed[:, 1], collapsed[:, 2]
+    collapsed = collapsed[(a != b) & (b != c) & (a != c)]
+    # Drop triangles that collapsed onto the same three cells (keeping the first's winding)
+    _, first = np.unique(np.sort(collapsed, axis=1), axis=0, return_index=True)
+    return cluster, cells, collapsed[np.sort(first)]
+
+
+def cluster_simplify(attributes, triangles, target, quadrics):
+    """Reduce a primitive to about target triangles; returns (attributes, triangles)"""
+    positions = attributes['POSITION'].astype(np.float64)
+    low = positions.min(axis=0)
+    extent = float((positions.max(axis=0) - low).max()) or 1.0
+
+    # Triangle count grows with the grid resolution: binary search for the
+    # finest grid that stays within the target
+    best = None
+    lo, hi = 1, MAX_GRID_RESOLUTION
+    for _ in range(GRID_SEARCH_STEPS):
+        if lo > hi:
+            break
+        resolution = (lo + hi) // 2
+        result = _cluster(positions, triangles, low, extent / resolution, resolution)
+        count = len(result[2])
+        if count <= target * (1 + TRIANGLE_TOLERANCE):
+            best = (resolution, result)
+            if count >= target * (1 - TRIANGLE_TOLERANCE):
+                break
+            lo = resolution + 1
+        else:
+            hi = resolution - 1
+    if best is None or len(best[1][2]) == 0:
+        return attributes, triangles
+    resolution, (cluster, cells, simplified) = best
+    cell_size = extent / resolution
+
+    clusters = int(cluster.max()) + 1
+    members = np.bincount(cluster, minlength=clusters).astype(np.float64)
+
+    def cluster_sum(values):
+        return np.stack([np.bincount(cluster, weights=values[:, k], minlength=clusters)
+                         for k in range(values.shape[1])], axis=1)
+
+    mean = cluster_sum(positions) / members[:, None]
+    q = cluster_sum(quadrics).reshape(-1, 4, 4)
+    a = q[:, :3, :3]
+    b = -q[:, :3, 3]
+    weight = REGULARIZATION * np.trace(a, axis1=1, axis2=2) / 3 + 1e-12
+    a = a + weight[:, None, None] * np.eye(3)
+    b = b + weight[:, None] * mean
+    placed = np.linalg.solve(a, b[:, :, None])[:, :, 0]
+
+    # The optimum may lie outside the cell (e.g. near-parallel planes); keep it inside
+    representative = np.zeros(clusters, dtype=np.int64)
+    representative[cluster] = np.arange(len(cluster))
+    cell_low = low + cells[representative] * cell_size
+    placed = np.clip(placed, cell_low, cell_low + cell_size)
+
+    merged = {}
+    for name, array in attributes.items():
+        if name == 'POSITION':
+            merged[name] = placed.astype(np.float32)
+        elif array.dtype == np.float32 and array.ndim == 2:
+            values = cluster_sum(array.astype(np.float64)) / members[:, None]
+            if name in ('NORMAL', 'TANGENT'):
+                direction = values[:, :3]
+                length = np.linalg.norm(direction, axis=1, keepdims=True)
+                values[:, :3] = direction / np.where(length > 0, length, 1.0)
+                if name == 'TANGENT':
+                    values[:, 3] = array[representative, 3]  # Handedness is a sign, not an average
+            merged[name] = values.astype(np.float32)
+        else:
+            merged[name] = array[representative]
+    return merged, simplified.astype(np.uint32)
+
+
+class LodBuilder(GlbOptimizer):
+    """One level of detail: the optimizer's copy of a GLB with dense primitives simplified"""
+
+    def __init__(self, gltf, binary, ratio, min_triangles=5000, images=None, shared=None, previous=None):
+        # Repeated meshes are merged first, so they are simplified once and stay shared
+        super().__init__(gltf, binary, quantize=False, reorder=True, instancing='nodes')
+        self.ratio = ratio
+        self.min_triangles = min_triangles
+        self.images = images or {}
+        # Welded primitives and their quadrics, reused by every level of one GLB
+        self.shared = shared if shared is not None else {}
+        # Simplified primitives of the previous level, which this one must not exceed
+        self.previous = previous if previous is not None else {}
+        self.stats.update(triangles_before=0, triangles_after=0, simplified_primitives=0)
+
+    def _copy_view(self, index):
+        if index in self.images:
+            return self.builder.add_buffer_view(self.images[index])
+        return super()._copy_view(index)
+
+    @staticmethod
+    def _key(primitive):
+        return json.dumps([primitive['attributes'], primitive.get('indices')], sort_keys=True)
+
+    def _welded(self, primitive):
+        """(vertex count, welded attributes, triangles, quadrics) of a source primitive, loaded once per GLB"""
+        key = self._key(primitive)
+        if key not in self.shared:
+            attributes = {
+                name: accessor_array(self.source, self.binary, accessor)
+                for name, accessor in primitive['attributes'].items()
+            }
+            count = len(attributes['POSITION'])
+            if 'indices' in primitive:
+                indices = accessor_array(self.source, self.binary, primitive['indices']).reshape(-1).astype(np.uint32)
+            else:
+                indices = np.arange(count, dtype=np.uint32)
+            attributes, indices = weld(attributes, indices)
+            triangles = indices[:len(indices) - len(indices) % 3].reshape(-1, 3)
+            quadrics = None
+            if len(triangles) >= self.min_triangles and 'JOINTS_0' not in attributes:
+                quadrics = vertex_quadrics(attributes['POSITION'].astype(np.float64), triangles)
+            self.shared[key] = (count, attributes, triangles, quadrics)
+        return self.shared[key]
+
+    def _load_primitive(self, primitive):
+        count, attributes, triangles, quadrics = self._welded(primitive)
+        self.stats['vertices_before'] += count
+        self.stats['triangles_before'] += len(triangles)
+        if quadrics is not None:
+            target = max(int(len(triangles) * self.ratio), 1)
+            attributes, triangles = cluster_simplify(attributes, triangles, target, quadrics)
+            key = self._key(primitive)
+            if key in self.previous and len(triangles) >= len(self.previous[key][1]):
+                attributes, triangles = self.previous[key]
+            self.previous[key] = (attributes, triangles)
+            self.stats['simplified_primitives'] += 1
+        self.stats['triangles_after'] += len(triangles)
+
+        if self.reorder and 0 < len(triangles) <= MAX_REORDER_TRIANGLES:
+            triangles = tipsify(triangles, len(attributes['POSITION']))
+        attributes, indices = reorder_vertices(attributes, triangles.reshape(-1))
+        self.stats['vertices_after'] += len(attributes['POSITION'])
+        return attributes, indices
+
+
+def build_lods(glb_path, levels, min_triangles=5000, textures=None):
+    """Write lod_name(glb_path, n) for each (triangle ratio, texture size) level; returns [(path, stats)]
+
+    Raises GlbOptimizeError for GLBs the optimizer cannot rewrite (Draco, meshopt).
+    """
+    gltf, binary = read_glb(glb_path)
+    shared = {}
+    previous = {}
+    written = []
+    for level, (ratio, texture_size) in enumerate(levels, start=1):
+        images = {}
+        if textures is not None and texture_size:
+            images = textures.downscale_images(gltf, binary, texture_size)
+        builder = LodBuilder(gltf, binary, ratio, min_triangles=min_triangles, images=images,
+                             shared=shared, previous=previous)
+        lod_gltf, lod_binary = builder.run()
+        path = lod_name(glb_path, level)
+        size = write_glb(path, lod_gltf, lod_binary)
+        written.append((path, dict(builder.stats, size=size, images=len(images))))
+    return written
@@ -0,0 +1,609 @@
+#!/usr/bin/env python3
+
+"""
+GLB geometry compaction
+Post-conversion pass over a GLB: merges identical materials and meshes that
+only differ by a per-axis scale and offset (RoomPlan's unit boxes) into
+shared or GPU-instanced meshes, welds bit-identical vertices, reorders
+triangles for the GPU vertex cache (Tipsify) and vertices for fetch
+locality, narrows indices and quantizes positions, normals, tangents and
+texture coordinates with KHR_mesh_quantization.
+"""
+
+import os
+import copy
+import json
+import hashlib
+import logging
+
+import numpy as np
+
+from glb import GlbBuilder, read_glb, write_glb, accessor_array, ACCESSOR_WIDTHS, ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_EXTENSION = 'KHR_mesh_quantization'
+INSTANCING_EXTENSION = 'EXT_mesh_gpu_instancing'
+# Geometry stored by these extensions can't be rewritten here
+UNSUPPORTED_EXTENSIONS = ('KHR_draco_mesh_compression', 'EXT_meshopt_compression')
+
+TRIANGLES = 4
+VERTEX_CACHE_SIZE = 16
+MAX_REORDER_TRIANGLES = 500000  # Tipsify runs in Python; larger primitives keep their order
+
+# Instancing: 'nodes' shares one mesh between nodes, 'gpu' also collapses
+# sibling nodes into one EXT_mesh_gpu_instancing node
+INSTANCING_MODES = ('nodes', 'gpu')
+INSTANCE_POSITION_TOLERANCE = 1e-4  # Fraction of the half-extent
+INSTANCE_DIRECTION_TOLERANCE = 1e-3
+GPU_INSTANCING_MIN_NODES = 2
+
+
+class GlbOptimizeError(Exception):
+    """The GLB uses something the optimizer does not rewrite"""
+
+
+def weld(attributes, indices):
+    """Merge vertices whose attributes are bit-identical; returns (attributes, indices)"""
+    count = len(next(iter(attributes.values())))
+    rows = np.hstack([
+        np.ascontiguousarray(array).view(np.uint8).reshape(count, -1)
+        for array in attributes.values()
+    ])
+    keys = np.ascontiguousarray(rows).view(np.dtype((np.void, rows.shape[1]))).reshape(-1)
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    welded = {name: array[first] for name, array in attributes.items()}
+    return welded, inverse.reshape(-1)[indices]
+
+
+def tipsify(triangles, vertex_count, cache_size=VERTEX_CACHE_SIZE):
+    """Triangle order for post-transform cache locality (Sander et al. 2007)"""
+    triangle_count = len(triangles)
+    flat = triangles.reshape(-1)
+    # Triangles around each vertex, as CSR offsets into tri_of
+    valence = np.bincount(flat, minlength=vertex_count)
+    offsets = np.concatenate(([0], np.cumsum(valence))).tolist()
+    tri_of = (np.argsort(flat, kind='stable') // 3).tolist()
+    corners = triangles.tolist()
+
+    live = valence.tolist()
+    cache_time = [0] * vertex_count
+    emitted = bytearray(triangle_count)
+    dead_end = []
+    output = []
+    time = cache_size + 1
+    cursor = 0
+    fan = int(flat[0]) if triangle_count else -1
+
+    while fan >= 0:
+        candidates = []
+        for t in tri_of[offsets[fan]:offsets[fan + 1]]:
+            if emitted[t]:
+                continue
+            emitted[t] = 1
+            output.append(t)
+            for v in corners[t]:
+                dead_end.append(v)
+                candidates.append(v)
+                live[v] -= 1
+                if time - cache_time[v] > cache_size:
+                    cache_time[v] = time
+                    time += 1
+
+        # Next fanning vertex: the one still in cache longest that has work left
+        fan = -1
+        best = -1
+        for v in candidates:
+            if live[v] > 0:
+                priority = 0
+                if time - cache_time[v] + 2 * live[v] <= cache_size:
+                    priority = time - cache_time[v]
+                if priority > best:
+                    fan, best = v, priority
+        if fan < 0:
+            while dead_end:
+                v = dead_end.pop()
+                if live[v] > 0:
+                    fan = v
+                    break
+        if fan < 0:
+            while cursor < vertex_count and live[cursor] == 0:
+                cursor += 1
+            fan = cursor if cursor < vertex_count else -1
+
+    return triangles[output]
+
+
+def reorder_vertices(attributes, indices):
+    """Renumber vertices in first-use order (drops unused ones)"""
+    used, first_use = np.unique(indices, return_index=True)
+    order = used[np.argsort(first_use)]
+    remap = np.zeros(int(indices.max()) + 1 if indices.size else 0, dtype=np.uint32)
+    remap[order] = np.arange(len(order), dtype=np.uint32)
+    return {name: array[order] for name, array in attributes.items()}, remap[indices]
+
+
+def affine_matrix(scale, offset):
+    """4x4 matrix of a per-axis scale followed by a translation"""
+    m = np.diag([float(scale[0]), float(scale[1]), float(scale[2]), 1.0])
+    m[:3, 3] = offset
+    return m
+
+
+def gltf_matrix(m):
+    """Column-major list for a node's 'matrix'"""
+    return [float(v) for v in m.T.reshape(-1)]
+
+
+def quaternion_matrix(q):
+    x, y, z, w = q
+    return np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ])
+
+
+def matrix_quaternion(r):
+    """Unit quaternion (x, y, z, w) of a rotation matrix"""
+    trace = r[0, 0] + r[1, 1] + r[2, 2]
+    if trace > 0:
+        s = 2.0 * np.sqrt(trace + 1.0)
+        q = [(r[2, 1] - r[1, 2]) / s, (r[0, 2] - r[2, 0]) / s, (r[1, 0] - r[0, 1]) / s, 0.25 * s]
+    elif r[0, 0] > r[1, 1] and r[0, 0] > r[2, 2]:
+        s = 2.0 * np.sqrt(1.0 + r[0, 0] - r[1, 1] - r[2, 2])
+        q = [0.25 * s, (r[0, 1] + r[1, 0]) / s, (r[0, 2] + r[2, 0]) / s, (r[2, 1] - r[1, 2]) / s]
+    elif r[1, 1] > r[2, 2]:
+        s = 2.0 * np.sqrt(1.0 + r[1, 1] - r[0, 0] - r[2, 2])
+        q = [(r[0, 1] + r[1, 0]) / s, 0.25 * s, (r[1, 2] + r[2, 1]) / s, (r[0, 2] - r[2, 0]) / s]
+    else:
+        s = 2.0 * np.sqrt(1.0 + r[2, 2] - r[0, 0] - r[1, 1])
+        q = [(r[0, 2] + r[2, 0]) / s, (r[1, 2] + r[2, 1]) / s, 0.25 * s, (r[1, 0] - r[0, 1]) / s]
+    q = np.array(q)
+    return q / np.linalg.norm(q)
+
+
+def node_matrix(node):
+    if 'matrix' in node:
+        return np.array(node['matrix'], dtype=np.float64).reshape(4, 4).T
+    m = np.eye(4)
+    m[:3, :3] = quaternion_matrix(node.get('rotation', [0.0, 0.0, 0.0, 1.0])) * node.get('scale', [1.0, 1.0, 1.0])
+    m[:3, 3] = node.get('translation', [0.0, 0.0, 0.0])
+    return m
+
+
+def decompose(m):
+    """(translation, rotation, scale) of an affine matrix, or None if it is sheared"""
+    linear = m[:3, :3]
+    scale = np.linalg.norm(linear, axis=0)
+    if (scale <= 1e-12).any():
+        return None
+    rotation = linear / scale
+    if np.linalg.det(rotation) < 0:
+        scale[0] = -scale[0]
+        rotation[:, 0] = -rotation[:, 0]
+    if not np.allclose(rotation.T @ rotation, np.eye(3), atol=1e-5):
+        return None
+    return m[:3, 3].copy(), matrix_quaternion(rotation), scale
+
+
+def quantize_unit(array, dtype):
+    """[-1, 1] floats as normalized signed integers"""
+    top = np.iinfo(dtype).max
+    return np.round(np.clip(array, -1.0, 1.0) * top).astype(dtype)
+
+
+class GlbOptimizer:
+    """Rewrites the meshes of one GLB into a fresh buffer"""
+
+    def __init__(self, gltf, binary, quantize=True, reorder=True, instancing='nodes'):
+        used = gltf.get('extensionsUsed', [])
+        for name in UNSUPPORTED_EXTENSIONS:
+            if name in used:
+                raise GlbOptimizeError(f"{name} is not supported")
+
+        self.source = gltf
+        self.binary = binary
+        self.quantize = quantize
+        self.reorder = reorder
+        if instancing and instancing not in INSTANCING_MODES:
+            raise ValueError(f"Unknown instancing mode {instancing!r}")
+        self.instancing = instancing
+
+        self.gltf = copy.deepcopy(gltf)
+        for name in ('accessors', 'bufferViews', 'buffers'):
+            self.gltf.pop(name, None)
+        self.builder = GlbBuilder(self.gltf)
+        self._accessors = {}
+        self._dequantize = {}
+        self._instance_nodes = set()
+        self._gpu_nodes = {}
+        self.stats = {
+            'vertices_before': 0,
+            'vertices_after': 0,
+            'quantized_meshes': 0,
+            'merged_materials': 0,
+            'merged_meshes': 0,
+            'gpu_instances': 0,
+        }
+
+    def run(self):
+        for image in self.gltf.get('images', []):
+            if 'bufferView' in image:
+                image['bufferView'] = self._copy_view(image['bufferView'])
+
+        if self.instancing:
+            self._merge_materials()
+            self._merge_meshes()
+
+        quantizable = self._quantizable_meshes()
+        for index, mesh in enumerate(self.gltf.get('meshes', [])):
+            self._optimize_mesh(index, mesh, index in quantizable)
+
+        for skin in self.gltf.get('skins', []):
+            if 'inverseBindMatrices' in skin:
+                skin['inverseBindMatrices'] = self._copy_accessor(skin['inverseBindMatrices'])
+        for animation in self.gltf.get('animations', []):
+            for sampler in animation.get('samplers', []):
+                sampler['input'] = self._copy_accessor(sampler['input'])
+                sampler['output'] = self._copy_accessor(sampler['output'])
+        for node in self.gltf.get('nodes', []):
+            instancing = node.get('extensions', {}).get('EXT_mesh_gpu_instancing')
+            if instancing:
+                attributes = instancing['attributes']
+                for name, accessor in attributes.items():
+                    attributes[name] = self._copy_accessor(accessor)
+
+        self._write_gpu_instances()
+        self._attach_dequantization()
+        if self._dequantize:
+            self.builder.use_extension(QUANTIZATION_EXTENSION, required=True)
+        return self.builder.finish()
+
+    # -- copying untouched data ----------------------------------------------
+
+    def _copy_view(self, index):
+        view = self.source['bufferViews'][index]
+        start = view.get('byteOffset', 0)
+        return self.builder.add_buffer_view(self.binary[start:start + view['byteLength']])
+
+    def _copy_accessor(self, index, target=None):
+        key = (index, target)
+        if key in self._accessors:
+            return self._accessors[key]
+        source = self.source['accessors'][index]
+        if source['type'] not in ACCESSOR_WIDTHS:
+            raise GlbOptimizeError(f"{source['type']} accessors are not supported")
+        array = accessor_array(self.source, self.binary, index)
+        new_index = self.builder.add_accessor(array, target=target, normalized=source.get('normalized', False))
+        accessor = self.gltf['accessors'][new_index]
+        for name in ('min', 'max', 'name'):
+            if name in source:
+                accessor[name] = source[name]
+        self._accessors[key] = new_index
+        return new_index
+
+    def _copy_primitive(self, primitive):
+        attributes = primitive['attributes']
+        for name, accessor in attributes.items():
+            attributes[name] = self._copy_accessor(accessor, ARRAY_BUFFER)
+        if 'indices' in primitive:
+            primitive['indices'] = self._copy_accessor(primitive['indices'], ELEMENT_ARRAY_BUFFER)
+        for morph in primitive.get('targets', []):
+            for name, accessor in morph.items():
+                morph[name] = self._copy_accessor(accessor, ARRAY_BUFFER)
+
+    # -- meshes --------------------------------------------------------------
+
+    def _quantizable_meshes(self):
+        """Meshes whose nodes can take a dequantization transform"""
+        if not self.quantize:
+            return set()
+        blocked = set()
+        nodes = self.gltf.get('nodes', [])
+        for node_index, node in enumerate(nodes):
+            if 'mesh' in node and (not self._is_plain(node) or node_index in self._gpu_nodes):
+                blocked.add(node['mesh'])
+        return {
+            index for index, mesh in enumerate(self.gltf.get('meshes', []))
+            if index not in blocked and 'weights' not in mesh
+        }
+
+    @staticmethod
+    def _is_plain(node):
+        """Nodes whose mesh can be moved or re-parented freely"""
+        return not ('skin' in node or 'weights' in node or node.get('extensions'))
+
+    def _is_rewritable(self, primitive):
+        if primitive.get('mode', TRIANGLES) != TRIANGLES or primitive.get('targets'):
+            return False
+        position = primitive['attributes'].get('POSITION')
+        return position is not None and self.source['accessors'][position]['componentType'] == 5126
+
+    # -- instancing ----------------------------------------------------------
+
+    def _merge_materials(self):
+        """Collapse materials that only differ by name"""
+        materials = self.gltf.get('materials', [])
+        if not materials or 'KHR_materials_variants' in self.gltf.get('extensionsUsed', []):
+            return
+        remap = {}
+        kept = []
+        seen = {}
+        for index, material in enumerate(materials):
+            key = json.dumps({k: v for k, v in material.items() if k != 'name'}, sort_keys=True)
+            if key not in seen:
+                seen[key] = len(kept)
+                kept.append(material)
+            remap[index] = seen[key]
+        if len(kept) == len(materials):
+            return
+        for mesh in self.gltf.get('meshes', []):
+            for primitive in mesh['primitives']:
+                if 'material' in primitive:
+                    primitive['material'] = remap[primitive['material']]
+        self.gltf['materials'] = kept
+        self.stats['merged_materials'] = len(materials) - len(kept)
+
+    def _mesh_signature(self, mesh):
+        """(hash, center, half extent) of a mesh normalized to its bounding box"""
+        loaded = []
+        for primitive in mesh['primitives']:
+            attributes = {
+                name: accessor_array(self.source, self.binary, accessor)
+                for name, accessor in primitive['attributes'].items()
+            }
+            indices = None
+            if 'indices' in primitive:
+                indices = accessor_array(self.source, self.binary, primitive['indices']).reshape(-1)
+            loaded.append((primitive, attributes, indices))
+
+        positions = np.vstack([attributes['POSITION'] for _, attributes, _ in loaded]).astype(np.float64)
+        low, high = positions.min(axis=0), positions.max(axis=0)
+        center = (low + high) / 2
+        half = (high - low) / 2
+        half[half <= 1e-9] = 1.0
+
+        digest = hashlib.md5(usedforsecurity=False)
+        for primitive, attributes, indices in loaded:
+            digest.update(json.dumps(
+                [primitive.get('material'), primitive.get('mode', TRIANGLES), sorted(attributes)]
+            ).encode())
+            for name in sorted(attributes):
+                array = attributes[name]
+                if name == 'POSITION':
+                    array = np.round((array - center) / half / INSTANCE_POSITION_TOLERANCE)
+                elif name in ('NORMAL', 'TANGENT') and array.dtype == np.float32:
+                    # Directions as the renderer derives them after the scale
+                    directions = array[:, :3] * (half if name == 'NORMAL' else 1 / half)
+                    lengths = np.linalg.norm(directions, axis=1, keepdims=True)
+                    directions = directions / np.where(lengths > 0, lengths, 1.0)
+                    array = np.round(np.hstack([directions, array[:, 3:]]) / INSTANCE_DIRECTION_TOLERANCE)
+                elif array.dtype.kind == 'f':
+                    array = np.round(array / INSTANCE_POSITION_TOLERANCE)
+                digest.update(name.encode())
+                digest.update(np.ascontiguousarray(array).astype(np.int64).tobytes())
+            if indices is not None:
+                digest.update(indices.astype(np.uint32).tobytes())
+        return digest.hexdigest(), center, half
+
+    def _merge_meshes(self):
+        """Point nodes with equivalent meshes at one shared mesh"""
+        meshes = self.gltf.get('meshes', [])
+        nodes = self.gltf.get('nodes', [])
+        users = {}
+        for node_index, node in enumerate(nodes):
+            if 'mesh' in node:
+                users.setdefault(node['mesh'], []).append(node_index)
+
+        groups = {}
+        for index, mesh in enumerate(meshes):
+            if index not in users or 'weights' in mesh:
+                continue
+            if not all(self._is_plain(nodes[i]) for i in users[index]):
+                continue
+            if not all(self._is_rewritable(primitive) for primitive in mesh['primitives']):
+                continue
+            signature, center, half = self._mesh_signature(mesh)
+            groups.setdefault(signature, []).append((index, center, half))
+
+        # Per node: (shared mesh, transform from the shared mesh to its own)
+        placements = {}
+        for members in groups.values():
+            shared, shared_center, shared_half = members[0]
+            for index, center, half in members:
+                scale = half / shared_half
+                offset = center - scale * shared_center
+                for node_index in users[index]:
+                    placements[node_index] = (shared, affine_matrix(scale, offset))
+            self.stats['merged_meshes'] += len(members) - 1
+
+        if self.instancing == 'gpu':
+            self._collapse_instances(placements)
+
+        for node_index, (shared, transform) in placements.items():
+            node = nodes[node_index]
+            if np.allclose(transform, np.eye(4), atol=1e-9):
+                node['mesh'] = shared
+                continue
+            del node['mesh']
+            child = self.builder.add_node({'mesh': shared, 'matrix': gltf_matrix(transform)}, parent=node_index)
+            self._instance_nodes.add(child)
+
+        self._drop_unused_meshes()
+
+    def _collapse_instances(self, placements):
+        """Replace sibling leaf nodes sharing a mesh with one EXT_mesh_gpu_instancing node"""
+        nodes = self.gltf.get('nodes', [])
+        parents = {}
+        for node_index, node in enumerate(nodes):
+            for child in node.get('children', []):
+                parents[child] = node_index
+
+        candidates = {}
+        for node_index, (shared, transform) in placements.items():
+            node = nodes[node_index]
+            if node.get('children') or 'camera' in node:
+                continue
+            candidates.setdefault((parents.get(node_index), shared), []).append(node_index)
+
+        for (parent, shared), members in candidates.items():
+            if len(members) < GPU_INSTANCING_MIN_NODES:
+                continue
+            instances = [decompose(node_matrix(nodes[i]) @ placements[i][1]) for i in members]
+            if any(instance is None for instance in instances):
+                continue
+            for node_index in members:
+                del nodes[node_index]['mesh']
+                del placements[node_index]
+            name = self.gltf['meshes'][shared].get('name') or f"mesh{shared}"
+            instance_node = self.builder.add_node({'name': f"{name}_instances", 'mesh': shared}, parent=parent)
+            self._gpu_nodes[instance_node] = instances
+            self.stats['gpu_instances'] += len(members)
+
+    def _drop_unused_meshes(self):
+        """Remove meshes no node references any more and renumber the rest"""
+        meshes = self.gltf.get('meshes', [])
+        nodes = self.gltf.get('nodes', [])
+        used = {node['mesh'] for node in nodes if 'mesh' in node}
+        remap = {}
+        kept = []
+        for index, mesh in enumerate(meshes):
+            if index in used:
+                remap[index] = len(kept)
+                kept.append(mesh)
+        if len(kept) == len(meshes):
+            return
+        for node in nodes:
+            if 'mesh' in node:
+                node['mesh'] = remap[node['mesh']]
+        self.gltf['meshes'] = kept
+
+    def _write_gpu_instances(self):
+        for node_index, instances in self._gpu_nodes.items():
+            translations, rotations, scales = (np.array(values, dtype=np.float32) for values in zip(*instances))
+            self.gltf['nodes'][node_index]['extensions'] = {
+                INSTANCING_EXTENSION: {
+                    'attributes': {
+                        'TRANSLATION': self.builder.add_accessor(translations),
+                        'ROTATION': self.builder.add_accessor(rotations),
+                        'SCALE': self.builder.add_accessor(scales),
+                    }
+                }
+            }
+        if self._gpu_nodes:
+            # No per-node fallback is written, so viewers must support it
+            self.builder.use_extension(INSTANCING_EXTENSION, required=True)
+
+    # -- mesh compaction -----------------------------------------------------
+
+    def _optimize_mesh(self, index, mesh, quantize):
+        primitives = mesh['primitives']
+        rewritable = [self._is_rewritable(primitive) for primitive in primitives]
+        # The dequantization transform applies to the whole mesh
+        quantize = quantize and all(rewritable)
+
+        loaded = []
+        for primitive, ok in zip(primitives, rewritable):
+            if ok:
+                loaded.append(self._load_primitive(primitive))
+            else:
+                self._copy_primitive(primitive)
+                loaded.append(None)
+
+        origin = scale = None
+        if quantize and loaded:
+            positions = np.vstack([attributes['POSITION'] for attributes, _ in loaded])
+            origin = positions.min(axis=0).astype(np.float64)
+            extent = float((positions.max(axis=0) - origin).max())
+            # Uniform scale, so the dequantization node does not skew normals
+            scale = extent if extent > 0 else 1.0
+            self._dequantize[index] = (origin, scale)
+            self.stats['quantized_meshes'] += 1
+
+        for primitive, data in zip(primitives, loaded):
+            if data is not None:
+                self._write_primitive(primitive, *data, origin=origin, scale=scale)
+
+    def _load_primitive(self, primitive):
+        attributes = {
+            name: accessor_array(self.source, self.binary, accessor)
+            for name, accessor in primitive['attributes'].items()
+        }
+        count = len(attributes['POSITION'])
+        if 'indices' in primitive:
+            indices = accessor_array(self.source, self.binary, primitive['indices']).reshape(-1).astype(np.uint32)
+        else:
+            indices = np.arange(count, dtype=np.uint32)
+        self.stats['vertices_before'] += count
+
+        attributes, indices = weld(attributes, indices)
+        triangles = indices[:len(indices) - len(indices) % 3].reshape(-1, 3)
+        if self.reorder and 0 < len(triangles) <= MAX_REORDER_TRIANGLES:
+            triangles = tipsify(triangles, len(attributes['POSITION']))
+        attributes, indices = reorder_vertices(attributes, triangles.reshape(-1))
+
+        self.stats['vertices_after'] += len(attributes['POSITION'])
+        return attributes, indices
+
+    def _write_primitive(self, primitive, attributes, indices, origin=None, scale=None):
+        primitive['indices'] = self.builder.add_indices(indices)
+        for name, array in attributes.items():
+            source = self.source['accessors'][primitive['attributes'][name]]
+            normalized = source.get('normalized', False)
+            primitive['attributes'][name] = self._write_attribute(name, array, normalized, origin, scale)
+
+    def _write_attribute(self, name, array, normalized, origin, scale):
+        source_float = array.dtype == np.float32
+        if name == 'POSITION':
+            if origin is not None:
+                levels = np.iinfo(np.uint16).max
+                quantized = np.round((array - origin) / scale * levels)
+                array = np.clip(quantized, 0, levels).astype(np.uint16)
+                return self.builder.add_accessor(array, target=ARRAY_BUFFER, normalized=True, minmax=True)
+            return self.builder.add_accessor(array, target=ARRAY_BUFFER, minmax=True)
+
+        if self.quantize and source_float:
+            if name in ('NORMAL', 'TANGENT'):
+                return self.builder.add_accessor(quantize_unit(array, np.int8), target=ARRAY_BUFFER, normalized=True)
+            if name.startswith('TEXCOORD_') and array.size and array.min() >= 0.0 and array.max() <= 1.0:
+                levels = np.iinfo(np.uint16).max
+                array = np.round(array * levels).astype(np.uint16)
+                return self.builder.add_accessor(array, target=ARRAY_BUFFER, normalized=True)
+
+        return self.builder.add_accessor(array, target=ARRAY_BUFFER, normalized=normalized)
+
+    def _attach_dequantization(self):
+        """Move quantized meshes onto child nodes carrying the dequantization transform"""
+        nodes = self.gltf.get('nodes', [])
+        for node_index in range(len(nodes)):
+            node = nodes[node_index]
+            mesh = node.get('mesh')
+            if mesh not in self._dequantize:
+                continue
+            origin, scale = self._dequantize[mesh]
+            dequantize = affine_matrix([scale] * 3, origin)
+            if node_index in self._instance_nodes:
+                # Our own placement node: fold the dequantization into it
+                node['matrix'] = gltf_matrix(node_matrix(node) @ dequantize)
+                continue
+            del node['mesh']
+            self.builder.add_node({'mesh': mesh, 'matrix': gltf_matrix(dequantize)}, parent=node_index)
+
+
+def optimize_glb(path, quantize=True, reorder=True, instancing='nodes'):
+    """Compact a GLB in place; returns size and vertex stats"""
+    size_before = os.path.getsize(path)
+    gltf, binary = read_glb(path)
+    optimizer = GlbOptimizer(gltf, binary, quantize=quantize, reorder=reorder, instancing=instancing)
+    gltf, binary = optimizer.run()
+
+    temp_path = path + '.optimized'
+    size_after = write_glb(temp_path, gltf, binary)
+    if size_after < size_before:
+        os.replace(temp_path, path)
+    else:
+        # Nothing to gain (e.g. already compact); keep the original bytes
+        os.remove(temp_path)
+        size_after = size_before
+    return dict(optimizer.stats, size_before=size_before, size_after=size_after)
@@ -26,7 +26,7 @@ sudo apt install -y python3 python3-pip python3-venv unzip awscli blender
 
 # Install Python packages
 echo "📦 Step 3: Installing Python packages..."
-pip3 install boto3 --user
+pip3 install boto3 numpy --user
 
 # Create working directory
 echo "📁 Step 4: Creating working directory..."
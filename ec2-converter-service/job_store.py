@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+
+"""
+Job state store
+Embedded SQLite (WAL) table of conversion jobs keyed by (key, ETag, size).
+Replaces processed.txt: lookups are indexed, so startup time and memory do
+not grow with the length of the history, and a re-uploaded key with new
+content is converted again. Keys imported from processed.txt carry no ETag;
+they are 'legacy' rows until a listing sees the key, and are then either
+adopted for the listed ETag (when the GLB is still there) or converted.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    key TEXT NOT NULL,
+    etag TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    output_key TEXT,
+    output_etag TEXT,
+    queued_at REAL,
+    started_at REAL,
+    finished_at REAL,
+    download_time REAL,
+    convert_time REAL,
+    upload_time REAL,
+    PRIMARY KEY (key, etag, size)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, finished_at);
+'''
+
+# Identity used for rows imported from processed.txt, and for jobs with no known ETag
+LEGACY_ETAG = ''
+LEGACY_SIZE = -1
+LEGACY_STATUS = 'legacy'
+
+# SQLite limits the number of bound parameters per statement
+LOOKUP_CHUNK = 500
+
+
+def normalize_etag(etag):
+    """ETags come quoted from LIST/HEAD and unquoted from S3 events"""
+    return (etag or '').strip('"')
+
+
+def job_identity(key, etag=None, size=None):
+    return (key, normalize_etag(etag), size if size is not None else LEGACY_SIZE)
+
+
+class JobStore:
+    """Thread-safe SQLite job table"""
+
+    def __init__(self, db_path, max_attempts=3):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=FULL')
+        self._conn.executescript(SCHEMA)
+        self._conn.execute(
+            "UPDATE jobs SET status = ? WHERE etag = ? AND size = ? AND status = 'succeeded' AND output_key IS NULL",
+            (LEGACY_STATUS, LEGACY_ETAG, LEGACY_SIZE)
+        )  # Imports from before the 'legacy' status
+        self._recover_interrupted()
+
+    def _recover_interrupted(self):
+        """Jobs left 'running' by a crash are failed attempts, eligible for retry"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'interrupted', finished_at = ? "
+                "WHERE status = 'running'",
+                (time.time(),)
+            )
+        if cursor.rowcount:
+            logger.warning(f"⚠️  {cursor.rowcount} job(s) were interrupted by a restart")
+
+    def import_legacy_log(self, path):
+        """One-time import of processed.txt as key-only 'legacy' rows"""
+        if not os.path.exists(path):
+            return 0
+
+        count = 0
+        batch = []
+        now = time.time()
+        with open(path, 'r') as f:
+            for line in f:
+                key = line.strip()
+                if not key:
+                    continue
+                batch.append((key, LEGACY_ETAG, LEGACY_SIZE, LEGACY_STATUS, 1, now))
+                if len(batch) >= 10000:
+                    count += self._insert_legacy(batch)
+                    batch = []
+        count += self._insert_legacy(batch)
+
+        os.replace(path, path + '.migrated')
+        logger.info(f"📝 Imported {count} processed file(s) from {path}")
+        return count
+
+    def _insert_legacy(self, rows):
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO jobs (key, etag, size, status, attempts, finished_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            self._conn.execute('COMMIT')
+        return len(rows)
+
+    def _rows_for_keys(self, keys):
+        rows = {}
+        keys = list(keys)
+        for i in range(0, len(keys), LOOKUP_CHUNK):
+            chunk = keys[i:i + LOOKUP_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            with self._lock:
+                cursor = self._conn.execute(
+                    f'SELECT key, etag, size, status, attempts FROM jobs WHERE key IN ({placeholders})',
+                    chunk
+                )
+                for key, etag, size, status, attempts in cursor:
+                    rows.setdefault(key, []).append((etag, size, status, attempts))
+        return rows
+
+    def filter_new(self, objects, legacy_check=None):
+        """Objects (S3 listing dicts) that still need converting
+
+        A key with a 'legacy' row is checked once with legacy_check(obj):
+        when it returns True the row is replaced by a 'succeeded' row for the
+        listed ETag and size, otherwise the legacy row is dropped and the
+        object converted. Without legacy_check legacy rows are left alone and
+        their objects converted.
+        """
+        rows = self._rows_for_keys({obj['Key'] for obj in objects})
+        pending = []
+        adopted = []
+        checked = set()
+        for obj in objects:
+            key, etag, size = job_identity(obj['Key'], obj.get('ETag'), obj.get('Size'))
+            done = False
+            seen = False
+            legacy = False
+            for row_etag, row_size, status, attempts in rows.get(key, []):
+                if status == LEGACY_STATUS:
+                    legacy = True
+                    continue
+                if row_etag != etag or row_size != size:
+                    continue
+                seen = True
+                if status == 'succeeded' or status == 'running' or attempts >= self.max_attempts:
+                    done = True
+                    break
+            if legacy and legacy_check is not None and key not in checked:
+                checked.add(key)
+                if not seen and legacy_check(obj):
+                    adopted.append((key, etag, size))
+                    done = True
+            if not done:
+                pending.append(obj)
+        if checked:
+            self._resolve_legacy(checked, adopted)
+        return pending
+
+    def _resolve_legacy(self, keys, adopted):
+        """Replace the checked keys' legacy rows with 'succeeded' rows for the adopted identities"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._conn.executemany(
+                'DELETE FROM jobs WHERE key = ? AND status = ?',
+                [(key, LEGACY_STATUS) for key in keys]
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO jobs (key, etag, size, status, attempts, finished_at) "
+                "VALUES (?, ?, ?, 'succeeded', 1, ?)",
+                [identity + (now,) for identity in adopted]
+            )
+            self._conn.execute('COMMIT')
+        if adopted:
+            logger.info(f"📝 Adopted {len(adopted)} legacy job(s) with their current ETag")
+
+    def is_done(self, key, etag=None, size=None, legacy_check=None):
+        return not self.filter_new([{'Key': key, 'ETag': etag, 'Size': size}], legacy_check=legacy_check)
+
+    def start(self, key, etag=None, size=None):
+        """Mark a job running and count the attempt; returns the attempt number"""
+        identity = job_identity(key, etag, size)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (key, etag, size, status, attempts, queued_at, started_at) "
+                "VALUES (?, ?, ?, 'running', 1, ?, ?) "
+                "ON CONFLICT (key, etag, size) DO UPDATE SET "
+                "status = 'running', attempts = attempts + 1, error = NULL, started_at = excluded.started_at",
+                identity + (now, now)
+            )
+            row = self._conn.execute(
+                'SELECT attempts FROM jobs WHERE key = ? AND etag = ? AND size = ?',
+                identity
+            ).fetchone()
+        return row[0] if row else 1
+
+    def finish(self, key, etag=None, size=None, success=True, error=None, output_key=None,
+               output_etag=None, timings=None):
+        """Record the outcome and per-stage timings of a job"""
+        timings = timings or {}
+        identity = job_identity(key, etag, size)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (key, etag, size, status, attempts) VALUES (?, ?, ?, 'running', 1) "
+                "ON CONFLICT (key, etag, size) DO NOTHING",
+                identity
+            )
+            self._conn.execute(
+                'UPDATE jobs SET status = ?, error = ?, output_key = ?, output_etag = ?, finished_at = ?, '
+                'download_time = ?, convert_time = ?, upload_time = ? '
+                'WHERE key = ? AND etag = ? AND size = ?',
+                (
+                    'succeeded' if success else 'failed',
+                    error,
+                    output_key,
+                    normalize_etag(output_etag) or None,
+                    time.time(),
+                    timings.get('download'),
+                    timings.get('convert'),
+                    timings.get('upload'),
+                ) + identity
+            )
+
+    def counts(self):
+        """Number of jobs per status"""
+        with self._lock:
+            return dict(self._conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status'))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
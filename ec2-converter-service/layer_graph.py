@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+"""
+USDZ layer dependency graph
+Finds the root layer of a USDZ (its first entry, per the USDZ spec) and walks
+the `references`/`payload`/`subLayers` asset paths from there, so converters
+only load and extract the layers the scene actually uses.
+"""
+
+import re
+import posixpath
+import logging
+from collections import deque
+
+from usdz_reader import UsdzError, USD_LAYER_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+USDC_MAGIC = b'PXR-USDC'
+
+# Strings and comments are matched first so '@' inside them is not an asset path
+ASSET_RE = re.compile(r'''
+    """(?:.|\n)*?""" | \'\'\'(?:.|\n)*?\'\'\'
+  | "(?:[^"\\\n]|\\.)*" | '(?:[^'\\\n]|\\.)*'
+  | \#[^\n]*
+  | @@@(?P<asset3>.*?)@@@
+  | @(?P<asset>[^@\n]*)@
+''', re.VERBOSE)
+DEFAULT_PRIM_RE = re.compile(r'''\bdefaultPrim\s*=\s*["']([^"'\n]*)["']''')
+
+# Layer metadata lives in the parenthesized block before the first prim
+HEADER_SCAN_BYTES = 64 * 1024
+
+
+def resolve_asset(asset, anchor_layer):
+    """Archive entry name for an asset path authored in anchor_layer"""
+    path = str(asset)
+    if path.startswith('/'):
+        return path.lstrip('/')
+    return posixpath.normpath(posixpath.join(posixpath.dirname(anchor_layer), path))
+
+
+def is_layer(name):
+    return name.lower().endswith(USD_LAYER_EXTENSIONS)
+
+
+def scan_layer(text):
+    """(defaultPrim, asset paths) of a USDA layer, without a full parse"""
+    match = DEFAULT_PRIM_RE.search(text, 0, HEADER_SCAN_BYTES)
+    default_prim = match.group(1) if match else None
+    assets = []
+    for match in ASSET_RE.finditer(text):
+        asset = match.group('asset') or match.group('asset3')
+        if asset and asset not in assets:
+            assets.append(asset)
+    return default_prim, assets
+
+
+class LayerGraph:
+    """Dependency graph of the layers reachable from a USDZ's root layer"""
+
+    def __init__(self, archive, root=None):
+        self.archive = archive
+        layers = archive.layer_names()
+        if not layers:
+            raise UsdzError(f"{archive.path}: no USD layer in archive")
+
+        self.edges = {}
+        self.resources = {}
+        self.default_prims = {}
+        self.missing = []
+        self.opaque = set()
+
+        self.root = root or self._find_root(layers)
+        self.reachable = self._walk(self.root)
+
+    @property
+    def default_prim(self):
+        return self.default_prims.get(self.root)
+
+    def _scan(self, name):
+        """Record the outgoing edges of one layer (once)"""
+        if name in self.edges:
+            return self.edges[name]
+        view = self.archive.view(name)
+        if bytes(view[:8]) == USDC_MAGIC:
+            # Crate files keep asset paths in compressed token tables
+            self.opaque.add(name)
+            self.edges[name] = []
+            self.resources[name] = []
+            return []
+
+        default_prim, assets = scan_layer(str(view, 'utf-8', errors='replace'))
+        self.default_prims[name] = default_prim
+        layers = []
+        resources = []
+        for asset in assets:
+            target = resolve_asset(asset, name)
+            if target not in self.archive:
+                self.missing.append((name, asset))
+            elif is_layer(target):
+                layers.append(target)
+            else:
+                resources.append(target)
+        self.edges[name] = layers
+        self.resources[name] = resources
+        return layers
+
+    def _walk(self, root):
+        order = []
+        seen = {root}
+        pending = deque([root])
+        while pending:
+            name = pending.popleft()
+            order.append(name)
+            for dependency in self._scan(name):
+                if dependency not in seen:
+                    seen.add(dependency)
+                    pending.append(dependency)
+        return order
+
+    def _find_root(self, layers):
+        """The first archive entry; otherwise the best unreferenced layer"""
+        first = self.archive.names()[0]
+        if is_layer(first):
+            return first
+
+        logger.warning(f"⚠️  First USDZ entry {first} is not a layer - searching for the root")
+        referenced = set()
+        for name in layers:
+            referenced.update(self._scan(name))
+        candidates = [name for name in layers if name not in referenced] or layers
+        # Prefer layers with a defaultPrim, then the shallowest, then archive order
+        return min(
+            candidates,
+            key=lambda name: (self.default_prims.get(name) is None, name.count('/'), layers.index(name))
+        )
+
+    def files(self):
+        """Entries a backend needs on disk: reachable layers plus the assets they use"""
+        if self.opaque:
+            # Dependencies of a usdc layer are unknown, so keep everything
+            return self.archive.names()
+        files = list(self.reachable)
+        for name in self.reachable:
+            for resource in self.resources[name]:
+                if resource not in files:
+                    files.append(resource)
+        return files
+
+    def sizes(self):
+        """Bytes per reachable layer"""
+        return {name: self.archive.size(name) for name in self.reachable}
+
+    def unreferenced(self):
+        return [name for name in self.archive.layer_names() if name not in self.reachable]
+
+    def summary(self):
+        return {
+            'root': self.root,
+            'default_prim': self.default_prim,
+            'layers': len(self.reachable),
+            'layer_bytes': sum(self.sizes().values()),
+            'unreferenced': len(self.unreferenced()),
+            'missing': len(self.missing),
+            'opaque': len(self.opaque),
+        }
+
+
+def analyze_usdz(archive):
+    """LayerGraph of an open UsdzArchive"""
+    graph = LayerGraph(archive)
+    if graph.default_prim is None and graph.root not in graph.opaque:
+        logger.warning(f"⚠️  Root layer {graph.root} has no defaultPrim")
+    for layer, asset in graph.missing:
+        logger.warning(f"⚠️  {layer} references missing asset @{asset}@")
+    return graph
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+
+"""
+Memory limits and admission control for Blender workers
+Every worker runs under a hard memory limit so one huge USD import fails on
+its own instead of driving the instance into the kernel OOM killer (which may
+pick the service itself). The limit is a cgroup v2 memory.max, which needs a
+delegated cgroup (systemd Delegate=yes). RLIMIT_AS caps virtual memory, not
+what a worker uses, so it is only applied when asked for.
+MemoryGate admits a job only while its estimated memory fits in what the
+machine has available, so concurrency follows memory rather than a constant.
+"""
+
+import os
+import time
+import threading
+import logging
+
+from blender_pool import read_rss_mb
+
+try:
+    import resource
+except ImportError:  # Not on Linux
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+# RLIMIT_AS caps virtual size, which for Blender runs well above RSS
+# (mapped libraries, thread stacks, allocator arenas)
+RLIMIT_AS_HEADROOM_MB = 4096
+
+
+def read_meminfo_mb(field):
+    """A /proc/meminfo field in MB, or None"""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def total_memory_mb():
+    return read_meminfo_mb('MemTotal')
+
+
+def available_memory_mb():
+    return read_meminfo_mb('MemAvailable')
+
+
+def _write(path, value):
+    with open(path, 'w') as f:
+        f.write(str(value))
+
+
+class CgroupHandle:
+    """A worker's own cgroup; removed once the worker has exited"""
+
+    def __init__(self, path, limit_mb):
+        self.path = path
+        self.limit_mb = limit_mb
+
+    def oom_kills(self):
+        try:
+            with open(os.path.join(self.path, 'memory.events'), 'r') as f:
+                for line in f:
+                    name, value = line.split()
+                    if name == 'oom_kill':
+                        return int(value)
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def release(self):
+        try:
+            os.rmdir(self.path)
+        except OSError:
+            pass
+
+
+class RlimitHandle:
+    """RLIMIT_AS set on a worker; allocation failures surface as errors in Blender"""
+
+    def __init__(self, limit_mb):
+        self.limit_mb = limit_mb
+
+    def oom_kills(self):
+        return None
+
+    def release(self):
+        pass
+
+
+class MemoryLimiter:
+    """Applies a hard memory limit to each worker process
+
+    mode: 'cgroup', 'rlimit', 'auto' (cgroup when delegated, else rlimit) or None
+    """
+
+    def __init__(self, limit_mb, mode='cgroup'):
+        self.limit_mb = limit_mb
+        self.cgroup = None
+        self.mode = None
+        self.fallback = mode == 'auto'
+        if not limit_mb or mode is None:
+            return
+        if mode in ('auto', 'cgroup'):
+            self.cgroup = self._setup_cgroup()
+            if self.cgroup:
+                self.mode = 'cgroup'
+            elif mode == 'cgroup':
+                logger.warning("⚠️  No writable cgroup v2 with the memory controller - "
+                               "Blender workers run without a memory limit")
+        if self.mode is None and mode in ('auto', 'rlimit') and resource is not None:
+            self.mode = 'rlimit'
+
+    def _setup_cgroup(self):
+        """Own cgroup with the memory controller enabled for per-worker children
+
+        cgroup v2 only allows controllers for children of a group without
+        processes, so the service moves itself into a 'service' leaf first.
+        """
+        try:
+            with open('/proc/self/cgroup', 'r') as f:
+                relative = next(line.strip()[3:] for line in f if line.startswith('0::'))
+        except (OSError, StopIteration):
+            return None
+        path = os.path.join(CGROUP_ROOT, relative.lstrip('/'))
+        try:
+            with open(os.path.join(path, 'cgroup.controllers'), 'r') as f:
+                if 'memory' not in f.read().split():
+                    return None
+            if not os.access(path, os.W_OK):
+                return None
+            leaf = os.path.join(path, 'service')
+            os.makedirs(leaf, exist_ok=True)
+            _write(os.path.join(leaf, 'cgroup.procs'), os.getpid())
+            _write(os.path.join(path, 'cgroup.subtree_control'), '+memory')
+        except OSError as e:
+            logger.debug(f"cgroup setup failed: {e}")
+            return None
+        return path
+
+    def apply(self, pid, name):
+        """Limit a freshly started worker; returns a handle (or None if unlimited)"""
+        if self.mode == 'cgroup':
+            group = os.path.join(self.cgroup, name)
+            try:
+                os.makedirs(group, exist_ok=True)
+                _write(os.path.join(group, 'memory.max'), int(self.limit_mb * 1024 * 1024))
+                try:
+                    _write(os.path.join(group, 'memory.swap.max'), 0)
+                except OSError:
+                    pass  # No swap accounting
+                _write(os.path.join(group, 'cgroup.procs'), pid)
+                return CgroupHandle(group, self.limit_mb)
+            except OSError as e:
+                logger.warning(f"⚠️  Could not put worker {pid} in cgroup {group}: {e}")
+                if not self.fallback:
+                    return None
+        if self.mode in ('cgroup', 'rlimit') and resource is not None:
+            limit = int((self.limit_mb + RLIMIT_AS_HEADROOM_MB) * 1024 * 1024)
+            try:
+                resource.prlimit(pid, resource.RLIMIT_AS, (limit, limit))
+                return RlimitHandle(self.limit_mb)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️  Could not set RLIMIT_AS on worker {pid}: {e}")
+        return None
+
+    def describe(self):
+        if self.mode is None:
+            return "no limit"
+        if self.mode == 'cgroup':
+            return f"{self.limit_mb:.0f} MB per worker (cgroup memory.max)"
+        return f"{self.limit_mb:.0f} MB per worker (RLIMIT_AS + {RLIMIT_AS_HEADROOM_MB} MB virtual headroom)"
+
+
+class MemoryGate:
+    """Admits jobs while their estimated memory fits in MemAvailable
+
+    Admitted jobs that have not grown to their estimate yet still hold the
+    rest of it, so two jobs admitted back to back cannot both count on the
+    same free memory. A job is always admitted when nothing else runs.
+    """
+
+    def __init__(self, reserve_mb=256, poll_interval=2.0):
+        self.reserve_mb = reserve_mb
+        self.poll_interval = poll_interval
+        self._tickets = {}
+        self._next = 0
+        self._condition = threading.Condition()
+
+    def _outstanding(self):
+        outstanding = 0.0
+        for estimate, pid, base in self._tickets.values():
+            rss = read_rss_mb(pid) if pid else None
+            grown = max(0.0, rss - base) if rss is not None and base is not None else 0.0
+            outstanding += max(0.0, estimate - grown)
+        return outstanding
+
+    def _fits(self, estimate_mb):
+        if not self._tickets:
+            return True
+        available = available_memory_mb()
+        if available is None:
+            return True
+        return available - self._outstanding() - self.reserve_mb >= estimate_mb
+
+    def admit(self, estimate_mb, pid=None):
+        """Block until the job fits; returns a ticket for release()"""
+        waited_since = None
+        with self._condition:
+            while not self._fits(estimate_mb):
+                if waited_since is None:
+                    waited_since = time.time()
+                    logger.info(f"⏳ Waiting for memory: job needs ~{estimate_mb:.0f} MB, "
+                                f"{available_memory_mb() or 0:.0f} MB available, "
+                                f"{self._outstanding():.0f} MB reserved by {len(self._tickets)} running job(s)")
+                self._condition.wait(self.poll_interval)
+            self._next += 1
+            ticket = self._next
+            self._tickets[ticket] = (estimate_mb, pid, read_rss_mb(pid) if pid else None)
+        if waited_since is not None:
+            logger.info(f"▶️  Admitted after waiting {time.time() - waited_since:.1f}s for memory")
+        return ticket
+
+    def release(self, ticket):
+        with self._condition:
+            self._tickets.pop(ticket, None)
+            self._condition.notify_all()
+
+    def running(self):
+        with self._condition:
+            return len(self._tickets)
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+
+"""
+Prometheus metrics
+Thread-safe counters, gauges and histograms rendered in the Prometheus text
+exposition format, served on /metrics by a small embedded HTTP server.
+Standard library only, so the service needs no extra package to be scraped.
+"""
+
+import math
+import threading
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; covers sub-second native conversions up to the 30 minute timeout
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for name, labels, value in self._samples():
+            lines.append(f'{name}{labels} {_format_value(value)}')
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing value, e.g. bytes transferred"""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        if not values and not self.label_names:
+            values = [((), 0)]
+        return [(self.name, _format_labels(self.label_names, key), value) for key, value in values]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. jobs in flight
+
+    With `callback`, the value is read at scrape time instead: it returns a
+    number, or a {label value: number} dict for a single-label gauge.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels=(), callback=None):
+        super().__init__(name, documentation, labels)
+        self.callback = callback
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        if self.callback is not None:
+            value = self.callback()
+            if isinstance(value, dict):
+                values = sorted(((str(label),), number) for label, number in value.items())
+            else:
+                values = [((), value)]
+        else:
+            with self._lock:
+                values = sorted(self._values.items())
+            if not values and not self.label_names:
+                values = [((), 0)]
+        return [(self.name, _format_labels(self.label_names, key), value) for key, value in values]
+
+
+class Histogram(_Metric):
+    """Distribution of observations (e.g. latencies) in cumulative buckets"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][index] += 1
+                    break
+            state['sum'] += value
+
+    def count(self, **labels):
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return sum(state['counts']) if state else 0
+
+    def _samples(self):
+        with self._lock:
+            values = sorted((key, {'counts': list(state['counts']), 'sum': state['sum']})
+                            for key, state in self._values.items())
+        samples = []
+        for key, state in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state['counts']):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, [('le', _format_value(float(bound)))])
+                samples.append((f'{self.name}_bucket', labels, cumulative))
+            labels = _format_labels(self.label_names, key)
+            samples.append((f'{self.name}_sum', labels, state['sum']))
+            samples.append((f'{self.name}_count', labels, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together on /metrics"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=(), callback=None):
+        return self._register(Gauge(name, documentation, labels, callback))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # One broken callback must not take the whole endpoint down
+                logger.warning(f"⚠️  Could not collect {metric.name}: {e}")
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """Serves a registry on http://host:port/metrics from a daemon thread"""
+
+    def __init__(self, registry, host='0.0.0.0', port=9108):
+        self.registry = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.split('?', 1)[0] != '/metrics':
+                    handler.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                handler.send_response(200)
+                handler.send_header('Content-Type', CONTENT_TYPE)
+                handler.send_header('Content-Length', str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format, *args):
+                # Scrapes every few seconds would drown the service log
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name='metrics', daemon=True)
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+"""
+Staged job pipeline
+Runs jobs through a chain of stages (e.g. download -> convert -> upload),
+each with its own worker threads, connected by bounded queues so a slow
+stage applies backpressure instead of letting work pile up in memory
+"""
+
+import queue
+import threading
+import logging
+import traceback
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class Stage:
+    """One pipeline step: `handler(job)` returns True to pass the job on"""
+
+    def __init__(self, name, handler, workers=1, queue_size=1):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+
+
+class StagedPipeline:
+    """Chain of stages; every job ends in exactly one on_complete(job, success) call"""
+
+    def __init__(self, stages, on_complete):
+        self.stages = stages
+        self.on_complete = on_complete
+
+    def queue_depths(self):
+        """Current number of jobs waiting in front of each stage"""
+        return {stage.name: stage.queue.qsize() for stage in self.stages}
+
+    def _complete(self, job, success):
+        try:
+            self.on_complete(job, success)
+        except Exception as e:
+            logger.error(f"❌ Completion handler failed: {e}")
+            logger.error(traceback.format_exc())
+
+    def _work(self, index):
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+
+        while True:
+            job = stage.queue.get()
+            if job is _STOP:
+                break
+
+            try:
+                ok = stage.handler(job)
+            except Exception as e:
+                logger.error(f"❌ Stage '{stage.name}' failed: {e}")
+                logger.error(traceback.format_exc())
+                ok = False
+
+            if not ok:
+                self._complete(job, False)
+            elif next_stage is None:
+                self._complete(job, True)
+            else:
+                # Blocks while the next stage is full (backpressure)
+                next_stage.queue.put(job)
+
+    def run(self, jobs):
+        """Feed jobs into the first stage and block until all of them completed"""
+        groups = []
+        for index, stage in enumerate(self.stages):
+            threads = [
+                threading.Thread(
+                    target=self._work,
+                    args=(index,),
+                    name=f"{stage.name}-{n}",
+                    daemon=True
+                )
+                for n in range(stage.workers)
+            ]
+            for thread in threads:
+                thread.start()
+            groups.append(threads)
+
+        first = self.stages[0].queue
+        for job in jobs:
+            first.put(job)
+
+        # Drain stage by stage so every job has moved on before the next one stops
+        for stage, threads in zip(self.stages, groups):
+            for _ in threads:
+                stage.queue.put(_STOP)
+            for thread in threads:
+                thread.join()
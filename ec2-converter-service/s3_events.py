@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+
+"""
+S3 event ingestion
+Consumes S3 ObjectCreated notifications from an SQS queue (or any client with
+the same receive_message/delete_message interface) so new uploads are picked
+up as soon as they land instead of on the next LIST poll. Messages whose
+files are still converting are kept invisible with ChangeMessageVisibility,
+so SQS does not redeliver them mid-job.
+"""
+
+import json
+import time
+import uuid
+import threading
+import logging
+from urllib.parse import unquote_plus
+
+logger = logging.getLogger(__name__)
+
+
+def parse_s3_records(event):
+    """Extract (bucket, key, size, etag) of created objects from an S3 event
+
+    Accepts the same record shape lambda_handler receives, either directly or
+    wrapped in an SNS notification envelope.
+    """
+    if 'Message' in event and 'Records' not in event:
+        # S3 -> SNS -> SQS fan-out
+        try:
+            event = json.loads(event['Message'])
+        except (TypeError, ValueError):
+            return []
+
+    objects = []
+    for record in event.get('Records', []):
+        if not record.get('eventName', 'ObjectCreated').startswith('ObjectCreated'):
+            continue
+        s3 = record.get('s3', {})
+        try:
+            bucket = s3['bucket']['name']
+            # Keys in notifications are URL-encoded
+            key = unquote_plus(s3['object']['key']).strip()
+        except KeyError:
+            continue
+        objects.append({
+            'Bucket': bucket,
+            'Key': key,
+            'Size': s3['object'].get('size'),
+            'ETag': s3['object'].get('eTag'),
+        })
+    return objects
+
+
+class SQSEventSource:
+    """Long-polls an SQS queue for S3 notifications"""
+
+    def __init__(self, sqs_client, queue_url, wait_time=20, max_messages=10, visibility_timeout=None):
+        self.sqs_client = sqs_client
+        self.queue_url = queue_url
+        self.wait_time = wait_time
+        self.max_messages = max_messages
+        self.visibility_timeout = visibility_timeout
+
+    def poll(self):
+        """Wait for messages; returns (objects, receipt_handles)
+
+        Each object carries the 'ReceiptHandle' of the message announcing it,
+        so it can be acknowledged once that object is handled.
+        """
+        params = {
+            'QueueUrl': self.queue_url,
+            'MaxNumberOfMessages': self.max_messages,
+            'WaitTimeSeconds': self.wait_time,
+        }
+        if self.visibility_timeout:
+            params['VisibilityTimeout'] = self.visibility_timeout
+        response = self.sqs_client.receive_message(**params)
+
+        objects = []
+        handles = []
+        for message in response.get('Messages', []):
+            handles.append(message['ReceiptHandle'])
+            try:
+                body = json.loads(message['Body'])
+            except (TypeError, ValueError):
+                logger.warning(f"⚠️  Ignoring non-JSON message {message.get('MessageId')}")
+                continue
+            # s3:TestEvent and other non-record messages are simply acknowledged
+            for obj in parse_s3_records(body):
+                obj['ReceiptHandle'] = message['ReceiptHandle']
+                objects.append(obj)
+        return objects, handles
+
+    def ack(self, receipt_handles):
+        """Delete handled messages from the queue"""
+        for handle in receipt_handles:
+            try:
+                self.sqs_client.delete_message(QueueUrl=self.queue_url, ReceiptHandle=handle)
+            except Exception as e:
+                logger.warning(f"⚠️  Could not delete SQS message: {e}")
+
+    def extend(self, receipt_handles, timeout):
+        """Keep messages invisible for another timeout seconds; returns the handles that failed
+
+        A handle fails once its message has been redelivered (or deleted):
+        it can no longer be extended or acknowledged.
+        """
+        failed = []
+        for handle in receipt_handles:
+            try:
+                self.sqs_client.change_message_visibility(
+                    QueueUrl=self.queue_url, ReceiptHandle=handle, VisibilityTimeout=timeout
+                )
+            except Exception as e:
+                logger.warning(f"⚠️  Could not extend SQS message visibility: {e}")
+                failed.append(handle)
+        return failed
+
+
+class LocalSQSClient:
+    """In-memory stand-in for the SQS client calls used by SQSEventSource
+
+    Received messages come back with a new receipt handle once their
+    visibility timeout expires, as on SQS; the old handle is then invalid.
+    """
+
+    def __init__(self, visibility_timeout=30, clock=time.monotonic):
+        self.visibility_timeout = visibility_timeout
+        self.clock = clock
+        self._messages = []
+        self._inflight = {}  # receipt handle -> (message, visible again at)
+        self._cond = threading.Condition()
+
+    def _requeue_expired(self):
+        now = self.clock()
+        for handle, (message, visible_at) in list(self._inflight.items()):
+            if visible_at <= now:
+                del self._inflight[handle]
+                self._messages.append(message)
+
+    def send_message(self, QueueUrl, MessageBody):
+        message_id = str(uuid.uuid4())
+        with self._cond:
+            self._messages.append({'MessageId': message_id, 'Body': MessageBody})
+            self._cond.notify_all()
+        return {'MessageId': message_id}
+
+    def receive_message(self, QueueUrl, MaxNumberOfMessages=1, WaitTimeSeconds=0, VisibilityTimeout=None, **kwargs):
+        if VisibilityTimeout is None:
+            VisibilityTimeout = self.visibility_timeout
+        with self._cond:
+            self._requeue_expired()
+            if not self._messages and WaitTimeSeconds:
+                self._cond.wait(timeout=WaitTimeSeconds)
+                self._requeue_expired()
+            batch = self._messages[:MaxNumberOfMessages]
+            del self._messages[:MaxNumberOfMessages]
+            messages = []
+            for message in batch:
+                handle = str(uuid.uuid4())
+                self._inflight[handle] = (message, self.clock() + VisibilityTimeout)
+                messages.append(dict(message, ReceiptHandle=handle))
+        return {'Messages': messages} if messages else {}
+
+    def change_message_visibility(self, QueueUrl, ReceiptHandle, VisibilityTimeout):
+        with self._cond:
+            self._requeue_expired()
+            if ReceiptHandle not in self._inflight:
+                raise ValueError(f"Message with receipt handle {ReceiptHandle} is not in flight")
+            message, _ = self._inflight[ReceiptHandle]
+            self._inflight[ReceiptHandle] = (message, self.clock() + VisibilityTimeout)
+        return {}
+
+    def delete_message(self, QueueUrl, ReceiptHandle):
+        with self._cond:
+            self._inflight.pop(ReceiptHandle, None)
+        return {}
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+"""
+Incremental S3 listing
+Paginates list_objects_v2 and keeps a persisted watermark: the newest
+object seen and its LastModified. Polls start listing after that object's
+key (StartAfter), so their cost does not grow with the bucket as long as new
+keys sort after older ones (RoomPlan's timestamped names do), and only return
+objects modified since the watermark (less an overlap window for clock skew
+and slow multipart uploads; the job store drops the repeats). A new key that
+sorts before the watermark is only seen by a full listing, which callers run
+periodically; list_after_last_key=False pages the whole prefix every poll
+instead. Optionally lists date-partitioned prefixes (e.g.
+staging/floor-plan/2025/12/16/), where StartAfter only applies inside the
+partition holding the watermark key.
+"""
+
+import os
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalLister:
+    """Lists new USDZ objects under a prefix using a persisted watermark"""
+
+    def __init__(self, s3_client, bucket, prefix, state_path, partition_format=None,
+                 partition_lookback_days=1, suffix='.usdz', list_after_last_key=True, overlap_seconds=300):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.state_path = state_path
+        self.partition_format = partition_format
+        self.partition_lookback_days = partition_lookback_days
+        self.suffix = suffix
+        self.list_after_last_key = list_after_last_key
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self.watermark = self._load()
+        self._pending = None
+
+    def _load(self):
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️  Ignoring unreadable listing watermark: {e}")
+        return {'start_after': None, 'last_modified': None}
+
+    def _save(self, watermark):
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(watermark, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+
+    def _paginate(self, prefix, start_after=None):
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        params = {'Bucket': self.bucket, 'Prefix': prefix}
+        if start_after and start_after.startswith(prefix):
+            params['StartAfter'] = start_after
+        for page in paginator.paginate(**params):
+            for obj in page.get('Contents', []):
+                if obj['Key'].lower().endswith(self.suffix):
+                    yield obj
+
+    def _partitions(self):
+        """Date partitions from the watermark day (minus lookback) through today"""
+        today = datetime.now(timezone.utc).date()
+        if self.watermark.get('last_modified'):
+            first = datetime.fromisoformat(self.watermark['last_modified']).date()
+        else:
+            first = today
+        day = first - timedelta(days=self.partition_lookback_days)
+        while day <= today:
+            yield self.prefix + day.strftime(self.partition_format)
+            day += timedelta(days=1)
+
+    def list_objects(self, full=False):
+        """New USDZ objects since the watermark, or everything when full=True"""
+        start_after = None
+        since = None
+        if not full:
+            if self.list_after_last_key:
+                start_after = self.watermark.get('start_after')
+            if self.watermark.get('last_modified'):
+                since = datetime.fromisoformat(self.watermark['last_modified']) - self.overlap
+
+        if self.partition_format and not full:
+            prefixes = list(self._partitions())
+        else:
+            prefixes = [self.prefix]
+
+        objects = []
+        for prefix in prefixes:
+            for obj in self._paginate(prefix, start_after):
+                if since is None or obj['LastModified'] >= since:
+                    objects.append(obj)
+
+        self._pending = self._advance(objects)
+        return objects
+
+    def _advance(self, objects):
+        """Watermark at the most recently modified object (the greatest key among ties)
+
+        Following the newest object rather than the greatest key means one
+        stray name sorting after the rest (e.g. a manual test upload) only
+        hides later uploads until the next full listing moves past it.
+        """
+        watermark = dict(self.watermark)
+        for obj in objects:
+            modified = obj['LastModified'].astimezone(timezone.utc).isoformat()
+            if (watermark['last_modified'] is None
+                    or (modified, obj['Key']) > (watermark['last_modified'], watermark['start_after'] or '')):
+                watermark['last_modified'] = modified
+                watermark['start_after'] = obj['Key']
+        return watermark
+
+    def commit(self):
+        """Persist the watermark once the listed objects have been handled"""
+        if self._pending and self._pending != self.watermark:
+            self._save(self._pending)
+            self.watermark = self._pending
+        self._pending = None
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+"""
+Size-aware job scheduling
+Orders S3 objects shortest-job-first by their listed Size, with aging so a
+large file cannot be overtaken forever: a file that has waited
+`aging_seconds` ranks as if it were half its size, twice that a third, etc.
+Also holds the queue of the large-file lane, which a background thread
+drains through its own capped pipeline.
+"""
+
+import time
+import threading
+
+
+class SizeScheduler:
+    """Shortest-job-first ordering with aging, plus a queue for deferred objects"""
+
+    def __init__(self, aging_seconds=600):
+        self.aging_seconds = aging_seconds
+        self._first_seen = {}
+        self._pending = {}
+        self._active = set()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+
+    def _score(self, obj, now):
+        size = obj.get('Size') or 0
+        waited = now - self._first_seen.get(obj['Key'], now)
+        if self.aging_seconds:
+            return size / (1 + waited / self.aging_seconds)
+        return size
+
+    def _see(self, objects, now):
+        for obj in objects:
+            self._first_seen.setdefault(obj['Key'], now)
+
+    def order(self, objects):
+        """Objects sorted by aged size, smallest first (stable for equal scores)"""
+        now = time.time()
+        with self._lock:
+            self._see(objects, now)
+            return sorted(objects, key=lambda obj: self._score(obj, now))
+
+    def push(self, objects):
+        """Queue objects for pop(); ones already queued or running are ignored"""
+        now = time.time()
+        added = 0
+        with self._lock:
+            self._see(objects, now)
+            for obj in objects:
+                key = obj['Key']
+                if key in self._pending or key in self._active:
+                    continue
+                self._pending[key] = obj
+                added += 1
+            if added:
+                self._ready.notify_all()
+        return added
+
+    def pop(self):
+        """Best queued object (now marked active), or None if the queue is empty"""
+        now = time.time()
+        with self._lock:
+            if not self._pending:
+                return None
+            key = min(self._pending, key=lambda k: self._score(self._pending[k], now))
+            self._active.add(key)
+            return self._pending.pop(key)
+
+    def wait(self, timeout=None):
+        """Block until something is queued; False on timeout"""
+        with self._lock:
+            return self._ready.wait_for(lambda: self._pending, timeout)
+
+    def discard(self, key):
+        """Forget a finished object"""
+        with self._lock:
+            self._active.discard(key)
+            if key not in self._pending:
+                self._first_seen.pop(key, None)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._pending or key in self._active
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def active(self):
+        with self._lock:
+            return len(self._active)
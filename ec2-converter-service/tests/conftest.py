@@ -0,0 +1,122 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+sys.path.insert(0, os.path.join(SERVICE_DIR, 'bench'))
+
+from glb import ARRAY_BUFFER, accessor_array  # noqa: E402
+from glb_optimize import node_matrix, quaternion_matrix  # noqa: E402
+
+NORMALIZED_SCALES = {np.dtype(np.int8): 127, np.dtype(np.uint8): 255,
+                     np.dtype(np.int16): 32767, np.dtype(np.uint16): 65535}
+
+
+def _positions(gltf, binary, index):
+    array = accessor_array(gltf, binary, index).astype(np.float64)
+    if gltf['accessors'][index].get('normalized'):
+        dtype = accessor_array(gltf, binary, index).dtype
+        array = np.maximum(array / NORMALIZED_SCALES[dtype], -1.0)
+    return array
+
+
+def _instances(gltf, binary, node):
+    """Instance matrices of an EXT_mesh_gpu_instancing node (identity otherwise)"""
+    instancing = node.get('extensions', {}).get('EXT_mesh_gpu_instancing')
+    if not instancing:
+        return [np.eye(4)]
+    attributes = instancing['attributes']
+    count = gltf['accessors'][next(iter(attributes.values()))]['count']
+    t = accessor_array(gltf, binary, attributes['TRANSLATION']) if 'TRANSLATION' in attributes else np.zeros((count, 3))
+    r = accessor_array(gltf, binary, attributes['ROTATION']) if 'ROTATION' in attributes else [[0, 0, 0, 1]] * count
+    s = accessor_array(gltf, binary, attributes['SCALE']) if 'SCALE' in attributes else np.ones((count, 3))
+    matrices = []
+    for i in range(count):
+        m = np.eye(4)
+        m[:3, :3] = quaternion_matrix(r[i]) * s[i]
+        m[:3, 3] = t[i]
+        matrices.append(m)
+    return matrices
+
+
+def world_triangles(gltf, binary):
+    """(n, 3, 3) world-space corners of every triangle in the default scene"""
+    triangles = []
+
+    def visit(index, parent):
+        node = gltf['nodes'][index]
+        world = parent @ node_matrix(node)
+        if 'mesh' in node:
+            for instance in _instances(gltf, binary, node):
+                for primitive in gltf['meshes'][node['mesh']]['primitives']:
+                    positions = _positions(gltf, binary, primitive['attributes']['POSITION'])
+                    if 'indices' in primitive:
+                        indices = accessor_array(gltf, binary, primitive['indices']).reshape(-1)
+                    else:
+                        indices = np.arange(len(positions))
+                    homogeneous = np.hstack([positions, np.ones((len(positions), 1))])
+                    placed = (homogeneous @ (world @ instance).T)[:, :3]
+                    triangles.append(placed[indices.reshape(-1, 3)])
+        for child in node.get('children', []):
+            visit(child, world)
+
+    for root in gltf['scenes'][gltf.get('scene', 0)]['nodes']:
+        visit(root, np.eye(4))
+    return np.concatenate(triangles) if triangles else np.zeros((0, 3, 3))
+
+
+def assert_same_surface(before, after, tolerance):
+    """Every triangle of before has one in after with the same corners and winding, and vice versa"""
+    assert len(before) == len(after)
+
+    def signature(triangles):
+        # Centroid plus the (unnormalized) normal, which flips with the winding
+        normal = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+        return np.hstack([triangles.mean(axis=1), normal])
+
+    a, b = signature(before), signature(after)
+    distance = np.abs(a[:, None, :] - b[None, :, :]).max(axis=2)
+    assert distance.min(axis=1).max() <= tolerance
+    assert distance.min(axis=0).max() <= tolerance
+
+
+BOX_CORNERS = np.array([[x, y, z] for x in (-0.5, 0.5) for y in (-0.5, 0.5) for z in (-0.5, 0.5)])
+BOX_TRIANGLES = np.array([
+    [0, 1, 3], [0, 3, 2], [4, 6, 7], [4, 7, 5], [0, 4, 5], [0, 5, 1],
+    [2, 3, 7], [2, 7, 6], [0, 2, 6], [0, 6, 4], [1, 5, 7], [1, 7, 3],
+])
+
+
+def add_box(builder, name, size=(1, 1, 1), translation=(0, 0, 0), parent=None, material=None):
+    """Node with its own box mesh of the given size, centred on translation"""
+    positions = (BOX_CORNERS * size).astype(np.float32)
+    primitive = {
+        'attributes': {'POSITION': builder.add_accessor(positions, target=ARRAY_BUFFER, minmax=True)},
+        'indices': builder.add_indices(BOX_TRIANGLES),
+        'mode': 4,
+    }
+    if material is not None:
+        primitive['material'] = material
+    mesh = builder.add('meshes', {'name': name, 'primitives': [primitive]})
+    node = {'name': name, 'mesh': mesh}
+    if any(translation):
+        node['translation'] = [float(v) for v in translation]
+    return builder.add_node(node, parent)
+
+
+@pytest.fixture
+def scan_glb(tmp_path):
+    """GLB of a small generated RoomPlan-style scan, converted natively"""
+    from generate_corpus import build_scan, write_usdz
+    from usda_native import convert_usdz_native
+    from usdz_reader import UsdzArchive
+
+    usdz_path = str(tmp_path / 'scan.usdz')
+    glb_path = str(tmp_path / 'scan.glb')
+    write_usdz(usdz_path, build_scan('scan', walls=4, objects=6, density=3, layers=1, seed=1))
+    with UsdzArchive(usdz_path) as archive:
+        convert_usdz_native(archive, glb_path, 'scan.usda')
+    return glb_path
@@ -0,0 +1,123 @@
+import os
+
+import pytest
+
+import backends
+from backends import BackendSelector, BlenderBackend, NativeBackend, file_features
+from generate_corpus import build_scan, write_usdz
+from layer_graph import LayerGraph
+from throughput_model import ThroughputModel
+from usdz_reader import UsdzArchive
+
+TEXT_SCAN = {'size': 2 * 1024 * 1024, 'layers': 10, 'usdc': False, 'textures': 0}
+TEXTURED_SCAN = dict(TEXT_SCAN, textures=3)
+
+
+class StubBackend(backends.ConversionBackend):
+    def __init__(self, name, ok=True):
+        self.name = name
+        self.ok = ok
+
+    def available(self):
+        return self.ok
+
+
+@pytest.fixture
+def model(tmp_path):
+    return ThroughputModel(str(tmp_path / 'jobs.db'), min_samples=5)
+
+
+def record(model, backend, seconds, runs=10, failures=0):
+    for i in range(runs):
+        size = (1 + i % 4) * 1024 * 1024
+        model.record(backend, size, 10, 100, seconds * (1 + i % 4) / 2, ok=i >= failures, usdc=False, textures=0)
+
+
+def test_native_only_takes_untextured_text_scans():
+    native = NativeBackend()
+    assert native.supports(TEXT_SCAN)
+    assert not native.supports(TEXTURED_SCAN)
+    assert not native.supports(dict(TEXT_SCAN, usdc=True))
+
+
+def test_configured_priority_until_measured(model):
+    selector = BackendSelector([StubBackend('native'), StubBackend('blender')], model, min_samples=5,
+                               exploration=0)
+    assert selector.order(TEXT_SCAN) == ['native', 'blender']
+
+
+def test_faster_backend_goes_first(model):
+    record(model, 'native', 10.0)
+    record(model, 'blender', 1.0)
+    selector = BackendSelector([StubBackend('native'), StubBackend('blender')], model, min_samples=5,
+                               exploration=0)
+    assert selector.order(TEXT_SCAN) == ['blender', 'native']
+    # Measurements are per kind of file: textured scans still use the configured order
+    assert selector.order(TEXTURED_SCAN) == ['native', 'blender']
+
+
+def test_unreliable_backend_goes_last(model):
+    record(model, 'native', 1.0, failures=7)
+    record(model, 'blender', 10.0)
+    selector = BackendSelector([StubBackend('native'), StubBackend('blender')], model, min_samples=5,
+                               exploration=0)
+    assert selector.order(TEXT_SCAN) == ['blender', 'native']
+
+
+def test_unavailable_backends_are_skipped(model):
+    selector = BackendSelector([StubBackend('native', ok=False), StubBackend('blender')], model, exploration=0)
+    assert selector.order(TEXT_SCAN) == ['blender']
+    assert selector.describe()[0] == 'native: not available'
+
+
+class StubPool:
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    def convert(self, input_path, output_path, timeout, **options):
+        # The root layer and what it references are on disk while Blender runs
+        self.calls.append((input_path, sorted(os.listdir(os.path.dirname(input_path))), timeout, options))
+        return self.result
+
+
+@pytest.fixture
+def scan(tmp_path):
+    path = str(tmp_path / 'scan.usdz')
+    write_usdz(path, build_scan('scan', walls=2, objects=2, layers=2))
+    return path
+
+
+def test_blender_backend_converts_on_the_pool(tmp_path, scan):
+    pool = StubPool({'success': True, 'import_time': 1.0, 'export_time': 2.0, 'peak_rss_mb': 300.0})
+    backend = BlenderBackend(pool, work_dir=str(tmp_path), profile='fast')
+    assert backend.available() and not BlenderBackend().available()
+    with UsdzArchive(scan) as archive:
+        graph = LayerGraph(archive)
+        assert file_features(scan, graph)['layers'] == 3
+        stats = backend.convert(scan, str(tmp_path / 'scan.glb'), archive, graph, 60)
+
+    assert stats == {'import_time': 1.0, 'export_time': 2.0, 'peak_rss_mb': 300.0}
+    input_path, listing, timeout, options = pool.calls[0]
+    assert os.path.basename(input_path) == 'scan.usda' and 'assets' in listing
+    assert (timeout, options) == (60, {'profile': 'fast'})
+    assert not os.path.exists(os.path.dirname(input_path))  # Extracted files are removed
+
+
+def test_blender_backend_failure_raises(tmp_path, scan):
+    backend = BlenderBackend(StubPool({'success': False, 'error': 'timeout'}), work_dir=str(tmp_path))
+    with UsdzArchive(scan) as archive:
+        with pytest.raises(RuntimeError, match='timeout'):
+            backend.convert(scan, str(tmp_path / 'scan.glb'), archive, LayerGraph(archive), 60)
+    assert os.listdir(tmp_path) == ['scan.usdz']
+
+
+def test_native_backend_enforces_timeout(tmp_path, scan):
+    backend = NativeBackend()
+    glb_path = str(tmp_path / 'scan.glb')
+    with UsdzArchive(scan) as archive:
+        graph = LayerGraph(archive)
+        with pytest.raises(TimeoutError):
+            backend.convert(scan, glb_path, archive, graph, -1)  # Deadline already passed
+        assert not os.path.exists(glb_path)
+        assert backend.convert(scan, glb_path, archive, graph, 60)['meshes']
@@ -0,0 +1,99 @@
+import importlib
+import os
+import sys
+import time
+
+import pytest
+
+from blender_pool import ITEM_MARKER, READY_MARKER, RESULT_MARKER, BlenderWorkerPool
+
+# Speaks the worker protocol without Blender: items whose USD path contains
+# "hang" never finish, every other item writes a small GLB
+FAKE_BLENDER = '''#!{python}
+import json, sys, time
+print({ready!r}, flush=True)
+for line in sys.stdin:
+    job = json.loads(line)
+    for index, item in enumerate(job['items']):
+        if 'hang' in item['usd_file']:
+            time.sleep(60)
+        with open(item['glb_file'], 'wb') as f:
+            f.write(b'glTF')
+        result = {{'success': True, 'import_time': 0.0, 'export_time': 0.0, 'elapsed': 0.0, 'index': index}}
+        print({item!r} + json.dumps(result), flush=True)
+    print({result!r} + json.dumps({{'success': True}}), flush=True)
+'''
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    blender = bin_dir / 'blender'
+    blender.write_text(FAKE_BLENDER.format(python=sys.executable, ready=READY_MARKER,
+                                           item=ITEM_MARKER, result=RESULT_MARKER))
+    blender.chmod(0o755)
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    pool = BlenderWorkerPool(size=1, script_dir=str(tmp_path))
+    yield pool
+    pool.shutdown()
+
+
+def items(tmp_path, *names):
+    return [(str(tmp_path / f'{name}.usda'), str(tmp_path / f'{name}.glb')) for name in names]
+
+
+def test_timeout_mid_batch_reports_the_rest_not_run(tmp_path, pool):
+    batch = items(tmp_path, 'a', 'hang', 'c', 'd')
+    results = pool.convert_batch(batch, timeout=[5, 0.5, 5, 5])
+
+    assert results[0]['success'] and os.path.exists(batch[0][1])
+    assert not results[1]['success'] and results[1]['error'].startswith('timeout')
+    assert [result.get('not_run') for result in results[2:]] == [True, True]
+    assert not any(os.path.exists(glb) for _, glb in batch[1:])
+
+    # The hung worker was stopped; the items it never reached run on a fresh one
+    rerun = pool.convert_batch(batch[2:], timeout=5)
+    assert all(result['success'] for result in rerun)
+    assert pool._next_id == 2
+
+
+class Histogram:
+    def observe(self, *args, **kwargs):
+        pass
+
+
+@pytest.fixture
+def converter(tmp_path_factory, monkeypatch):
+    pytest.importorskip('boto3')
+    home = tmp_path_factory.mktemp('home')
+    (home / 'usdz-converter').mkdir()  # TEMP_DIR, which holds the log file
+    monkeypatch.setenv('HOME', str(home))
+    return importlib.import_module('converter')
+
+
+def test_convert_many_reruns_files_an_aborted_batch_did_not_reach(tmp_path, pool, converter, monkeypatch):
+    service = converter.USDZConverter.__new__(converter.USDZConverter)
+    service.blender_pool = pool
+    service.skipped_options = set()
+    service.stage_seconds = service.blender_peak_rss = Histogram()
+    recorded = []
+    monkeypatch.setattr(service, 'record_throughput',
+                        lambda conversion, backend, duration, ok, result=None: recorded.append(
+                            (os.path.basename(conversion['glb_path']), ok)))
+
+    def prepare_conversion(usdz_path, glb_path, attempt=1, profile=None):
+        # Extracted and waiting for Blender
+        return {'usdz_path': usdz_path, 'glb_path': glb_path, 'main_usd': usdz_path, 'attempt': attempt,
+                'profile': profile, 'start': time.time(), 'ok': None, 'elapsed': 0.0, 'extract_dir': None,
+                'backend': None, 'error': None, 'backends': [], 'memory_mb': None,
+                'timeout': 0.5 if 'hang' in usdz_path else 5}
+
+    monkeypatch.setattr(service, 'prepare_conversion', prepare_conversion)
+    batch = items(tmp_path, 'a', 'hang', 'c', 'd')
+    conversions = service.convert_many(batch)
+
+    assert [conversion['ok'] for conversion in conversions] == [True, False, True, True]
+    assert conversions[1]['error'] == 'timeout'
+    assert sorted(recorded) == [('a.glb', True), ('c.glb', True), ('d.glb', True), ('hang.glb', False)]
+    assert pool._next_id == 2  # One fresh worker for the re-run
@@ -0,0 +1,107 @@
+import hashlib
+import sqlite3
+
+import pytest
+
+from conversion_cache import ConversionCache, etag_matches_file, etag_md5, file_md5, multipart_etag
+
+MIB = 1024 * 1024
+
+
+def md5(data):
+    return hashlib.md5(data).hexdigest()
+
+
+def s3_multipart_etag(data, part_size):
+    """ETag as S3 computes it: MD5 of the concatenated part digests, then -<parts>"""
+    parts = [data[i:i + part_size] for i in range(0, len(data), part_size)]
+    combined = hashlib.md5(b''.join(hashlib.md5(part).digest() for part in parts)).hexdigest()
+    return f'"{combined}-{len(parts)}"'
+
+
+@pytest.fixture
+def scan(tmp_path):
+    data = bytes(range(256)) * (10 * MIB // 256 + 17)  # Not a whole number of MiB
+    path = tmp_path / 'scan.usdz'
+    path.write_bytes(data)
+    return str(path), data
+
+
+def test_etag_md5():
+    assert etag_md5('"0123456789ABCDEF0123456789abcdef"') == '0123456789abcdef0123456789abcdef'
+    assert etag_md5('"0123456789abcdef0123456789abcdef-2"') is None
+    assert etag_md5('') is None
+    assert etag_md5(None) is None
+
+
+def test_single_part_etag(scan):
+    path, data = scan
+    assert file_md5(path, chunk_size=MIB) == md5(data)
+    assert etag_matches_file(f'"{md5(data)}"', path)
+    assert not etag_matches_file(f'"{md5(data + b"x")}"', path)
+    assert not etag_matches_file('', path)
+
+
+def test_multipart_etag_matches_s3(scan):
+    path, data = scan
+    assert f'"{multipart_etag(path, 5 * MIB)}"' == s3_multipart_etag(data, 5 * MIB)
+
+
+@pytest.mark.parametrize('part_mb', [8, 5, 3])
+def test_multipart_part_size_is_found(scan, part_mb):
+    # 8 and 5 MiB are common client defaults; 3 MiB is inferred from the part count
+    path, data = scan
+    assert etag_matches_file(s3_multipart_etag(data, part_mb * MIB), path)
+
+
+def test_multipart_configured_part_size(scan):
+    path, data = scan
+    etag = s3_multipart_etag(data, 1536 * 1024)  # Not a whole MiB, so only found when given
+    assert not etag_matches_file(etag, path)
+    assert etag_matches_file(etag, path, part_sizes=(1536 * 1024,))
+
+
+def test_multipart_mismatch(scan):
+    path, data = scan
+    assert not etag_matches_file(s3_multipart_etag(data[:-1] + b'x', 8 * MIB), path)
+    assert not etag_matches_file(f'"{md5(data)}-7"', path)
+    assert not etag_matches_file(f'"{md5(data)}-x"', path)
+
+
+def test_cache_round_trip(tmp_path):
+    cache = ConversionCache(str(tmp_path / 'jobs.db'))
+    assert cache.get('m1') is None
+    cache.put('m1', 'out/a.glb', 100, 'etag-a')
+    assert cache.get('m1') == ('out/a.glb', 'etag-a', None)
+    cache.put('m1', 'out/b.glb', 100, 'etag-b', {'out/b.lod1.glb': 'etag-lod'})
+    assert cache.get('m1') == ('out/b.glb', 'etag-b', {'out/b.lod1.glb': 'etag-lod'})
+    cache.invalidate('m1')
+    assert cache.get('m1') is None
+    assert cache.stats() == {'hits': 2, 'misses': 2, 'hit_rate': 0.5}
+
+
+def test_cache_expiry_and_lru(tmp_path):
+    cache = ConversionCache(str(tmp_path / 'jobs.db'), max_entries=2, ttl_seconds=3600)
+    cache.put('m1', 'a.glb')
+    cache.put('m2', 'b.glb')
+    cache.get('m1')
+    cache.put('m3', 'c.glb')  # Evicts m2, the least recently used
+    assert cache.get('m2') is None
+    assert cache.get('m1') == ('a.glb', None, None)
+
+    cache.ttl_seconds = -1
+    assert cache.get('m3') is None
+
+
+def test_cache_adds_etag_columns_to_old_tables(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE glb_cache (content_md5 TEXT PRIMARY KEY, glb_key TEXT NOT NULL, '
+                 'glb_size INTEGER, created_at REAL NOT NULL, last_used_at REAL NOT NULL, '
+                 'hits INTEGER NOT NULL DEFAULT 0)')
+    conn.execute("INSERT INTO glb_cache VALUES ('m1', 'a.glb', 1, 9e99, 9e99, 0)")
+    conn.commit()
+    conn.close()
+
+    cache = ConversionCache(path, ttl_seconds=float('inf'))
+    assert cache.get('m1') == ('a.glb', None, None)  # No ETag: callers re-check the object
@@ -0,0 +1,123 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from conftest import add_box, assert_same_surface, world_triangles
+from glb import GlbBuilder, read_glb, write_glb
+from glb_chunks import GlbChunkError, chunk_dir_name, chunk_manifest_name, split_glb
+
+
+@pytest.fixture
+def roomplan_glb(tmp_path):
+    """RoomPlan's node layout: Model_grp (Arch, Floor, Object_grp) and Section_grp rooms"""
+    builder = GlbBuilder()
+    material = builder.add('materials', {'name': 'grey', 'pbrMetallicRoughness': {'baseColorFactor': [.5, .5, .5, 1]}})
+    root = builder.add_node({'name': 'RoomPlan20260101T000000Z', 'translation': [0.0, 0.0, 1.0]})
+    model = builder.add_node({'name': 'Model_grp'}, root)
+
+    arch = builder.add_node({'name': 'Arch_grp'}, model)
+    wall0 = builder.add_node({'name': 'Wall_0_grp'}, arch)
+    add_box(builder, 'Wall0', size=(4, 2.5, 0.1), translation=(-2, 1.25, 0), parent=wall0, material=material)
+    add_box(builder, 'Window0', size=(1, 1, 0.1), translation=(-2, 1.5, 0), parent=wall0)
+    wall1 = builder.add_node({'name': 'Wall_1_grp'}, arch)
+    add_box(builder, 'Wall1', size=(4, 2.5, 0.1), translation=(2, 1.25, 0), parent=wall1, material=material)
+    floor = builder.add_node({'name': 'Floor_grp'}, model)
+    add_box(builder, 'Floor0', size=(8, 0.01, 4), parent=floor, material=material)
+
+    objects = builder.add_node({'name': 'Object_grp'}, model)
+    chairs = builder.add_node({'name': 'Chair_grp'}, objects)
+    add_box(builder, 'Chair0', size=(0.5, 0.9, 0.5), translation=(-2, 0.45, 1), parent=chairs)
+    add_box(builder, 'Chair1', size=(0.5, 0.9, 0.5), translation=(2, 0.45, 1), parent=chairs)
+    tables = builder.add_node({'name': 'Table_grp'}, objects)
+    add_box(builder, 'Table0', size=(1.2, 0.75, 0.8), translation=(-2.5, 0.375, 1.5), parent=tables)
+
+    sections = builder.add_node({'name': 'Section_grp'}, root)
+    builder.add_node({'name': 'kitchen0', 'translation': [-2.0, 0.0, 1.0]}, sections)
+    builder.add_node({'name': 'bedroom0', 'translation': [2.0, 0.0, 1.0]}, sections)
+    add_box(builder, 'Lamp', translation=(0, 3, 0))
+
+    path = str(tmp_path / 'scan.glb')
+    builder.write(path)
+    return path
+
+
+def test_names():
+    assert chunk_manifest_name('out/scan.glb') == 'out/scan.chunks.json'
+    assert chunk_dir_name('out/scan.glb') == 'out/scan.chunks'
+
+
+def test_category_manifest(roomplan_glb):
+    manifest, paths = split_glb(roomplan_glb, chunk_dir_name(roomplan_glb))
+    json.dumps(manifest)  # Written as JSON next to the chunks
+
+    assert manifest['version'] == 1 and manifest['mode'] == 'category'
+    chunks = manifest['chunks']
+    assert [c['name'] for c in chunks] == ['Arch', 'Floor', 'Chair', 'Table', 'Other']
+    assert [c['priority'] for c in chunks] == [0, 1, 2, 2, 3]
+    assert [c['file'] for c in chunks] == [
+        'scan.chunks/arch.glb', 'scan.chunks/floor.glb', 'scan.chunks/chair.glb',
+        'scan.chunks/table.glb', 'scan.chunks/other.glb',
+    ]
+    assert all(c['room'] is None for c in chunks)
+    assert [c['triangles'] for c in chunks] == [36, 12, 24, 12, 12]
+    assert [os.path.dirname(path) for path in paths] == [chunk_dir_name(roomplan_glb)] * 5
+
+    # World space: the root's translation is baked into each chunk's bounds
+    chair = chunks[2]['bounds']
+    assert np.allclose(chair['min'], [-2.25, 0, 1.75], atol=1e-6)
+    assert np.allclose(chair['max'], [2.25, 0.9, 2.25], atol=1e-6)
+    assert np.allclose(manifest['bounds']['min'], [-4, -0.005, -1], atol=1e-6)
+    assert np.allclose(manifest['bounds']['max'], [4, 3.5, 3], atol=1e-6)
+    assert [room['name'] for room in manifest['rooms']] == ['kitchen0', 'bedroom0']
+    assert np.allclose(manifest['rooms'][0]['center'], [-2, 0, 2], atol=1e-6)
+
+
+def test_chunks_add_up_to_the_scene(roomplan_glb):
+    gltf, binary = read_glb(roomplan_glb)
+    before = world_triangles(gltf, binary)
+    _, paths = split_glb(roomplan_glb, chunk_dir_name(roomplan_glb))
+
+    parts = []
+    for path in paths:
+        chunk, chunk_binary = read_glb(path)
+        assert 'Section_grp' not in {node.get('name') for node in chunk['nodes']}
+        parts.append(world_triangles(chunk, chunk_binary))
+    assert_same_surface(before, np.concatenate(parts), 1e-5)
+
+
+def test_chunks_copy_only_their_data(roomplan_glb):
+    manifest, paths = split_glb(roomplan_glb, chunk_dir_name(roomplan_glb))
+    arch, _ = read_glb(paths[0])
+    assert [m['name'] for m in arch['materials']] == ['grey']
+    chair, _ = read_glb(paths[2])
+    assert 'materials' not in chair
+    assert len(chair['meshes']) <= 2
+    assert os.path.getsize(paths[2]) < os.path.getsize(roomplan_glb)
+
+
+def test_room_mode_assigns_nearest_room(roomplan_glb):
+    manifest, paths = split_glb(roomplan_glb, chunk_dir_name(roomplan_glb), mode='room')
+    names = [c['name'] for c in manifest['chunks']]
+    assert names[:2] == ['bedroom0/Arch', 'kitchen0/Arch']
+    assert {'kitchen0/Chair', 'bedroom0/Chair', 'kitchen0/Table'} <= set(names)
+    kitchen_chair = next(c for c in manifest['chunks'] if c['name'] == 'kitchen0/Chair')
+    assert kitchen_chair['room'] == 'kitchen0' and kitchen_chair['category'] == 'Chair'
+    assert kitchen_chair['file'] == 'scan.chunks/kitchen0-chair.glb'
+    assert kitchen_chair['triangles'] == 12
+    assert len(set(c['file'] for c in manifest['chunks'])) == len(paths)
+
+
+def test_unknown_mode(roomplan_glb):
+    with pytest.raises(ValueError):
+        split_glb(roomplan_glb, chunk_dir_name(roomplan_glb), mode='floor')
+
+
+def test_animated_scenes_are_not_split(roomplan_glb, tmp_path):
+    gltf, binary = read_glb(roomplan_glb)
+    gltf['animations'] = [{'channels': [], 'samplers': []}]
+    path = str(tmp_path / 'animated.glb')
+    write_glb(path, gltf, binary)
+    with pytest.raises(GlbChunkError):
+        split_glb(path, chunk_dir_name(path))
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+
+from conftest import world_triangles
+from glb import ARRAY_BUFFER, GlbBuilder, read_glb
+from glb_lod import build_lods, cluster_simplify, lod_name, vertex_quadrics
+
+LEVELS = [(0.5, None), (0.25, None), (0.1, None)]
+
+
+def grid_surface(n):
+    """n x n quads of a gently curved sheet, as (positions, triangles)"""
+    u, v = np.meshgrid(np.linspace(0, 1, n + 1), np.linspace(0, 1, n + 1), indexing='ij')
+    positions = np.stack([u, 0.1 * np.sin(3 * u) * np.cos(3 * v), v], axis=-1).reshape(-1, 3)
+    grid = np.arange((n + 1) ** 2).reshape(n + 1, n + 1)
+    quads = np.stack([grid[:-1, :-1], grid[1:, :-1], grid[1:, 1:], grid[:-1, 1:]], axis=-1).reshape(-1, 4)
+    triangles = np.concatenate([quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]])
+    return positions.astype(np.float32), triangles.astype(np.uint32)
+
+
+def test_lod_name():
+    assert lod_name('out/scan.glb', 2) == 'out/scan.lod2.glb'
+
+
+def test_cluster_simplify_hits_target_within_bounds():
+    positions, triangles = grid_surface(60)
+    quadrics = vertex_quadrics(positions.astype(np.float64), triangles)
+    attributes, simplified = cluster_simplify({'POSITION': positions}, triangles, 1000, quadrics)
+    assert 0 < len(simplified) <= 1100
+    assert simplified.max() < len(attributes['POSITION'])
+    assert (attributes['POSITION'].min(axis=0) >= positions.min(axis=0) - 1e-6).all()
+    assert (attributes['POSITION'].max(axis=0) <= positions.max(axis=0) + 1e-6).all()
+
+
+def test_dense_mesh_levels(tmp_path):
+    positions, triangles = grid_surface(80)
+    builder = GlbBuilder()
+    mesh = builder.add('meshes', {'primitives': [{
+        'attributes': {'POSITION': builder.add_accessor(positions, target=ARRAY_BUFFER, minmax=True)},
+        'indices': builder.add_indices(triangles),
+        'mode': 4,
+    }]})
+    builder.add_node({'name': 'Sheet', 'mesh': mesh})
+    path = str(tmp_path / 'sheet.glb')
+    builder.write(path)
+
+    written = build_lods(path, LEVELS, min_triangles=5000)
+    assert [p for p, _ in written] == [lod_name(path, level) for level in (1, 2, 3)]
+    counts = [stats['triangles_after'] for _, stats in written]
+    for (ratio, _), count in zip(LEVELS, counts):
+        assert count <= len(triangles) * ratio * 1.1
+    assert counts == sorted(counts, reverse=True)
+    assert all(os.path.getsize(p) < os.path.getsize(path) for p, _ in written)
+
+
+def test_levels_never_gain_triangles_on_small_meshes(scan_glb):
+    gltf, binary = read_glb(scan_glb)
+    total = len(world_triangles(gltf, binary))
+    written = build_lods(scan_glb, LEVELS, min_triangles=10)
+    counts = [stats['triangles_after'] for _, stats in written]
+    assert counts[0] <= total
+    assert all(later <= earlier for earlier, later in zip(counts, counts[1:]))
+    for path, stats in written:
+        lod, lod_binary = read_glb(path)
+        assert len(world_triangles(lod, lod_binary)) > 0
+
+
+def test_small_primitives_are_copied(scan_glb):
+    gltf, binary = read_glb(scan_glb)
+    (path, stats), = build_lods(scan_glb, LEVELS[:1], min_triangles=5000)
+    assert stats['simplified_primitives'] == 0
+    assert stats['triangles_after'] == stats['triangles_before']
+    lod, lod_binary = read_glb(path)
+    assert len(world_triangles(lod, lod_binary)) == len(world_triangles(gltf, binary))
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from conftest import add_box, assert_same_surface, world_triangles
+from glb import GlbBuilder, read_glb, write_glb
+from glb_optimize import GlbOptimizeError, GlbOptimizer, optimize_glb, tipsify, weld
+
+
+def test_weld_merges_identical_vertices():
+    attributes = {'POSITION': np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [1, 0, 0], [0, 1, 0], [1, 1, 0]],
+                                       dtype=np.float32)}
+    welded, indices = weld(attributes, np.arange(6, dtype=np.uint32))
+    assert len(welded['POSITION']) == 4
+    assert welded['POSITION'][indices].tolist() == attributes['POSITION'].tolist()
+
+
+def test_tipsify_keeps_every_triangle_and_winding():
+    rng = np.random.default_rng(0)
+    triangles = rng.integers(0, 50, size=(200, 3))
+    triangles = triangles[(triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2])
+                          & (triangles[:, 0] != triangles[:, 2])]
+    reordered = tipsify(triangles, 50)
+
+    def canonical(tris):
+        # Rotate each triangle so its smallest index comes first (keeps the winding)
+        rolled = [np.roll(t, -int(np.argmin(t))) for t in tris]
+        return sorted(map(tuple, rolled))
+
+    assert canonical(reordered) == canonical(triangles)
+
+
+@pytest.mark.parametrize('options, tolerance', [
+    ({'quantize': False, 'reorder': True, 'instancing': None}, 1e-5),
+    ({'quantize': False, 'reorder': True, 'instancing': 'nodes'}, 1e-5),
+    ({'quantize': True, 'reorder': True, 'instancing': 'nodes'}, 2e-3),
+    ({'quantize': True, 'reorder': True, 'instancing': 'gpu'}, 2e-3),
+])
+def test_geometry_is_preserved(scan_glb, options, tolerance):
+    gltf, binary = read_glb(scan_glb)
+    before = world_triangles(gltf, binary)
+
+    optimizer = GlbOptimizer(gltf, binary, **options)
+    optimized, optimized_binary = optimizer.run()
+    assert_same_surface(before, world_triangles(optimized, optimized_binary), tolerance)
+    assert optimizer.stats['vertices_after'] <= optimizer.stats['vertices_before']
+    if options['instancing']:
+        assert optimizer.stats['merged_meshes'] > 0
+
+
+def test_sibling_boxes_become_gpu_instances():
+    builder = GlbBuilder()
+    room = builder.add_node({'name': 'Chair_grp', 'translation': [1.0, 0.0, 2.0]})
+    for i in range(3):
+        add_box(builder, f'Chair{i}', size=(0.5, 0.9 + i * 0.1, 0.5), translation=(i, 0.45, 0), parent=room)
+    add_box(builder, 'Floor', size=(4, 0.01, 4))
+    gltf, binary = builder.finish()
+    before = world_triangles(gltf, binary)
+
+    optimizer = GlbOptimizer(gltf, binary, quantize=True, instancing='gpu')
+    optimized, optimized_binary = optimizer.run()
+    assert optimizer.stats['gpu_instances'] == 3
+    assert len(optimized['meshes']) == 1  # Floor and chairs are all scaled unit boxes
+    assert 'EXT_mesh_gpu_instancing' in optimized['extensionsUsed']
+    assert_same_surface(before, world_triangles(optimized, optimized_binary), 1e-3)
+
+
+def test_optimize_glb_rewrites_in_place(scan_glb):
+    gltf, binary = read_glb(scan_glb)
+    before = world_triangles(gltf, binary)
+    stats = optimize_glb(scan_glb)
+    assert stats['size_after'] < stats['size_before']
+
+    gltf, binary = read_glb(scan_glb)
+    assert 'KHR_mesh_quantization' in gltf['extensionsRequired']
+    assert_same_surface(before, world_triangles(gltf, binary), 2e-3)
+
+
+def test_compressed_geometry_is_rejected(tmp_path, scan_glb):
+    gltf, binary = read_glb(scan_glb)
+    gltf['extensionsUsed'] = ['KHR_draco_mesh_compression']
+    with pytest.raises(GlbOptimizeError):
+        GlbOptimizer(gltf, binary)
+    write_glb(str(tmp_path / 'draco.glb'), gltf, binary)
+    with pytest.raises(GlbOptimizeError):
+        optimize_glb(str(tmp_path / 'draco.glb'))
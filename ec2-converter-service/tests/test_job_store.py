@@ -0,0 +1,92 @@
+import pytest
+
+from job_store import JobStore, job_identity
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'), max_attempts=2)
+    yield store
+    store.close()
+
+
+def obj(key, etag='"e1"', size=10):
+    return {'Key': key, 'ETag': etag, 'Size': size}
+
+
+def keys(objects):
+    return [o['Key'] for o in objects]
+
+
+def test_identity_normalizes_etag_quotes():
+    assert job_identity('a', '"abc"', 3) == job_identity('a', 'abc', 3)
+    assert job_identity('a') == ('a', '', -1)
+
+
+def test_new_objects_are_pending(store):
+    assert keys(store.filter_new([obj('a'), obj('b')])) == ['a', 'b']
+
+
+def test_succeeded_and_running_are_done(store):
+    store.start('a', '"e1"', 10)
+    store.start('b', '"e1"', 10)
+    store.finish('b', 'e1', 10, success=True, output_key='b.glb')
+    assert keys(store.filter_new([obj('a'), obj('b'), obj('c')])) == ['c']
+
+
+def test_reupload_with_new_etag_is_pending(store):
+    store.start('a', 'e1', 10)
+    store.finish('a', 'e1', 10, success=True)
+    assert keys(store.filter_new([obj('a', etag='"e2"')])) == ['a']
+    assert keys(store.filter_new([obj('a', size=11)])) == ['a']
+
+
+def test_failed_jobs_retry_until_max_attempts(store):
+    store.start('a', 'e1', 10)
+    store.finish('a', 'e1', 10, success=False, error='convert')
+    assert keys(store.filter_new([obj('a')])) == ['a']
+    assert store.start('a', 'e1', 10) == 2
+    store.finish('a', 'e1', 10, success=False, error='convert')
+    assert store.filter_new([obj('a')]) == []
+
+
+def test_running_jobs_fail_on_restart(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    store = JobStore(path)
+    store.start('a', 'e1', 10)
+    store.close()
+    store = JobStore(path)
+    assert store.counts() == {'failed': 1}
+    assert keys(store.filter_new([obj('a')])) == ['a']
+    store.close()
+
+
+def test_legacy_import_is_revalidated(store, tmp_path):
+    log = tmp_path / 'processed.txt'
+    log.write_text('a\nb\n\nc\n')
+    assert store.import_legacy_log(str(log)) == 3
+    assert not log.exists()
+    assert (tmp_path / 'processed.txt.migrated').exists()
+    assert store.counts() == {'legacy': 3}
+
+    checked = []
+
+    def glb_exists(o):
+        checked.append(o['Key'])
+        return o['Key'] != 'b'
+
+    assert keys(store.filter_new([obj('a'), obj('b')], legacy_check=glb_exists)) == ['b']
+    assert checked == ['a', 'b']
+    # Adopted for the listed ETag only: a re-upload converts again
+    assert store.filter_new([obj('a')], legacy_check=glb_exists) == []
+    assert keys(store.filter_new([obj('a', etag='"e2"')], legacy_check=glb_exists)) == ['a']
+    assert checked == ['a', 'b']
+    assert store.counts() == {'legacy': 1, 'succeeded': 1}
+
+
+def test_legacy_rows_without_check_are_pending(store, tmp_path):
+    log = tmp_path / 'processed.txt'
+    log.write_text('a\n')
+    store.import_legacy_log(str(log))
+    assert keys(store.filter_new([obj('a')])) == ['a']
+    assert store.counts() == {'legacy': 1}
@@ -0,0 +1,112 @@
+import logging
+
+import pytest
+
+from generate_corpus import write_usdz
+from layer_graph import USDC_MAGIC, LayerGraph, analyze_usdz, resolve_asset, scan_layer
+from usdz_reader import UsdzArchive, UsdzError
+
+
+def layer(body='', default_prim=None, sublayers=()):
+    metadata = []
+    if default_prim:
+        metadata.append(f'defaultPrim = "{default_prim}"')
+    if sublayers:
+        metadata.append('subLayers = [' + ', '.join(f'@{path}@' for path in sublayers) + ']')
+    header = '(\n    ' + '\n    '.join(metadata) + '\n)\n' if metadata else ''
+    return f'#usda 1.0\n{header}\n{body}\n'.encode()
+
+
+def reference(asset):
+    return f'def Xform "Ref" (\n    references = @{asset}@\n)\n{{\n}}'
+
+
+@pytest.fixture
+def make_usdz(tmp_path):
+    def make(files):
+        path = str(tmp_path / 'scan.usdz')
+        write_usdz(path, files)
+        return UsdzArchive(path)
+    return make
+
+
+def test_resolve_asset():
+    assert resolve_asset('./assets/a.usda', 'scan.usda') == 'assets/a.usda'
+    assert resolve_asset('../textures/t.png', 'assets/a.usda') == 'textures/t.png'
+    assert resolve_asset('/assets/a.usda', 'deep/x/y.usda') == 'assets/a.usda'
+
+
+def test_scan_layer_ignores_strings_and_comments():
+    text = layer('# @commented.usda@\ndef "A" (doc = "see @quoted.usda@")\n{\n}\n' + reference('real.usda'),
+                 default_prim='A').decode()
+    assert scan_layer(text) == ('A', ['real.usda'])
+
+
+def test_first_entry_is_root_and_unreachable_layers_are_dropped(make_usdz):
+    files = {
+        'scan.usda': layer(reference('./assets/room.usda'), default_prim='Room'),
+        'assets/room.usda': layer('def Mesh "Wall"\n{\n    asset tex = @../textures/wood.png@\n}',
+                                  default_prim='Wall', sublayers=['detail.usda']),
+        'assets/detail.usda': layer('def Mesh "Trim"\n{\n}'),
+        'assets/unused.usda': layer('def Mesh "Old"\n{\n}', default_prim='Old'),
+        'textures/wood.png': b'\x89PNG',
+        'textures/unused.png': b'\x89PNG',
+    }
+    with make_usdz(files) as archive:
+        graph = LayerGraph(archive)
+        assert graph.root == 'scan.usda'
+        assert graph.default_prim == 'Room'
+        assert graph.reachable == ['scan.usda', 'assets/room.usda', 'assets/detail.usda']
+        assert graph.unreferenced() == ['assets/unused.usda']
+        assert graph.files() == ['scan.usda', 'assets/room.usda', 'assets/detail.usda', 'textures/wood.png']
+        assert graph.summary()['unreferenced'] == 1
+
+
+def test_root_search_prefers_unreferenced_layer_with_default_prim(make_usdz):
+    files = {
+        'README.txt': b'not a layer',
+        'orphan.usda': layer('def Mesh "Stray"\n{\n}'),  # Unreferenced, but no defaultPrim
+        'parts/part.usda': layer('def Mesh "Part"\n{\n}', default_prim='Part'),  # Referenced
+        'main.usda': layer(reference('parts/part.usda'), default_prim='Scene'),
+    }
+    with make_usdz(files) as archive:
+        graph = LayerGraph(archive)
+        assert graph.root == 'main.usda'
+        assert graph.reachable == ['main.usda', 'parts/part.usda']
+        assert graph.unreferenced() == ['orphan.usda']
+        assert LayerGraph(archive, root='orphan.usda').reachable == ['orphan.usda']
+
+
+def test_root_search_falls_back_to_shallowest_then_archive_order(make_usdz):
+    files = {
+        'README.txt': b'not a layer',
+        'deep/a.usda': layer('def "A"\n{\n}'),
+        'b.usda': layer('def "B"\n{\n}'),
+        'c.usda': layer('def "C"\n{\n}'),
+    }
+    with make_usdz(files) as archive:
+        assert LayerGraph(archive).root == 'b.usda'
+
+
+def test_missing_assets_are_reported(make_usdz, caplog):
+    files = {'scan.usda': layer(reference('gone.usda'))}
+    with make_usdz(files) as archive:
+        with caplog.at_level(logging.WARNING):
+            graph = analyze_usdz(archive)
+        assert graph.missing == [('scan.usda', 'gone.usda')]
+        assert graph.reachable == ['scan.usda']
+    assert 'no defaultPrim' in caplog.text and '@gone.usda@' in caplog.text
+
+
+def test_usdc_layers_keep_every_file(make_usdz):
+    files = {'scan.usdc': USDC_MAGIC + b'\x00' * 24, 'textures/t.png': b'\x89PNG', 'extra.usda': layer()}
+    with make_usdz(files) as archive:
+        graph = LayerGraph(archive)
+        assert graph.opaque == {'scan.usdc'}
+        assert graph.files() == ['scan.usdc', 'textures/t.png', 'extra.usda']
+
+
+def test_archive_without_layers(make_usdz):
+    with make_usdz({'textures/t.png': b'\x89PNG'}) as archive:
+        with pytest.raises(UsdzError):
+            LayerGraph(archive)
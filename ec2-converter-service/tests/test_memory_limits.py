@@ -0,0 +1,157 @@
+import threading
+
+import pytest
+
+import memory_limits
+from memory_limits import CgroupHandle, MemoryGate, MemoryLimiter, RlimitHandle
+
+MIB = 1024 * 1024
+
+
+class Machine:
+    """MemAvailable and per-process RSS, as the gate reads them"""
+
+    def __init__(self, available):
+        self.available = available
+        self.rss = {}
+
+
+@pytest.fixture
+def machine(monkeypatch):
+    machine = Machine(4000.0)
+    monkeypatch.setattr(memory_limits, 'available_memory_mb', lambda: machine.available)
+    monkeypatch.setattr(memory_limits, 'read_rss_mb', lambda pid: machine.rss.get(pid))
+    return machine
+
+
+def test_first_job_is_always_admitted(machine):
+    gate = MemoryGate(reserve_mb=256)
+    machine.available = 100.0
+    gate.admit(5000)
+    assert gate.running() == 1
+
+
+def test_admission_is_available_minus_outstanding_minus_reserve(machine):
+    gate = MemoryGate(reserve_mb=256)
+    machine.rss[1] = 500.0
+    gate.admit(1000, pid=1)  # Starts at 500 MB RSS
+    # 4000 available - 1000 not yet used by job 1 - 256 reserve
+    assert gate._fits(2744) and not gate._fits(2745)
+
+    # Job 1 grows by 600 MB, which MemAvailable now reflects: only 400 MB is still held for it
+    machine.rss[1] = 1100.0
+    machine.available = 3400.0
+    assert gate._outstanding() == 400
+    assert gate._fits(2744) and not gate._fits(2745)
+
+    # Past its estimate it holds nothing more
+    machine.rss[1] = 2000.0
+    assert gate._outstanding() == 0
+
+
+def test_jobs_without_pid_hold_their_whole_estimate(machine):
+    gate = MemoryGate(reserve_mb=0)
+    gate.admit(1500)
+    gate.admit(1500)
+    assert gate._outstanding() == 3000
+    assert gate._fits(1000) and not gate._fits(1001)
+
+
+def test_unknown_available_memory_admits(machine):
+    gate = MemoryGate()
+    gate.admit(1000)
+    machine.available = None
+    assert gate._fits(10 ** 6)
+
+
+def test_admit_waits_for_release(machine):
+    gate = MemoryGate(reserve_mb=256, poll_interval=0.05)
+    first = gate.admit(3000)
+    admitted = threading.Event()
+    thread = threading.Thread(target=lambda: (gate.admit(2000), admitted.set()))
+    thread.start()
+    assert not admitted.wait(0.2)
+    gate.release(first)
+    assert admitted.wait(2)
+    thread.join()
+    assert gate.running() == 1
+
+
+class FakeResource:
+    RLIMIT_AS = 9
+
+    def __init__(self):
+        self.calls = []
+
+    def prlimit(self, pid, which, limits):
+        self.calls.append((pid, which, limits))
+
+
+@pytest.fixture
+def fake_resource(monkeypatch):
+    fake = FakeResource()
+    monkeypatch.setattr(memory_limits, 'resource', fake)
+    return fake
+
+
+@pytest.fixture
+def cgroup(tmp_path, monkeypatch):
+    """A delegated cgroup directory, or None to have no cgroup available"""
+    path = tmp_path / 'cgroup'
+    path.mkdir()
+    state = {'path': str(path)}
+    monkeypatch.setattr(MemoryLimiter, '_setup_cgroup', lambda self: state['path'])
+    return state
+
+
+@pytest.mark.parametrize('mode, has_cgroup, expected', [
+    ('cgroup', True, 'cgroup'),
+    ('cgroup', False, None),  # No silent RLIMIT_AS: it caps virtual memory, not use
+    ('auto', True, 'cgroup'),
+    ('auto', False, 'rlimit'),
+    ('rlimit', True, 'rlimit'),
+    (None, True, None),
+])
+def test_limiter_mode(cgroup, fake_resource, mode, has_cgroup, expected):
+    if not has_cgroup:
+        cgroup['path'] = None
+    assert MemoryLimiter(2048, mode=mode).mode == expected
+    assert MemoryLimiter(None, mode=mode).mode is None
+
+
+def test_cgroup_limit_is_written_per_worker(cgroup, fake_resource):
+    limiter = MemoryLimiter(2048, mode='cgroup')
+    handle = limiter.apply(1234, 'blender-1')
+    assert isinstance(handle, CgroupHandle)
+    group = f"{cgroup['path']}/blender-1"
+    assert open(f'{group}/memory.max').read() == str(2048 * MIB)
+    assert open(f'{group}/cgroup.procs').read() == '1234'
+    assert handle.oom_kills() is None
+    with open(f'{group}/memory.events', 'w') as f:
+        f.write('low 0\nhigh 0\nmax 3\noom 1\noom_kill 1\n')
+    assert handle.oom_kills() == 1
+    assert fake_resource.calls == []
+
+
+@pytest.mark.parametrize('mode', ['cgroup', 'auto'])
+def test_cgroup_failure_falls_back_to_rlimit_only_in_auto_mode(cgroup, fake_resource, mode):
+    limiter = MemoryLimiter(2048, mode=mode)
+    open(f"{cgroup['path']}/blender-1", 'w').close()  # A file where the worker's group should go
+    handle = limiter.apply(1234, 'blender-1')
+    if mode == 'cgroup':
+        assert handle is None and fake_resource.calls == []
+    else:
+        limit = (2048 + memory_limits.RLIMIT_AS_HEADROOM_MB) * MIB
+        assert isinstance(handle, RlimitHandle)
+        assert fake_resource.calls == [(1234, FakeResource.RLIMIT_AS, (limit, limit))]
+
+
+def test_meminfo_fields(tmp_path, monkeypatch):
+    meminfo = tmp_path / 'meminfo'
+    meminfo.write_text('MemTotal:       16384000 kB\nMemFree:         1024000 kB\nMemAvailable:    8192000 kB\n')
+    real_open = open
+    monkeypatch.setattr('builtins.open', lambda path, *args, **kwargs: real_open(
+        meminfo if path == '/proc/meminfo' else path, *args, **kwargs))
+    assert memory_limits.total_memory_mb() == 16000
+    assert memory_limits.available_memory_mb() == 8000
+    assert memory_limits.read_meminfo_mb('SwapTotal') is None
@@ -0,0 +1,74 @@
+import threading
+import time
+
+from pipeline import Stage, StagedPipeline
+
+
+def test_every_job_completes_once():
+    completed = []
+    lock = threading.Lock()
+
+    def on_complete(job, success):
+        with lock:
+            completed.append((job['id'], success))
+
+    def download(job):
+        job['steps'] = ['download']
+        return job['id'] != 3
+
+    def convert(job):
+        if job['id'] == 5:
+            raise RuntimeError("boom")
+        job['steps'].append('convert')
+        return True
+
+    def upload(job):
+        job['steps'].append('upload')
+        return True
+
+    jobs = [{'id': i} for i in range(10)]
+    pipeline = StagedPipeline(
+        [Stage('download', download, workers=2), Stage('convert', convert, workers=3), Stage('upload', upload)],
+        on_complete
+    )
+    pipeline.run(iter(jobs))
+
+    assert sorted(completed) == [(i, i not in (3, 5)) for i in range(10)]
+    assert all(job['steps'] == ['download', 'convert', 'upload'] for job in jobs if job['id'] not in (3, 5))
+    assert pipeline.queue_depths() == {'download': 0, 'convert': 0, 'upload': 0}
+
+
+def test_bounded_queues_apply_backpressure():
+    started = []
+    release = threading.Event()
+
+    def slow(job):
+        release.wait(5)
+        return True
+
+    def fast(job):
+        started.append(job)
+        return True
+
+    pipeline = StagedPipeline([Stage('fast', fast, queue_size=1), Stage('slow', slow, queue_size=1)],
+                              lambda job, success: None)
+    runner = threading.Thread(target=pipeline.run, args=(range(10),))
+    runner.start()
+    time.sleep(0.2)
+    # One job in the slow stage, one waiting for it, one blocked in the fast stage
+    assert len(started) <= 3
+    release.set()
+    runner.join(5)
+    assert not runner.is_alive()
+    assert len(started) == 10
+
+
+def test_completion_handler_errors_do_not_stop_the_pipeline():
+    seen = []
+
+    def on_complete(job, success):
+        seen.append(job)
+        raise ValueError("handler bug")
+
+    StagedPipeline([Stage('only', lambda job: True)], on_complete).run(range(3))
+    assert sorted(seen) == [0, 1, 2]
@@ -0,0 +1,116 @@
+import json
+
+import pytest
+
+from s3_events import LocalSQSClient, SQSEventSource, parse_s3_records
+
+QUEUE = 'local-queue'
+
+
+def record(key, event='ObjectCreated:Put', bucket='bucket', size=10, etag='e'):
+    return {'eventName': event, 's3': {'bucket': {'name': bucket},
+                                       'object': {'key': key, 'size': size, 'eTag': etag}}}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def sqs(clock):
+    return LocalSQSClient(visibility_timeout=30, clock=clock)
+
+
+def send(sqs, *keys):
+    sqs.send_message(QueueUrl=QUEUE, MessageBody=json.dumps({'Records': [record(key) for key in keys]}))
+
+
+def test_parse_records():
+    event = {'Records': [
+        record('scans/My+Room%281%29.usdz'),
+        record('scans/gone.usdz', event='ObjectRemoved:Delete'),
+        {'eventName': 'ObjectCreated:Put', 's3': {'bucket': {'name': 'bucket'}}},  # No object
+    ]}
+    assert parse_s3_records(event) == [
+        {'Bucket': 'bucket', 'Key': 'scans/My Room(1).usdz', 'Size': 10, 'ETag': 'e'}
+    ]
+
+
+def test_parse_sns_envelope():
+    wrapped = {'Type': 'Notification', 'Message': json.dumps({'Records': [record('scans/a.usdz')]})}
+    assert [obj['Key'] for obj in parse_s3_records(wrapped)] == ['scans/a.usdz']
+    assert parse_s3_records({'Message': 'not json'}) == []
+    assert parse_s3_records({'Event': 's3:TestEvent'}) == []
+
+
+def test_poll_tags_objects_with_their_message(sqs):
+    send(sqs, 'scans/a.usdz', 'scans/b.usdz')
+    sqs.send_message(QueueUrl=QUEUE, MessageBody='not json')
+    sqs.send_message(QueueUrl=QUEUE, MessageBody=json.dumps({'Event': 's3:TestEvent'}))
+    source = SQSEventSource(sqs, QUEUE, wait_time=0)
+
+    objects, handles = source.poll()
+    assert [obj['Key'] for obj in objects] == ['scans/a.usdz', 'scans/b.usdz']
+    assert len(handles) == 3  # Unparseable and test messages are returned for acknowledgement
+    assert objects[0]['ReceiptHandle'] == objects[1]['ReceiptHandle'] == handles[0]
+
+
+def test_ack_on_success_deletes_the_message(sqs, clock):
+    send(sqs, 'scans/a.usdz')
+    source = SQSEventSource(sqs, QUEUE, wait_time=0)
+    _, handles = source.poll()
+    source.ack(handles)
+
+    clock.now += 60
+    assert source.poll() == ([], [])
+
+
+def test_failure_is_redelivered_after_visibility_timeout(sqs, clock):
+    send(sqs, 'scans/a.usdz')
+    source = SQSEventSource(sqs, QUEUE, wait_time=0, visibility_timeout=30)
+    _, (handle,) = source.poll()
+
+    clock.now += 29
+    assert source.poll() == ([], [])
+    clock.now += 1
+    objects, (redelivered,) = source.poll()
+    assert [obj['Key'] for obj in objects] == ['scans/a.usdz']
+    assert redelivered != handle
+    assert source.extend([handle], 30) == [handle]  # The old handle is stale now
+
+
+def test_extended_message_is_not_redelivered(sqs, clock):
+    send(sqs, 'scans/large.usdz')
+    source = SQSEventSource(sqs, QUEUE, wait_time=0, visibility_timeout=30)
+    _, handles = source.poll()
+
+    for _ in range(5):  # A job outlasting the visibility timeout several times over
+        clock.now += 20
+        assert source.extend(handles, 30) == []
+        assert source.poll() == ([], [])
+    source.ack(handles)
+    clock.now += 60
+    assert source.poll() == ([], [])
+
+
+def test_ack_and_extend_errors_are_logged_not_raised(caplog):
+    class BrokenSQS:
+        def delete_message(self, **kwargs):
+            raise RuntimeError('network down')
+
+        def change_message_visibility(self, **kwargs):
+            raise RuntimeError('network down')
+
+    source = SQSEventSource(BrokenSQS(), QUEUE)
+    source.ack(['h1'])
+    assert source.extend(['h1', 'h2'], 30) == ['h1', 'h2']
+    assert 'network down' in caplog.text
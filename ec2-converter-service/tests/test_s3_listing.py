@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta, timezone
+
+from s3_listing import IncrementalLister
+
+T0 = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class StubPaginator:
+    def __init__(self, client):
+        self.client = client
+
+    def paginate(self, Bucket, Prefix, StartAfter=None):
+        self.client.calls.append({'Prefix': Prefix, 'StartAfter': StartAfter})
+        keys = sorted(key for key in self.client.objects if key.startswith(Prefix))
+        if StartAfter:
+            keys = [key for key in keys if key > StartAfter]
+        for i in range(0, len(keys), 2):  # Two keys per page
+            yield {'Contents': [dict(self.client.objects[key], Key=key) for key in keys[i:i + 2]]}
+
+
+class StubS3:
+    def __init__(self):
+        self.objects = {}
+        self.calls = []
+
+    def put(self, key, modified):
+        self.objects[key] = {'LastModified': modified, 'ETag': '"e"', 'Size': 1}
+
+    def get_paginator(self, name):
+        assert name == 'list_objects_v2'
+        return StubPaginator(self)
+
+
+def keys(objects):
+    return sorted(obj['Key'] for obj in objects)
+
+
+def make_lister(tmp_path, client, **kwargs):
+    return IncrementalLister(client, 'bucket', 'scans/', str(tmp_path / 'watermark.json'), **kwargs)
+
+
+def test_first_poll_lists_everything_across_pages(tmp_path):
+    client = StubS3()
+    for name in ('a', 'b', 'c', 'd', 'e'):
+        client.put(f'scans/{name}.usdz', T0)
+    client.put('scans/readme.txt', T0)
+    assert keys(make_lister(tmp_path, client).list_objects()) == [f'scans/{n}.usdz' for n in 'abcde']
+
+
+def test_polls_start_after_newest_key(tmp_path):
+    client = StubS3()
+    client.put('scans/0001.usdz', T0)
+    lister = make_lister(tmp_path, client)
+    lister.list_objects()
+    lister.commit()
+
+    client.put('scans/0002.usdz', T0 + timedelta(hours=1))
+    assert keys(lister.list_objects()) == ['scans/0002.usdz']
+    assert client.calls[-1]['StartAfter'] == 'scans/0001.usdz'
+
+
+def test_key_sorting_before_watermark_waits_for_full_listing(tmp_path):
+    client = StubS3()
+    client.put('scans/m.usdz', T0)
+    lister = make_lister(tmp_path, client)
+    lister.list_objects()
+    lister.commit()
+
+    client.put('scans/a.usdz', T0 + timedelta(hours=1))
+    assert keys(lister.list_objects()) == []
+    assert 'scans/a.usdz' in keys(lister.list_objects(full=True))
+
+
+def test_listing_whole_prefix_finds_key_sorting_before_watermark(tmp_path):
+    client = StubS3()
+    client.put('scans/m.usdz', T0)
+    lister = make_lister(tmp_path, client, list_after_last_key=False)
+    lister.list_objects()
+    lister.commit()
+
+    client.put('scans/a.usdz', T0 + timedelta(hours=1))
+    assert 'scans/a.usdz' in keys(lister.list_objects())
+    assert all(call['StartAfter'] is None for call in client.calls)
+
+
+def test_watermark_follows_newest_object_past_stray_key(tmp_path):
+    client = StubS3()
+    client.put('scans/RoomPlan-1.usdz', T0)
+    client.put('scans/test.usdz', T0 + timedelta(hours=1))  # Sorts after every RoomPlan name
+    lister = make_lister(tmp_path, client, overlap_seconds=0)
+    lister.list_objects()
+    lister.commit()
+
+    client.put('scans/RoomPlan-2.usdz', T0 + timedelta(hours=2))
+    assert keys(lister.list_objects()) == []
+    assert keys(lister.list_objects(full=True))[:2] == ['scans/RoomPlan-1.usdz', 'scans/RoomPlan-2.usdz']
+    lister.commit()
+    assert lister.watermark['start_after'] == 'scans/RoomPlan-2.usdz'
+
+    client.put('scans/RoomPlan-3.usdz', T0 + timedelta(hours=3))
+    assert 'scans/RoomPlan-3.usdz' in keys(lister.list_objects())
+
+
+def test_objects_older_than_overlap_are_filtered(tmp_path):
+    client = StubS3()
+    client.put('scans/old.usdz', T0)
+    client.put('scans/recent.usdz', T0 + timedelta(hours=1) - timedelta(seconds=60))
+    client.put('scans/new.usdz', T0 + timedelta(hours=1))
+    lister = make_lister(tmp_path, client, overlap_seconds=300, list_after_last_key=False)
+    lister.list_objects()
+    lister.commit()
+
+    client.put('scans/newer.usdz', T0 + timedelta(hours=2))
+    lister.list_objects()
+    lister.commit()
+    # Within the overlap window of the 2h watermark: only newer.usdz
+    assert keys(lister.list_objects()) == ['scans/newer.usdz']
+
+
+def test_overlap_window_relists_recent_objects(tmp_path):
+    client = StubS3()
+    client.put('scans/a.usdz', T0)
+    lister = make_lister(tmp_path, client, overlap_seconds=300, list_after_last_key=False)
+    lister.list_objects()
+    lister.commit()
+
+    # Uploaded before the watermark time but listed late (e.g. a slow multipart upload)
+    client.put('scans/late.usdz', T0 - timedelta(seconds=120))
+    assert keys(lister.list_objects()) == ['scans/a.usdz', 'scans/late.usdz']
+
+
+def test_watermark_only_persists_on_commit(tmp_path):
+    client = StubS3()
+    client.put('scans/a.usdz', T0)
+    lister = make_lister(tmp_path, client, overlap_seconds=0)
+    lister.list_objects()
+    assert not (tmp_path / 'watermark.json').exists()
+    lister.commit()
+
+    reloaded = make_lister(tmp_path, client, overlap_seconds=0, list_after_last_key=False)
+    assert reloaded.watermark == {'start_after': 'scans/a.usdz', 'last_modified': T0.isoformat()}
+    assert keys(reloaded.list_objects()) == ['scans/a.usdz']  # Same LastModified is kept
+    client.put('scans/b.usdz', T0 + timedelta(seconds=1))
+    assert keys(reloaded.list_objects()) == ['scans/a.usdz', 'scans/b.usdz']
+
+
+def test_full_listing_ignores_watermark(tmp_path):
+    client = StubS3()
+    client.put('scans/a.usdz', T0)
+    client.put('scans/b.usdz', T0 + timedelta(days=1))
+    lister = make_lister(tmp_path, client)
+    lister.list_objects()
+    lister.commit()
+    assert keys(lister.list_objects()) == []
+    assert keys(lister.list_objects(full=True)) == ['scans/a.usdz', 'scans/b.usdz']
+
+
+def test_partitions_list_from_watermark_day(tmp_path):
+    client = StubS3()
+    today = datetime.now(timezone.utc)
+    client.put(f"scans/{today:%Y/%m/%d}/a.usdz", today)
+    lister = make_lister(tmp_path, client, partition_format='%Y/%m/%d/', partition_lookback_days=1)
+    lister.list_objects()
+    lister.commit()
+
+    client.calls.clear()
+    client.put(f"scans/{today:%Y/%m/%d}/b.usdz", today)
+    assert f"scans/{today:%Y/%m/%d}/b.usdz" in keys(lister.list_objects())
+    yesterday = today - timedelta(days=1)
+    assert client.calls == [
+        {'Prefix': f"scans/{yesterday:%Y/%m/%d}/", 'StartAfter': None},
+        {'Prefix': f"scans/{today:%Y/%m/%d}/", 'StartAfter': f"scans/{today:%Y/%m/%d}/a.usdz"},
+    ]
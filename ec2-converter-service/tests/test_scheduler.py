@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+
+import scheduler
+from scheduler import SizeScheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(scheduler.time, 'time', clock)
+    return clock
+
+
+def obj(key, size):
+    return {'Key': key, 'Size': size}
+
+
+def keys(objects):
+    return [o['Key'] for o in objects]
+
+
+def test_order_is_smallest_first_and_stable(clock):
+    s = SizeScheduler()
+    assert keys(s.order([obj('c', 30), obj('a', 10), obj('b', 10), obj('n', None)])) == ['n', 'a', 'b', 'c']
+
+
+def test_aging_lets_a_waiting_file_overtake(clock):
+    s = SizeScheduler(aging_seconds=600)
+    s.order([obj('big', 300)])
+    clock.now += 600  # Ranks as 150 after one aging period
+    assert keys(s.order([obj('big', 300), obj('new', 200)])) == ['big', 'new']
+    clock.now += 600  # And as 100 after two, while 'new' has aged once (100 too; ties keep their order)
+    assert keys(s.order([obj('newer', 120), obj('new', 200), obj('big', 300)])) == ['new', 'big', 'newer']
+
+
+def test_without_aging_size_decides(clock):
+    s = SizeScheduler(aging_seconds=0)
+    s.order([obj('big', 300)])
+    clock.now += 10 ** 6
+    assert keys(s.order([obj('big', 300), obj('new', 200)])) == ['new', 'big']
+
+
+def test_push_pop_discard(clock):
+    s = SizeScheduler()
+    assert s.push([obj('b', 20), obj('a', 10)]) == 2
+    assert s.push([obj('a', 10)]) == 0  # Already queued
+    assert 'a' in s and len(s) == 2
+
+    assert s.pop()['Key'] == 'a'
+    assert 'a' in s and len(s) == 1 and s.active() == 1
+    assert s.push([obj('a', 10)]) == 0  # Still running
+
+    s.discard('a')
+    assert 'a' not in s and s.active() == 0
+    assert s.pop()['Key'] == 'b'
+    assert s.pop() is None
+
+
+def test_queued_large_file_ages(clock):
+    s = SizeScheduler(aging_seconds=600)
+    s.push([obj('huge', 900)])
+    clock.now += 1800  # Ranks as 225
+    s.push([obj('large', 300)])
+    assert s.pop()['Key'] == 'huge'
+
+
+def test_discard_forgets_wait_time(clock):
+    s = SizeScheduler(aging_seconds=600)
+    s.order([obj('a', 300)])
+    clock.now += 6000
+    s.discard('a')
+    # Seen again (e.g. re-uploaded): it starts waiting from now
+    assert keys(s.order([obj('a', 300), obj('b', 200)])) == ['b', 'a']
+
+
+def test_wait_wakes_on_push():
+    s = SizeScheduler()
+    assert not s.wait(timeout=0.01)
+    threading.Timer(0.05, s.push, args=([obj('a', 1)],)).start()
+    assert s.wait(timeout=5)
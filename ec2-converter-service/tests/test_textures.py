@@ -0,0 +1,99 @@
+import io
+import os
+
+import pytest
+
+import textures
+from glb import GlbBuilder, read_glb
+from textures import TextureProcessor, _fit, transcode_bytes
+
+needs_pillow = pytest.mark.skipif(textures.Image is None, reason='Pillow is not installed')
+
+
+def png(size, mode='RGB'):
+    buffer = io.BytesIO()
+    textures.Image.new(mode, size, (200, 120, 40, 128)[:len(mode)]).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def processor(tmp_path):
+    processor = TextureProcessor(str(tmp_path / 'cache'), max_size=64, image_format='webp', workers=1)
+    yield processor
+    processor.shutdown()
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match='gif'):
+        TextureProcessor(str(tmp_path), image_format='gif')
+
+
+@needs_pillow
+@pytest.mark.parametrize('max_size, expected', [(None, (400, 200)), (0, (400, 200)), (100, (100, 50)),
+                                                (1000, (400, 200))])
+def test_fit(max_size, expected):
+    assert _fit(textures.Image.new('RGB', (400, 200)), max_size).size == expected
+
+
+@needs_pillow
+@pytest.mark.parametrize('mode', ['RGB', 'RGBA', 'P'])
+def test_transcode_bytes_to_webp(tmp_path, mode):
+    target = str(tmp_path / 'out.webp')
+    size = transcode_bytes(png((300, 150), mode), target, 'webp', None, 80, None)
+    assert size == os.path.getsize(target)
+    with textures.Image.open(target) as image:
+        assert image.format == 'WEBP'
+        assert image.size == (300, 150)  # max_size None keeps the original size
+        assert image.mode == ('RGBA' if mode == 'RGBA' else 'RGB')
+
+
+@needs_pillow
+def test_transcode_glb_embeds_webp(tmp_path, processor):
+    builder = GlbBuilder()
+    view = builder.add_buffer_view(png((256, 128)))
+    builder.add('images', {'bufferView': view, 'mimeType': 'image/png'})
+    builder.add('textures', {'source': 0})
+    glb_path = str(tmp_path / 'textured.glb')
+    builder.write(glb_path)
+
+    stats = processor.transcode_glb(glb_path)
+    assert stats['images'] == 1 and stats['cached'] == 0
+    gltf, binary = read_glb(glb_path)
+    assert gltf['images'][0]['mimeType'] == 'image/webp'
+    assert gltf['textures'][0] == {'extensions': {'EXT_texture_webp': {'source': 0}}}
+    assert 'EXT_texture_webp' in gltf['extensionsRequired']
+    view = gltf['bufferViews'][gltf['images'][0]['bufferView']]
+    start = view.get('byteOffset', 0)
+    with textures.Image.open(io.BytesIO(binary[start:start + view['byteLength']])) as image:
+        assert image.format == 'WEBP' and image.size == (64, 32)
+
+    builder.write(glb_path)
+    assert processor.transcode_glb(glb_path)['cached'] == 1
+
+
+@needs_pillow
+def test_downscale_files_in_place_and_cached(tmp_path, processor):
+    paths = []
+    for name in ('a.png', 'b.png'):  # Same bytes: one task for both
+        path = tmp_path / name
+        path.write_bytes(png((200, 100)))
+        paths.append(str(path))
+    small = tmp_path / 'small.png'
+    small.write_bytes(png((32, 32)))
+    paths += [str(small), str(tmp_path / 'notes.txt')]
+
+    stats = processor.downscale_files(paths)
+    assert (stats['images'], stats['processed'], stats['cached']) == (3, 2, 0)
+    with textures.Image.open(paths[1]) as image:
+        assert image.size == (64, 32)
+    again = tmp_path / 'c.png'
+    again.write_bytes(png((200, 100)))
+    assert processor.downscale_files([str(again)])['cached'] == 1
+
+
+def test_without_pillow_textures_pass_through(tmp_path, monkeypatch):
+    monkeypatch.setattr(textures, 'Image', None)
+    processor = TextureProcessor(str(tmp_path / 'cache'))
+    assert not processor.available
+    assert processor.downscale_files([str(tmp_path / 'a.png')])['images'] == 0
+    assert processor.transcode_glb(str(tmp_path / 'missing.glb')) is None
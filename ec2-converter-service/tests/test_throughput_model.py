@@ -0,0 +1,75 @@
+import pytest
+
+from glb import read_glb
+from throughput_model import ThroughputModel, fit_nonnegative, glb_triangles
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def model(tmp_path):
+    return ThroughputModel(str(tmp_path / 'jobs.db'), multiplier=4.0, min_deadline=30, max_deadline=600,
+                           min_samples=6)
+
+
+def runs(model, seconds, count, backend='blender', ok=True):
+    """Runs taking seconds(mb, layers), over a spread of sizes and layer counts"""
+    for i in range(count):
+        mb, layers = 1 + i % 5, 2 + 3 * (i % 3)
+        model.record(backend, mb * MB, layers, 100, seconds(mb, layers), ok=ok, usdc=False, textures=0)
+
+
+def test_fit_recovers_coefficients():
+    rows = [(1.0, mb, layers) for mb in (1, 2, 5, 10) for layers in (1, 4, 9)]
+    targets = [2.0 + 3.0 * mb + 0.5 * layers for _, mb, layers in rows]
+    assert fit_nonnegative(rows, targets) == pytest.approx([2.0, 3.0, 0.5], abs=1e-4)
+
+
+def test_fit_clamps_negative_coefficients():
+    # More layers "saves" time here; the fit drops that feature instead of predicting negative durations
+    rows = [(1.0, mb, layers) for mb in (1, 2, 5, 10) for layers in (1, 4, 9)]
+    targets = [10.0 + 2.0 * mb - 1.0 * layers for _, mb, layers in rows]
+    intercept, per_mb, per_layer = fit_nonnegative(rows, targets)
+    assert per_layer == 0.0
+    assert intercept > 0 and per_mb == pytest.approx(2.0, abs=1e-4)
+
+
+def test_no_prediction_below_min_samples(model):
+    runs(model, lambda mb, layers: 5.0 + 2.0 * mb, 5)
+    runs(model, lambda mb, layers: 1.0, 10, ok=False)  # Failures are not timings
+    assert model.predict('blender', 3 * MB, 5) is None
+    assert model.deadline('blender', 3 * MB, 5) == (600, None)
+
+    runs(model, lambda mb, layers: 5.0 + 2.0 * mb, 1)
+    assert model.predict('blender', 3 * MB, 5) == pytest.approx(11.0, abs=1e-3)
+    assert model.predict('native', 3 * MB, 5) is None  # Per backend
+
+
+def test_deadline_doubles_per_attempt_within_bounds(model):
+    runs(model, lambda mb, layers: 5.0 * mb, 12)
+    timeout, predicted = model.deadline('blender', 2 * MB, 5)
+    assert predicted == pytest.approx(10.0, abs=1e-3)
+    assert timeout == pytest.approx(40.0, abs=1e-2)
+    assert model.deadline('blender', 2 * MB, 5, attempt=2)[0] == pytest.approx(80.0, abs=1e-2)
+    assert model.deadline('blender', 2 * MB, 5, attempt=3)[0] == pytest.approx(160.0, abs=1e-2)
+    assert model.deadline('blender', 2 * MB, 5, attempt=5)[0] == 600  # Capped
+    assert model.deadline('blender', MB // 10, 5)[0] == 30  # Floored
+
+
+def test_memory_model_and_success_rate(model):
+    for i in range(8):
+        mb = 1 + i % 4
+        model.record('blender', mb * MB, 3, None, 1.0, ok=i % 4 != 0, memory_mb=100 + 50 * mb,
+                     usdc=False, textures=0)
+    model.record('blender', MB, 3, None, 1.0, ok=False, usdc=True, textures=2)
+    assert model.predict_memory('blender', 2 * MB, 3) == pytest.approx(200.0, abs=1e-2)
+    assert model.success_rate('blender', False, False) == (0.75, 8)
+    assert model.success_rate('blender', True, True) == (0.0, 1)
+    assert model.success_rate('native', False, False) == (0.0, 0)
+
+
+def test_glb_triangles(scan_glb):
+    gltf, _ = read_glb(scan_glb)
+    expected = sum(gltf['accessors'][primitive['indices']]['count'] // 3
+                   for mesh in gltf['meshes'] for primitive in mesh['primitives'])
+    assert glb_triangles(scan_glb) == expected > 0
@@ -0,0 +1,198 @@
+import os
+
+import numpy as np
+import pytest
+
+from generate_corpus import build_scan, write_usdz
+from glb import accessor_array, read_glb
+from usda_native import (
+    Asset, NativeConverter, Reference, SdfPath, Stage, UnsupportedUsd, convert_usdz_native, parse_usda,
+    triangulate,
+)
+from usdz_reader import UsdzArchive
+
+
+class DictArchive:
+    """Layers by archive name, with the view() UsdzArchive offers"""
+
+    def __init__(self, layers):
+        self.layers = {name: text.encode('utf-8') for name, text in layers.items()}
+
+    def view(self, name):
+        return memoryview(self.layers[name])
+
+
+MESH = '''
+    def Mesh "Box" (
+        prepend apiSchemas = ["MaterialBindingAPI"]
+    )
+    {
+        int[] faceVertexCounts = [4, 3]
+        int[] faceVertexIndices = [0, 1, 2, 3, 0, 2, 4]
+        point3f[] points = [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0), (0, 0, 1)]
+        normal3f[] normals = [(0, 0, 1), (0, 0, 1), (0, 0, 1), (0, 0, 1), (0, 1, 0)] (
+            interpolation = "vertex"
+        )
+        double3 xformOp:translate = (1, 2, 3)
+        uniform token[] xformOpOrder = ["xformOp:translate"]
+    }
+'''
+
+
+def test_tokenizer_values():
+    layer = parse_usda('''#usda 1.0
+(
+    defaultPrim = "Root"  # trailing comment
+    doc = """multi
+line"""
+    metersPerUnit = 1
+    upAxis = "Y"
+)
+
+def Xform "Root" (
+    kind = "assembly"
+    prepend references = [@./a.usda@</Thing>, @b.usda@]
+    customData = {
+        string label = "Room \\"A\\""
+        int[] ids = [1, 2]
+    }
+)
+{
+    custom float weight = 2.5e-1
+    bool flag = true
+    rel material:binding = </Root/Looks/Mat>
+    float[] values = [-1, .5, 3e2]
+}
+''', 'root.usda')
+    assert layer.default_prim == 'Root'
+    assert layer.metadata['doc'] == 'multi\nline'
+    assert layer.metadata['metersPerUnit'] == 1 and isinstance(layer.metadata['metersPerUnit'], int)
+
+    root = layer.prims['Root']
+    assert root.specifier == 'def' and root.type_name == 'Xform'
+    first, second = root.metadata['references']
+    assert isinstance(first, Reference) and first.asset == './a.usda' and first.prim_path == '/Thing'
+    assert isinstance(second, Asset) and second == 'b.usda'
+    assert root.metadata['customData']['label'] == 'Room "A"'
+    assert root.metadata['customData']['ids'].tolist() == [1, 2]
+    assert root.properties['weight'] == 0.25
+    assert root.properties['flag'] is True
+    assert isinstance(root.properties['material:binding'], SdfPath)
+    assert root.properties['values'].tolist() == [-1.0, 0.5, 300.0]
+
+
+def test_numeric_tuple_arrays_are_numpy():
+    layer = parse_usda('#usda 1.0\ndef Mesh "M"\n{\n' + MESH.split('{', 1)[1].rsplit('}', 1)[0] + '}\n')
+    points = layer.prims['M'].properties['points']
+    assert isinstance(points, np.ndarray) and points.shape == (5, 3)
+
+
+@pytest.mark.parametrize('text', [
+    '#usda 1.0\ndef Xform "A"\n{\n    float x.timeSamples = {0: 1}\n}\n',
+    '#usda 1.0\ndef Xform "A"\n{\n    variantSet "v" = {}\n}\n',
+    'PXR-USDC',
+])
+def test_unsupported_syntax(text):
+    with pytest.raises(UnsupportedUsd):
+        parse_usda(text)
+
+
+def test_triangulate_fans_polygons():
+    corners = triangulate([4, 3, 2], np.arange(9))
+    assert corners.tolist() == [[0, 1, 2], [0, 2, 3], [4, 5, 6]]
+
+
+def test_references_and_sublayers_compose():
+    archive = DictArchive({
+        'root.usda': '''#usda 1.0
+(
+    defaultPrim = "Root"
+    subLayers = [@extra.usda@]
+)
+
+def Xform "Root"
+{
+    def Xform "Chair_grp" (
+        prepend references = @./assets/chair.usda@
+    )
+    {
+        float size = 2
+    }
+}
+''',
+        'extra.usda': '''#usda 1.0
+over "Root"
+{
+    def Xform "Extra"
+    {
+    }
+}
+''',
+        'assets/chair.usda': '''#usda 1.0
+(
+    defaultPrim = "Chair"
+)
+
+def Xform "Chair"
+{
+    float size = 1
+    rel material:binding = </Chair/Looks/Red>
+''' + MESH + '''
+}
+''',
+    })
+    stage = Stage(archive, 'root.usda')
+    assert stage.layers_used == {'root.usda', 'extra.usda', 'assets/chair.usda'}
+    chair = stage.prim_at('/Root/Chair_grp')
+    assert chair.properties['size'] == 2  # The referencing layer is stronger
+    assert chair.properties['material:binding'] == '/Root/Chair_grp/Looks/Red'  # Remapped
+    assert stage.prim_at('/Root/Chair_grp/Box').type_name == 'Mesh'
+    assert stage.prim_at('/Root/Extra') is not None
+
+
+def test_reference_cycle_is_unsupported():
+    archive = DictArchive({
+        'a.usda': '#usda 1.0\n(\n    defaultPrim = "A"\n)\n\ndef Xform "A" (\n    references = @b.usda@\n)\n{\n}\n',
+        'b.usda': '#usda 1.0\n(\n    defaultPrim = "B"\n)\n\ndef Xform "B" (\n    references = @a.usda@\n)\n{\n}\n',
+    })
+    with pytest.raises(UnsupportedUsd):
+        Stage(archive, 'a.usda')
+
+
+def test_missing_layer_is_unsupported():
+    archive = DictArchive({'a.usda': '#usda 1.0\ndef Xform "A" (\n    references = @gone.usda@\n)\n{\n}\n'})
+    with pytest.raises(UnsupportedUsd):
+        Stage(archive, 'a.usda')
+
+
+def test_mesh_geometry_in_glb(tmp_path):
+    archive = DictArchive({'m.usda': '#usda 1.0\n(\n    metersPerUnit = 1\n)\n\ndef Xform "Root"\n{\n' + MESH + '}\n'})
+    converter = NativeConverter(archive, 'm.usda')
+    converter.convert(str(tmp_path / 'm.glb'))
+    assert (converter.meshes, converter.triangles) == (1, 3)
+
+    gltf, binary = read_glb(str(tmp_path / 'm.glb'))
+    box = next(node for node in gltf['nodes'] if node['name'] == 'Box')
+    assert box['matrix'][12:15] == [1, 2, 3]
+    primitive = gltf['meshes'][box['mesh']]['primitives'][0]
+    positions = accessor_array(gltf, binary, primitive['attributes']['POSITION'])
+    indices = accessor_array(gltf, binary, primitive['indices']).reshape(-1, 3)
+    assert positions[indices].tolist() == [
+        [[0, 0, 0], [1, 0, 0], [1, 1, 0]],
+        [[0, 0, 0], [1, 1, 0], [0, 1, 0]],
+        [[0, 0, 0], [1, 1, 0], [0, 0, 1]],
+    ]
+
+
+def test_generated_scan_converts(tmp_path):
+    path = str(tmp_path / 'scan.usdz')
+    files = build_scan('scan', walls=4, objects=3, density=2, layers=3)
+    boxes = sum(data.count(b'def Mesh') for data in files.values())
+    write_usdz(path, files)
+    with UsdzArchive(path) as archive:
+        stats = convert_usdz_native(archive, str(tmp_path / 'scan.glb'), 'scan.usda')
+    # Boxes of 6 faces, each split into 2 x 2 quads of 2 triangles
+    assert stats['meshes'] == boxes
+    assert stats['triangles'] == boxes * 6 * 4 * 2
+    assert stats['layers'] == 4
+    assert stats['glb_size'] == os.path.getsize(tmp_path / 'scan.glb')
@@ -0,0 +1,74 @@
+import logging
+import os
+import zipfile
+
+import pytest
+
+from generate_corpus import write_usdz
+from usdz_reader import UsdzArchive, UsdzError
+
+LAYER = b'#usda 1.0\ndef Xform "Scan"\n{\n}\n'
+
+
+@pytest.fixture
+def usdz(tmp_path):
+    path = str(tmp_path / 'scan.usdz')
+    write_usdz(path, {'scan.usda': LAYER, 'textures/t.png': b'\x89PNG' * 100})
+    return path
+
+
+def test_stored_entries_are_aligned_zero_copy_views(usdz):
+    with UsdzArchive(usdz) as archive:
+        assert archive.names() == ['scan.usda', 'textures/t.png']
+        assert archive.layer_names() == ['scan.usda']
+        assert 'scan.usda' in archive and 'other.usda' not in archive
+        view = archive.view('scan.usda')
+        assert bytes(view) == LAYER
+        assert isinstance(view.obj, type(archive._map))  # A slice of the memory map, not a copy
+        assert archive._data_offset(archive.entries[0]) % 64 == 0
+        assert archive.read_text('scan.usda') == LAYER.decode()
+        assert archive.size('textures/t.png') == 400
+        del view
+
+
+def test_deflated_entries_are_read_as_copies(tmp_path, caplog):
+    path = str(tmp_path / 'zipped.usdz')
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('scan.usda', LAYER * 50)
+    with UsdzArchive(path) as archive:
+        with caplog.at_level(logging.WARNING):
+            assert bytes(archive.view('scan.usda')) == LAYER * 50
+    assert 'compressed inside the USDZ' in caplog.text
+
+
+@pytest.mark.parametrize('data', [b'', b'PK\x03\x04 not really a zip', None])
+def test_unreadable_archives_raise_usdz_error(tmp_path, usdz, data):
+    path = tmp_path / 'bad.usdz'
+    if data is None:
+        with open(usdz, 'rb') as f:
+            data = f.read()[:-30]  # Truncated inside the central directory
+    path.write_bytes(data)
+    with pytest.raises(UsdzError):
+        UsdzArchive(str(path))
+
+
+def test_extract_writes_selected_entries(tmp_path, usdz):
+    dest = tmp_path / 'out'
+    with UsdzArchive(usdz) as archive:
+        paths = archive.extract(str(dest), ['textures/t.png'])
+        assert paths == {'textures/t.png': os.path.realpath(dest / 'textures' / 't.png')}
+        assert sorted(archive.extract(str(dest))) == ['scan.usda', 'textures/t.png']
+    assert (dest / 'scan.usda').read_bytes() == LAYER
+
+
+@pytest.mark.parametrize('name', ['../escape.usda', 'textures/../../escape.usda', '/escape.usda'])
+def test_extract_refuses_paths_outside_destination(tmp_path, name):
+    path = str(tmp_path / 'evil.usdz')
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr(zipfile.ZipInfo('scan.usda'), LAYER)
+        archive.writestr(zipfile.ZipInfo(name), b'pwned')  # Kept verbatim, as in a hostile archive
+    dest = tmp_path / 'out'
+    with UsdzArchive(path) as archive:
+        with pytest.raises(UsdzError, match='Unsafe path'):
+            archive.extract(str(dest))
+    assert not (tmp_path / 'escape.usda').exists()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+
+"""
+Texture downscaling and transcoding
+Extracted PNG/JPEG textures are shrunk to a maximum dimension before Blender
+reads them, so it decodes and re-encodes less. The images embedded in the
+output GLB are then transcoded to WebP (EXT_texture_webp) or KTX2
+(KHR_texture_basisu, via the KTX-Software `toktx` CLI). Both steps run on a
+process pool and are cached on disk by content hash, so a texture shared by
+many scans (or used twice in one) is processed once. A cache file evicted
+between lookup and read counts as a miss. Needs Pillow; without it textures
+are left as they are.
+"""
+
+import io
+import os
+import shutil
+import hashlib
+import tempfile
+import subprocess
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional - textures pass through unchanged
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+RESIZABLE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+TRANSCODABLE_MIME_TYPES = ('image/png', 'image/jpeg')
+MIME_SUFFIXES = {'image/png': '.png', 'image/jpeg': '.jpg'}
+FORMATS = {
+    'webp': ('image/webp', 'EXT_texture_webp', '.webp'),
+    'ktx2': ('image/ktx2', 'KHR_texture_basisu', '.ktx2'),
+}
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()[:40]
+
+
+def _fit(image, max_size):
+    """Shrink to max_size on the longer side (never enlarges)"""
+    if max_size and max(image.size) > max_size:
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+    return image
+
+
+def _write_atomic(target, write):
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.tmp')
+    os.close(fd)
+    try:
+        write(temp_path)
+        os.replace(temp_path, target)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def downscale_file(source, target, max_size):
+    """Pool task: write source, shrunk to max_size, to target in the same format"""
+    with Image.open(source) as image:
+        image_format = image.format
+        image.load()
+        if max(image.size) <= max_size:
+            _write_atomic(target, lambda path: shutil.copyfile(source, path))
+            return os.path.getsize(target)
+        image = _fit(image, max_size)
+        options = {'quality': 90} if image_format == 'JPEG' else {'compress_level': 6}
+        _write_atomic(target, lambda path: image.save(path, format=image_format, **options))
+    return os.path.getsize(target)
+
+
+def downscale_bytes(data, target, max_size):
+    """Pool task: write one embedded image, shrunk to max_size, to target in the same format"""
+    with Image.open(io.BytesIO(data)) as image:
+        image_format = image.format
+        image.load()
+        if max(image.size) <= max_size:
+            def copy(path):
+                with open(path, 'wb') as f:
+                    f.write(data)
+
+            _write_atomic(target, copy)
+            return len(data)
+        image = _fit(image, max_size)
+        options = {'quality': 90} if image_format == 'JPEG' else {'compress_level': 6}
+        _write_atomic(target, lambda path: image.save(path, format=image_format, **options))
+    return os.path.getsize(target)
+
+
+def transcode_bytes(data, target, image_format, max_size, quality, toktx):
+    """Pool task: encode one embedded image as WebP or KTX2 into target"""
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+        image = _fit(image, max_size)
+        if image.mode not in ('RGB', 'RGBA'):
+            has_alpha = 'A' in image.mode or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+        if image_format == 'webp':
+            _write_atomic(target, lambda path: image.save(path, format='WEBP', quality=quality, method=4))
+            return os.path.getsize(target)
+
+        with tempfile.TemporaryDirectory() as work_dir:
+            png_path = os.path.join(work_dir, 'input.png')
+            image.save(png_path, format='PNG', compress_level=1)
+
+            def encode(path):
+                result = subprocess.run(
+                    [toktx, '--t2', '--encode', 'etc1s', '--genmipmap', path, png_path],
+                    capture_output=True,
+                    text=True
+                )
+                if result.returncode != 0:
+                    raise RuntimeError(f"toktx failed: {result.stderr.strip()[-300:]}")
+
+            _write_atomic(target, encode)
+    return os.path.getsize(target)
+
+
+class TextureProcessor:
+    """Process pool plus on-disk cache for texture work"""
+
+    def __init__(self, cache_dir, max_size=2048, image_format='webp', quality=85, workers=None,
+                 toktx='toktx', cache_max_mb=1024):
+        if image_format and image_format not in FORMATS:
+            raise ValueError(f"Unknown texture format {image_format!r} (have {', '.join(FORMATS)})")
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.image_format = image_format
+        self.quality = quality
+        self.workers = workers or os.cpu_count()
+        self.toktx = shutil.which(toktx) if toktx else None
+        self.cache_max_bytes = cache_max_mb * 1024 * 1024
+        self._executor = None
+        os.makedirs(cache_dir, exist_ok=True)
+        if image_format == 'ktx2' and not self.toktx:
+            logger.warning(f"⚠️  {toktx} not found - GLB textures will not be transcoded to KTX2")
+            self.image_format = None
+
+    @property
+    def available(self):
+        return Image is not None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            # Not fork: the service has threads (pipeline stages, metrics) whose locks a fork would copy
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('forkserver')
+            )
+        return self._executor
+
+    def _cached(self, name):
+        """Cache path for name; refreshes its mtime (LRU) when it exists"""
+        path = os.path.join(self.cache_dir, name)
+        try:
+            os.utime(path)
+            return path, True
+        except FileNotFoundError:
+            return path, False
+
+    def _run(self, tasks):
+        """Run {cache_path: (function, args)} on the pool; failures are logged and skipped"""
+        futures = {path: self.executor.submit(function, *args) for path, (function, args) in tasks.items()}
+        done = set()
+        for path, future in futures.items():
+            try:
+                future.result()
+                done.add(path)
+            except Exception as e:
+                logger.warning(f"⚠️  Texture processing failed: {e}")
+        return done
+
+    def downscale_files(self, paths):
+        """Shrink extracted textures in place; returns stats"""
+        stats = {'images': 0, 'processed': 0, 'cached': 0, 'bytes_before': 0, 'bytes_after': 0}
+        if not self.available or not self.max_size:
+            return stats
+
+        targets = {}
+        tasks = {}
+        for path in paths:
+            if not path.lower().endswith(RESIZABLE_EXTENSIONS):
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            cache_path, hit = self._cached(f"{_digest(data)}-{self.max_size}{os.path.splitext(path)[1].lower()}")
+            targets.setdefault(cache_path, []).append(path)
+            stats['images'] += 1
+            stats['bytes_before'] += len(data)
+            if hit:
+                stats['cached'] += 1
+            elif cache_path not in tasks:
+                tasks[cache_path] = (downscale_file, (path, cache_path, self.max_size))
+
+        done = self._run(tasks)
+        for cache_path, same in targets.items():
+            if cache_path in tasks and cache_path not in done:
+                stats['bytes_after'] += sum(os.path.getsize(path) for path in same)
+                continue
+            for path in same:
+                try:
+                    shutil.copyfile(cache_path, path)
+                except FileNotFoundError:
+                    pass  # Evicted since the lookup - the texture stays as extracted
+                stats['bytes_after'] += os.path.getsize(path)
+        stats['processed'] = len(done)
+        if tasks:
+            self.evict()
+        return stats
+
+    def downscale_images(self, gltf, binary, max_size):
+        """Shrunk bytes of a GLB's embedded PNG/JPEG images, by buffer view index"""
+        if not self.available or not max_size:
+            return {}
+        views = gltf.get('bufferViews', [])
+        sources = {}
+        tasks = {}
+        for image in gltf.get('images', []):
+            suffix = MIME_SUFFIXES.get(image.get('mimeType'))
+            if 'bufferView' not in image or suffix is None:
+                continue
+            view = views[image['bufferView']]
+            start = view.get('byteOffset', 0)
+            data = bytes(binary[start:start + view['byteLength']])
+            cache_path, hit = self._cached(f"{_digest(data)}-{max_size}{suffix}")
+            sources[image['bufferView']] = cache_path
+            if not hit and cache_path not in tasks:
+                tasks[cache_path] = (downscale_bytes, (data, cache_path, max_size))
+
+        done = self._run(tasks)
+        images = {}
+        for view, cache_path in sources.items():
+            if cache_path in tasks and cache_path not in done:
+                continue
+            try:
+                with open(cache_path, 'rb') as f:
+                    images[view] = f.read()
+            except FileNotFoundError:
+                continue  # Evicted since the lookup - the image is copied unchanged
+        if tasks:
+            self.evict()
+        return images
+
+    def transcode_glb(self, glb_path):
+        """Re-encode the PNG/JPEG images embedded in a GLB; returns stats, or None if nothing to do"""
+        if not self.available or not self.image_format:
+            return None
+        from glb import read_glb, write_glb  # NumPy; only needed once there is a GLB to rewrite
+
+        gltf, binary = read_glb(glb_path)
+        images = gltf.get('images', [])
+        views = gltf.get('bufferViews', [])
+        if any(view.get('buffer', 0) != 0 for view in views):
+            return None  # External buffers - leave the file alone
+        mime_type, extension, suffix = FORMATS[self.image_format]
+
+        sources = {}
+        tasks = {}
+        for index, image in enumerate(images):
+            if 'bufferView' not in image or image.get('mimeType') not in TRANSCODABLE_MIME_TYPES:
+                continue
+            view = views[image['bufferView']]
+            start = view.get('byteOffset', 0)
+            data = bytes(binary[start:start + view['byteLength']])
+            cache_path, hit = self._cached(f"{_digest(data)}-{self.max_size}-q{self.quality}{suffix}")
+            sources[index] = cache_path
+            if not hit and cache_path not in tasks:
+                tasks[cache_path] = (
+                    transcode_bytes,
+                    (data, cache_path, self.image_format, self.max_size, self.quality, self.toktx)
+                )
+        if not sources:
+            return None
+
+        done = self._run(tasks)
+        replaced = {}
+        for index, cache_path in sources.items():
+            if cache_path in tasks and cache_path not in done:
+                continue
+            try:
+                with open(cache_path, 'rb') as f:
+                    replaced[images[index]['bufferView']] = (index, f.read())
+            except FileNotFoundError:
+                continue  # Evicted since the lookup - the image keeps its format
+        if tasks:
+            self.evict()
+        if not replaced:
+            return None
+
+        size_before = os.path.getsize(glb_path)
+        binary = self._rebuild_buffer(views, binary, {view: data for view, (_, data) in replaced.items()})
+        transcoded = {index for index, _ in replaced.values()}
+        for index in transcoded:
+            images[index]['mimeType'] = mime_type
+        for texture in gltf.get('textures', []):
+            if texture.get('source') in transcoded:
+                # No PNG fallback: keeping one would undo the size saving
+                texture.setdefault('extensions', {})[extension] = {'source': texture.pop('source')}
+        for key in ('extensionsUsed', 'extensionsRequired'):
+            names = gltf.setdefault(key, [])
+            if extension not in names:
+                names.append(extension)
+        size_after = write_glb(glb_path, gltf, binary)
+        return {
+            'images': len(transcoded),
+            'cached': len(sources) - len(tasks),
+            'size_before': size_before,
+            'size_after': size_after,
+        }
+
+    @staticmethod
+    def _rebuild_buffer(views, binary, replacements):
+        """New BIN chunk with some buffer views' bytes replaced; offsets re-packed, 4-byte aligned"""
+        parts = []
+        offset = 0
+        for index in sorted(range(len(views)), key=lambda i: views[i].get('byteOffset', 0)):
+            view = views[index]
+            if index in replacements:
+                data = replacements[index]
+            else:
+                start = view.get('byteOffset', 0)
+                data = binary[start:start + view['byteLength']]
+            padding = (-offset) % 4
+            parts.append(b'\x00' * padding)
+            offset += padding
+            view['byteOffset'] = offset
+            view['byteLength'] = len(data)
+            parts.append(bytes(data))
+            offset += len(data)
+        return b''.join(parts)
+
+    def evict(self):
+        """Drop least recently used cache files beyond the size limit"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Removed by another process's eviction
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.cache_max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
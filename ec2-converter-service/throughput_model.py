@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+
+"""
+Conversion throughput model
+Records the size, layer count, triangle count, duration and memory of every
+conversion in jobs.db and fits duration ~ a + b * MB + c * layers per backend
+(non-negative least squares over the most recent runs). Each job's timeout
+is a multiple of its predicted duration, bounded by a minimum and maximum,
+so a hung small scan is killed in minutes while large scans keep the full
+allowance. Memory growth is fitted the same way for admission control.
+Success rates per backend and kind of file (usdc, textured) feed backend
+selection. Triangle counts are only known after converting; they are
+stored for analysis but not used to predict.
+"""
+
+import json
+import time
+import struct
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS conversion_stats (
+    finished_at REAL NOT NULL,
+    backend TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    layers INTEGER NOT NULL,
+    triangles INTEGER,
+    duration REAL NOT NULL,
+    ok INTEGER NOT NULL,
+    peak_rss_mb REAL,
+    memory_mb REAL,
+    usdc INTEGER,
+    textures INTEGER
+);
+CREATE INDEX IF NOT EXISTS conversion_stats_backend ON conversion_stats (backend, ok, finished_at);
+'''
+
+# Columns added after the table was first created
+MIGRATIONS = (
+    'ALTER TABLE conversion_stats ADD COLUMN peak_rss_mb REAL',
+    'ALTER TABLE conversion_stats ADD COLUMN memory_mb REAL',
+    'ALTER TABLE conversion_stats ADD COLUMN usdc INTEGER',
+    'ALTER TABLE conversion_stats ADD COLUMN textures INTEGER',
+)
+
+FEATURES = ('intercept', 'mb', 'layers')
+
+
+def glb_triangles(path):
+    """Triangle count of a GLB from its JSON chunk alone (indexed or not)"""
+    with open(path, 'rb') as f:
+        magic, version, _ = struct.unpack('<III', f.read(12))
+        chunk_length, _ = struct.unpack('<II', f.read(8))
+        gltf = json.loads(f.read(chunk_length))
+    if magic != 0x46546C67 or version != 2:
+        return None
+    accessors = gltf.get('accessors', [])
+    triangles = 0
+    for mesh in gltf.get('meshes', []):
+        for primitive in mesh.get('primitives', []):
+            if primitive.get('mode', 4) != 4:
+                continue
+            source = primitive.get('indices', primitive.get('attributes', {}).get('POSITION'))
+            if source is not None:
+                triangles += accessors[source]['count'] // 3
+    return triangles
+
+
+def _features(size, layers):
+    return (1.0, size / (1024 * 1024), float(layers))
+
+
+def _solve(matrix, vector):
+    """Gaussian elimination with partial pivoting for a small dense system"""
+    n = len(vector)
+    a = [list(row) + [value] for row, value in zip(matrix, vector)]
+    for column in range(n):
+        pivot = max(range(column, n), key=lambda row: abs(a[row][column]))
+        if abs(a[pivot][column]) < 1e-12:
+            return None
+        a[column], a[pivot] = a[pivot], a[column]
+        for row in range(column + 1, n):
+            factor = a[row][column] / a[column][column]
+            for k in range(column, n + 1):
+                a[row][k] -= factor * a[column][k]
+    solution = [0.0] * n
+    for row in reversed(range(n)):
+        solution[row] = (a[row][n] - sum(a[row][k] * solution[k] for k in range(row + 1, n))) / a[row][row]
+    return solution
+
+
+def fit_nonnegative(rows, targets, ridge=1e-6):
+    """Least squares with coefficients >= 0: drop the most negative feature and refit"""
+    active = list(range(len(rows[0])))
+    while active:
+        normal = [[sum(row[i] * row[j] for row in rows) + (ridge if i == j else 0.0) for j in active]
+                  for i in active]
+        moment = [sum(row[i] * y for row, y in zip(rows, targets)) for i in active]
+        solution = _solve(normal, moment)
+        if solution is None:
+            return None
+        if min(solution) >= 0:
+            coefficients = [0.0] * len(rows[0])
+            for index, value in zip(active, solution):
+                coefficients[index] = value
+            return coefficients
+        del active[solution.index(min(solution))]
+    return None
+
+
+class ThroughputModel:
+    """Per-backend duration predictor and deadline policy backed by SQLite"""
+
+    def __init__(self, db_path, multiplier=4.0, min_deadline=120, max_deadline=1800,
+                 min_samples=20, window=500):
+        self.multiplier = multiplier
+        self.min_deadline = min_deadline
+        self.max_deadline = max_deadline
+        self.min_samples = min_samples
+        self.window = window
+        self._models = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        for statement in MIGRATIONS:
+            try:
+                self._conn.execute(statement)
+            except sqlite3.OperationalError:
+                pass  # Column exists already
+
+    def record(self, backend, size, layers, triangles, duration, ok=True, peak_rss_mb=None, memory_mb=None,
+               usdc=None, textures=None):
+        """Store one conversion; successful ones refine the backend's models"""
+        if size is None or layers is None or duration is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO conversion_stats '
+                '(finished_at, backend, size, layers, triangles, duration, ok, peak_rss_mb, memory_mb, usdc, textures) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (time.time(), backend, size, layers, triangles, duration, int(ok), peak_rss_mb, memory_mb,
+                 None if usdc is None else int(usdc), textures)
+            )
+            if ok:
+                self._models.pop((backend, 'duration'), None)
+                if memory_mb is not None:
+                    self._models.pop((backend, 'memory_mb'), None)
+
+    def _model(self, backend, target='duration'):
+        with self._lock:
+            if (backend, target) in self._models:
+                return self._models[(backend, target)]
+            # target is one of our own column names, never user input
+            samples = self._conn.execute(
+                f'SELECT size, layers, {target} FROM conversion_stats '
+                f'WHERE backend = ? AND ok = 1 AND {target} IS NOT NULL '
+                'ORDER BY finished_at DESC LIMIT ?',
+                (backend, self.window)
+            ).fetchall()
+        model = None
+        if len(samples) >= self.min_samples:
+            coefficients = fit_nonnegative(
+                [_features(size, layers) for size, layers, _ in samples],
+                [value for _, _, value in samples]
+            )
+            if coefficients is not None:
+                model = {'coefficients': coefficients, 'samples': len(samples)}
+        with self._lock:
+            self._models[(backend, target)] = model
+        return model
+
+    def _predict(self, backend, size, layers, target):
+        model = self._model(backend, target)
+        if model is None:
+            return None
+        return sum(c * x for c, x in zip(model['coefficients'], _features(size, layers)))
+
+    def predict(self, backend, size, layers):
+        """Expected conversion time in seconds, or None until enough runs are recorded"""
+        return self._predict(backend, size, layers, 'duration')
+
+    def predict_memory(self, backend, size, layers):
+        """Expected memory growth of the converting process in MB, or None"""
+        return self._predict(backend, size, layers, 'memory_mb')
+
+    def success_rate(self, backend, usdc, textured):
+        """(share of recent conversions that succeeded, number of them) for one kind of file"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT AVG(ok), COUNT(*) FROM (SELECT ok FROM conversion_stats '
+                'WHERE backend = ? AND usdc = ? AND (textures > 0) = ? ORDER BY finished_at DESC LIMIT ?)',
+                (backend, int(usdc), int(textured), self.window)
+            ).fetchone()
+        return (row[0] or 0.0), row[1]
+
+    def deadline(self, backend, size, layers, attempt=1):
+        """(timeout, predicted) for a job; retries get twice the allowance each time"""
+        predicted = self.predict(backend, size, layers)
+        if predicted is None:
+            return self.max_deadline, None
+        timeout = self.multiplier * predicted * 2 ** max(attempt - 1, 0)
+        return min(max(timeout, self.min_deadline), self.max_deadline), predicted
+
+    def describe(self, backend):
+        model = self._model(backend)
+        if model is None:
+            return f"{backend}: not enough runs yet (need {self.min_samples})"
+        c = dict(zip(FEATURES, model['coefficients']))
+        return (f"{backend}: {c['intercept']:.1f}s + {c['mb']:.2f}s/MB + {c['layers']:.3f}s/layer "
+                f"({model['samples']} runs)")
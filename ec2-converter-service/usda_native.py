@@ -0,0 +1,791 @@
+#!/usr/bin/env python3
+
+"""
+Native USDA -> GLB converter
+Pure-Python fast path for RoomPlan-style USDZs: parses the text layers,
+composes `references`/`payload`/`subLayers`, builds NumPy vertex and index
+buffers for Mesh prims with UsdPreviewSurface colors and writes a GLB
+directly. Anything outside that subset raises UnsupportedUsd so the caller
+can fall back to Blender. A conversion still running at its deadline raises
+TimeoutError; the parser, composition and GLB emission check it per prim.
+"""
+
+import re
+import math
+import time
+import logging
+
+try:
+    import numpy as np
+    from glb import GlbBuilder, ARRAY_BUFFER
+except ImportError:  # NumPy is optional - without it everything goes to Blender
+    np = None
+
+from layer_graph import USDC_MAGIC, resolve_asset
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_PRIM_TYPES = ('', 'Xform', 'Scope', 'Mesh')
+SHADING_PRIM_TYPES = ('Material', 'Shader', 'NodeGraph')
+UNSUPPORTED_METADATA = ('inherits', 'specializes', 'variants', 'variantSets', 'clips')
+
+TOKEN_RE = re.compile(r'''
+    (?P<skip>\s+|\#[^\n]*)
+  | (?P<str3>"""(?:.|\n)*?"""|\'\'\'(?:.|\n)*?\'\'\')
+  | (?P<str>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+  | (?P<asset3>@@@.*?@@@)
+  | (?P<asset>@[^@\n]*@)
+  | (?P<path><[^>\n]*>)
+  | (?P<id>[A-Za-z_!][\w:.!]*)
+  | (?P<num>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|-inf)
+  | (?P<punct>[()\[\]{}=,;:&])
+''', re.X)
+
+ESCAPE_RE = re.compile(r'\\(.)')
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r'}
+NUMERIC_ARRAY_RE = re.compile(r'[-+0-9.eE(),\s]*')
+QUALIFIERS = ('custom', 'uniform', 'varying', 'config', 'add', 'prepend', 'append', 'delete', 'reorder')
+LIST_OPS = ('add', 'prepend', 'append', 'delete', 'reorder')
+
+
+def check_deadline(deadline, where):
+    """Raise TimeoutError once time.monotonic() is past deadline (None = no deadline)"""
+    if deadline is not None and time.monotonic() > deadline:
+        raise TimeoutError(f"native conversion timed out in {where}")
+
+
+class UnsupportedUsd(Exception):
+    """The scene uses something the native converter does not handle"""
+
+
+class Asset(str):
+    """@asset/path@ value"""
+
+
+class SdfPath(str):
+    """</prim/path> value"""
+
+
+class Reference:
+    def __init__(self, asset=None, prim_path=None):
+        self.asset = asset
+        self.prim_path = prim_path
+
+
+class Prim:
+    def __init__(self, specifier, type_name, name):
+        self.specifier = specifier
+        self.type_name = type_name
+        self.name = name
+        self.metadata = {}
+        self.properties = {}
+        self.property_metadata = {}
+        self.children = {}
+
+    def copy(self):
+        prim = Prim(self.specifier, self.type_name, self.name)
+        prim.metadata = dict(self.metadata)
+        prim.properties = dict(self.properties)
+        prim.property_metadata = dict(self.property_metadata)
+        prim.children = {name: child.copy() for name, child in self.children.items()}
+        return prim
+
+
+class Layer:
+    def __init__(self, name):
+        self.name = name
+        self.metadata = {}
+        self.prims = {}
+
+    @property
+    def default_prim(self):
+        return self.metadata.get('defaultPrim')
+
+    def prim_at(self, path):
+        names = [n for n in str(path).split('/') if n]
+        prims = self.prims
+        prim = None
+        for name in names:
+            prim = prims.get(name)
+            if prim is None:
+                return None
+            prims = prim.children
+        return prim
+
+
+class UsdaParser:
+    """Recursive-descent parser for the subset of USDA RoomPlan emits"""
+
+    def __init__(self, text, name, deadline=None):
+        self.text = text
+        self.name = name
+        self.deadline = deadline
+        self.pos = 0
+        self._peeked = None
+
+    # -- tokens --------------------------------------------------------------
+
+    def _scan(self):
+        while True:
+            if self.pos >= len(self.text):
+                return ('eof', None)
+            match = TOKEN_RE.match(self.text, self.pos)
+            if not match:
+                raise UnsupportedUsd(f"{self.name}: unexpected character {self.text[self.pos]!r}")
+            self.pos = match.end()
+            kind = match.lastgroup
+            if kind != 'skip':
+                return (kind, match.group())
+
+    def peek(self):
+        if self._peeked is None:
+            self._peeked = self._scan()
+        return self._peeked
+
+    def next(self):
+        token = self.peek()
+        self._peeked = None
+        return token
+
+    def expect(self, value):
+        kind, text = self.next()
+        if text != value:
+            raise UnsupportedUsd(f"{self.name}: expected {value!r}, got {text!r}")
+        return text
+
+    def accept(self, value):
+        if self.peek()[1] == value:
+            self.next()
+            return True
+        return False
+
+    # -- values --------------------------------------------------------------
+
+    def value(self):
+        kind, text = self.next()
+        if kind == 'num':
+            number = float(text)
+            return int(number) if number.is_integer() and '.' not in text and 'e' not in text.lower() else number
+        if kind == 'str':
+            return ESCAPE_RE.sub(lambda m: ESCAPES.get(m.group(1), m.group(1)), text[1:-1])
+        if kind == 'str3':
+            return text[3:-3]
+        if kind in ('asset', 'asset3'):
+            asset = Asset(text.strip('@'))
+            if self.peek()[0] == 'path':
+                return Reference(asset, SdfPath(self.next()[1][1:-1]))
+            return asset
+        if kind == 'path':
+            return SdfPath(text[1:-1])
+        if kind == 'id':
+            if text == 'None':
+                return None
+            if text in ('inf', 'nan'):
+                return float(text)
+            if text in ('true', 'false'):
+                return text == 'true'
+            return text
+        if text == '(':
+            return self._sequence(')', tuple)
+        if text == '[':
+            return self._list()
+        if text == '{':
+            return self._dictionary()
+        raise UnsupportedUsd(f"{self.name}: unexpected {text!r} in value")
+
+    def _sequence(self, close, factory):
+        items = []
+        while not self.accept(close):
+            items.append(self.value())
+            self.accept(',')
+        return factory(items)
+
+    def _list(self):
+        # Fast path: numeric arrays (points, normals, indices) go straight to NumPy
+        end = self.text.find(']', self.pos)
+        if self._peeked is None and end != -1:
+            chunk = self.text[self.pos:end]
+            if NUMERIC_ARRAY_RE.fullmatch(chunk) and chunk.strip():
+                self.pos = end + 1
+                return self._numeric_array(chunk)
+        return self._sequence(']', list)
+
+    def _numeric_array(self, chunk):
+        if np is None:
+            raise UnsupportedUsd("NumPy is not available")
+        width = 1
+        open_paren = chunk.find('(')
+        if open_paren != -1:
+            width = chunk[open_paren:chunk.find(')', open_paren)].count(',') + 1
+        values = np.array(chunk.replace('(', ' ').replace(')', ' ').replace(',', ' ').split(), dtype=np.float64)
+        return values.reshape(-1, width) if width > 1 else values
+
+    def _dictionary(self):
+        result = {}
+        while not self.accept('}'):
+            kind, text = self.next()
+            if kind == 'num':
+                raise UnsupportedUsd(f"{self.name}: time samples are not supported")
+            if self.accept('['):
+                self.expect(']')
+            key_kind, key = self.next()
+            if key_kind in ('str', 'str3'):
+                key = key.strip('"\'')
+            self.expect('=')
+            result[key] = self.value()
+            self.accept(';')
+        return result
+
+    # -- structure -----------------------------------------------------------
+
+    def metadata(self, target):
+        """Parse '( key = value ... )' into target; the opening '(' is consumed"""
+        while not self.accept(')'):
+            kind, text = self.next()
+            if kind in ('str', 'str3'):
+                target.setdefault('doc', text.strip('"\''))
+                continue
+            list_op = None
+            if text in LIST_OPS:
+                list_op = text
+                kind, text = self.next()
+            self.expect('=')
+            value = self.value()
+            if list_op == 'delete' and text in ('references', 'payload'):
+                raise UnsupportedUsd(f"{self.name}: deleted {text} are not supported")
+            if list_op != 'reorder':
+                target[text] = value
+            self.accept(';')
+
+    def layer(self):
+        if not self.text.startswith('#usda'):
+            raise UnsupportedUsd(f"{self.name}: not a USDA text layer")
+        layer = Layer(self.name)
+        if self.accept('('):
+            self.metadata(layer.metadata)
+        while self.peek()[0] != 'eof':
+            prim = self.prim()
+            if prim is not None:
+                layer.prims[prim.name] = prim
+        return layer
+
+    def prim(self):
+        check_deadline(self.deadline, self.name)
+        kind, specifier = self.next()
+        if specifier not in ('def', 'over', 'class'):
+            raise UnsupportedUsd(f"{self.name}: unexpected {specifier!r} at prim level")
+        type_name = ''
+        if self.peek()[0] == 'id':
+            type_name = self.next()[1]
+        name = self.value()
+        prim = Prim(specifier, type_name, name)
+        if self.accept('('):
+            self.metadata(prim.metadata)
+        self.expect('{')
+        while not self.accept('}'):
+            self.member(prim)
+        return prim
+
+    def member(self, prim):
+        kind, text = self.peek()
+        if text in ('def', 'over', 'class'):
+            child = self.prim()
+            prim.children[child.name] = child
+            return
+        if text == 'variantSet':
+            raise UnsupportedUsd(f"{self.name}: variant sets are not supported")
+
+        self.next()
+        qualifiers = []
+        while text in QUALIFIERS:
+            qualifiers.append(text)
+            kind, text = self.next()
+
+        if 'reorder' in qualifiers:
+            # reorder nameChildren/properties = [...]
+            self.expect('=')
+            self.value()
+            return
+
+        type_name = text
+        if self.accept('['):
+            self.expect(']')
+            type_name += '[]'
+        kind, name = self.next()
+        if name.endswith('.timeSamples') or name.endswith('.spline'):
+            raise UnsupportedUsd(f"{self.name}: animated attribute {name}")
+
+        value = None
+        if self.accept('='):
+            value = self.value()
+        metadata = {}
+        if self.accept('('):
+            self.metadata(metadata)
+        self.accept(';')
+
+        prim.properties[name] = value
+        if metadata:
+            prim.property_metadata[name] = metadata
+
+
+def parse_usda(text, name='<layer>', deadline=None):
+    return UsdaParser(text, name, deadline).layer()
+
+
+# -- composition -------------------------------------------------------------
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def _remap_value(value, source, target):
+    if isinstance(value, SdfPath):
+        if value == source or value.startswith(source + '/') or value.startswith(source + '.'):
+            return SdfPath(target + value[len(source):])
+        return value
+    if isinstance(value, list):
+        return [_remap_value(v, source, target) for v in value]
+    return value
+
+
+def _remap_paths(prim, source, target):
+    for name, value in prim.properties.items():
+        prim.properties[name] = _remap_value(value, source, target)
+    for child in prim.children.values():
+        _remap_paths(child, source, target)
+
+
+def _merge_weaker(strong, weak):
+    """Fill in opinions from `weak` that `strong` does not author"""
+    if strong.specifier != 'def' and weak.specifier == 'def':
+        strong.specifier = 'def'
+    if not strong.type_name:
+        strong.type_name = weak.type_name
+    for key, value in weak.metadata.items():
+        strong.metadata.setdefault(key, value)
+    for name, value in weak.properties.items():
+        if name not in strong.properties:
+            strong.properties[name] = value
+            if name in weak.property_metadata:
+                strong.property_metadata[name] = weak.property_metadata[name]
+    for name, child in weak.children.items():
+        if name in strong.children:
+            _merge_weaker(strong.children[name], child)
+        else:
+            strong.children[name] = child
+
+
+class Stage:
+    """Composed scene built from the layers of one USDZ archive"""
+
+    MAX_DEPTH = 32
+
+    def __init__(self, archive, root_layer, deadline=None):
+        self.archive = archive
+        self.root_layer = root_layer
+        self.deadline = deadline
+        self._layers = {}
+        self.layers_used = set()
+        root = self.layer(root_layer)
+        self.metadata = root.metadata
+
+        prims = {}
+        for name, prim in root.prims.items():
+            prims[name] = self.compose(prim, root_layer, '/' + name, 0)
+        for sublayer in _as_list(root.metadata.get('subLayers')):
+            sub_name = self.resolve(sublayer, root_layer)
+            for name, prim in self.layer(sub_name).prims.items():
+                composed = self.compose(prim, sub_name, '/' + name, 0)
+                if name in prims:
+                    _merge_weaker(prims[name], composed)
+                else:
+                    prims[name] = composed
+        self.prims = prims
+
+    def resolve(self, asset, anchor_layer):
+        return resolve_asset(asset, anchor_layer)
+
+    def layer(self, name):
+        layer = self._layers.get(name)
+        if layer is None:
+            try:
+                view = self.archive.view(name)
+            except KeyError:
+                raise UnsupportedUsd(f"Missing layer {name}")
+            if bytes(view[:8]) == USDC_MAGIC:
+                raise UnsupportedUsd(f"{name}: binary usdc layers are not supported")
+            layer = parse_usda(str(view, 'utf-8', errors='replace'), name, self.deadline)
+            self._layers[name] = layer
+            self.layers_used.add(name)
+        return layer
+
+    def compose(self, prim, layer_name, path, depth):
+        check_deadline(self.deadline, path)
+        if depth > self.MAX_DEPTH:
+            raise UnsupportedUsd(f"Reference cycle at {path}")
+        for key in UNSUPPORTED_METADATA:
+            if key in prim.metadata:
+                raise UnsupportedUsd(f"{path}: '{key}' is not supported")
+
+        result = prim.copy()
+        result.children = {
+            name: self.compose(child, layer_name, f"{path}/{name}", depth)
+            for name, child in prim.children.items()
+        }
+
+        arcs = _as_list(prim.metadata.get('references')) + _as_list(prim.metadata.get('payload'))
+        for arc in arcs:
+            if isinstance(arc, Reference):
+                asset, target_path = arc.asset, arc.prim_path
+            elif isinstance(arc, Asset):
+                asset, target_path = arc, None
+            elif isinstance(arc, SdfPath):
+                asset, target_path = None, arc
+            else:
+                raise UnsupportedUsd(f"{path}: unsupported reference {arc!r}")
+
+            ref_layer_name = self.resolve(asset, layer_name) if asset else layer_name
+            ref_layer = self.layer(ref_layer_name)
+            if not target_path:
+                if not ref_layer.default_prim:
+                    raise UnsupportedUsd(f"{ref_layer_name} has no defaultPrim")
+                target_path = SdfPath('/' + ref_layer.default_prim)
+            target = ref_layer.prim_at(target_path)
+            if target is None:
+                raise UnsupportedUsd(f"{ref_layer_name}: no prim at {target_path}")
+
+            referenced = self.compose(target, ref_layer_name, str(target_path), depth + 1)
+            _remap_paths(referenced, str(target_path), path)
+            _merge_weaker(result, referenced)
+
+        return result
+
+    def prim_at(self, path):
+        names = [n for n in str(path).split('/') if n]
+        prims = self.prims
+        prim = None
+        for name in names:
+            prim = prims.get(name)
+            if prim is None:
+                return None
+            prims = prim.children
+        return prim
+
+
+# -- geometry ----------------------------------------------------------------
+
+def _rotation(axis, degrees):
+    angle = math.radians(degrees)
+    c, s = math.cos(angle), math.sin(angle)
+    m = np.eye(4)
+    i, j = {'X': (1, 2), 'Y': (2, 0), 'Z': (0, 1)}[axis]
+    m[i, i] = c
+    m[i, j] = -s
+    m[j, i] = s
+    m[j, j] = c
+    return m
+
+
+def _op_matrix(op_type, value):
+    """4x4 column-vector matrix for one xformOp"""
+    if op_type == 'transform':
+        # USD matrices are row-vector convention; transpose to column-vector
+        return np.array(value, dtype=np.float64).reshape(4, 4).T
+    if op_type == 'translate':
+        m = np.eye(4)
+        m[:3, 3] = value
+        return m
+    if op_type == 'scale':
+        m = np.eye(4)
+        if isinstance(value, (int, float)):
+            value = (value, value, value)
+        m[0, 0], m[1, 1], m[2, 2] = value
+        return m
+    if op_type in ('rotateX', 'rotateY', 'rotateZ'):
+        return _rotation(op_type[-1], value)
+    if op_type.startswith('rotate') and len(op_type) == 9:
+        # rotateXYZ rotates about X first, then Y, then Z
+        m = np.eye(4)
+        for axis, degrees in zip(op_type[6:], value):
+            m = _rotation(axis, degrees) @ m
+        return m
+    if op_type == 'orient':
+        w, x, y, z = value
+        m = np.eye(4)
+        m[:3, :3] = [
+            [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+            [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+            [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+        ]
+        return m
+    raise UnsupportedUsd(f"xformOp '{op_type}' is not supported")
+
+
+def local_matrix(prim):
+    """Column-vector local transform of a prim, or None if it has none"""
+    order = _as_list(prim.properties.get('xformOpOrder'))
+    if not order:
+        return None
+    m = np.eye(4)
+    for op in order:
+        if op == '!resetXformStack!':
+            raise UnsupportedUsd("!resetXformStack! is not supported")
+        invert = op.startswith('!invert!')
+        name = op[len('!invert!'):] if invert else op
+        if name not in prim.properties:
+            raise UnsupportedUsd(f"{prim.name}: missing {name}")
+        op_m = _op_matrix(name.split(':')[1], prim.properties[name])
+        m = m @ (np.linalg.inv(op_m) if invert else op_m)
+    return m
+
+
+def _gltf_matrix(m):
+    """glTF stores column-major, i.e. the column-vector matrix transposed and flattened"""
+    return [float(v) for v in m.T.reshape(-1)]
+
+
+def triangulate(counts, indices):
+    """Fan-triangulate polygons; returns (T, 3) positions into the face-vertex list"""
+    counts = np.asarray(counts, dtype=np.int64).reshape(-1)
+    starts = np.cumsum(counts) - counts
+    if counts.size and starts[-1] + counts[-1] > len(indices):
+        raise UnsupportedUsd("faceVertexCounts exceed faceVertexIndices")
+
+    # Points and lines are not faces
+    keep = counts >= 3
+    starts, counts = starts[keep], counts[keep]
+
+    tris_per_face = counts - 2
+    total = int(tris_per_face.sum())
+    face_start = np.repeat(starts, tris_per_face)
+    group_start = np.repeat(np.cumsum(tris_per_face) - tris_per_face, tris_per_face)
+    k = np.arange(total) - group_start + 1
+    return np.stack([face_start, face_start + k, face_start + k + 1], axis=1)
+
+
+def _interpolation(prim, name, default):
+    return prim.property_metadata.get(name, {}).get('interpolation', default)
+
+
+def mesh_buffers(prim):
+    """(positions, normals or None, indices) for a Mesh prim"""
+    props = prim.properties
+    points = props.get('points')
+    counts = props.get('faceVertexCounts')
+    face_indices = props.get('faceVertexIndices')
+    if points is None or counts is None or face_indices is None:
+        raise UnsupportedUsd(f"{prim.name}: mesh without points/faces")
+    if props.get('primvars:st') is not None or any(k.startswith('primvars:st') for k in props):
+        logger.debug(f"{prim.name}: ignoring UVs (no textures in native path)")
+
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    face_indices = np.asarray(face_indices, dtype=np.int64).reshape(-1)
+    counts = np.asarray(counts, dtype=np.int64).reshape(-1)
+    if face_indices.size and (face_indices.min() < 0 or face_indices.max() >= len(points)):
+        raise UnsupportedUsd(f"{prim.name}: face index out of range")
+
+    if props.get('orientation') == 'leftHanded':
+        # Reverse each face's winding
+        starts = np.cumsum(counts) - counts
+        order = np.repeat(2 * starts + counts - 1, counts) - np.arange(int(counts.sum()))
+        face_indices = face_indices[order]
+
+    corners = triangulate(counts, face_indices)
+
+    normals = props.get('normals')
+    interpolation = _interpolation(prim, 'normals', 'vertex')
+    if normals is None and props.get('primvars:normals') is not None:
+        normals = props['primvars:normals']
+        interpolation = _interpolation(prim, 'primvars:normals', 'vertex')
+        if props.get('primvars:normals:indices') is not None:
+            normals = np.asarray(normals).reshape(-1, 3)[np.asarray(props['primvars:normals:indices'], dtype=np.int64)]
+    if normals is not None:
+        normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+        if interpolation == 'uniform':
+            normals = np.repeat(normals, counts, axis=0)
+            interpolation = 'faceVarying'
+        elif interpolation == 'constant':
+            normals = np.repeat(normals[:1], len(points), axis=0)
+            interpolation = 'vertex'
+
+    if normals is not None and interpolation == 'faceVarying':
+        if len(normals) != len(face_indices):
+            raise UnsupportedUsd(f"{prim.name}: faceVarying normals count mismatch")
+        positions = points[face_indices]
+        indices = corners
+    else:
+        if normals is not None and (interpolation != 'vertex' or len(normals) != len(points)):
+            raise UnsupportedUsd(f"{prim.name}: normals with '{interpolation}' interpolation")
+        positions = points
+        indices = face_indices[corners]
+
+    if normals is not None:
+        length = np.linalg.norm(normals, axis=1, keepdims=True)
+        normals = np.where(length > 1e-12, normals / np.maximum(length, 1e-12), [0.0, 1.0, 0.0])
+    return positions, normals, indices.reshape(-1)
+
+
+# -- conversion --------------------------------------------------------------
+
+class NativeConverter:
+    """Converts the composed stage of one USDZ into a GLB"""
+
+    def __init__(self, archive, root_layer, deadline=None):
+        if np is None:
+            raise UnsupportedUsd("NumPy is not available")
+        self.deadline = deadline
+        self.stage = Stage(archive, root_layer, deadline)
+        self.builder = GlbBuilder()
+        self._materials = {}
+        self.triangles = 0
+        self.meshes = 0
+
+    def convert(self, glb_path):
+        parent = self._root_node()
+        for name, prim in self.stage.prims.items():
+            self._emit(prim, '/' + name, parent, None)
+        if not self.meshes:
+            raise UnsupportedUsd("No meshes found")
+        return self.builder.write(glb_path)
+
+    def _root_node(self):
+        """Wrap the scene for non-Y-up or non-meter stages"""
+        up_axis = self.stage.metadata.get('upAxis', 'Y')
+        # UsdGeom's fallback for an unauthored metersPerUnit is centimeters
+        meters = float(self.stage.metadata.get('metersPerUnit', 0.01))
+        m = np.eye(4)
+        if up_axis == 'Z':
+            m = _rotation('X', -90) @ m
+        elif up_axis != 'Y':
+            raise UnsupportedUsd(f"upAxis {up_axis!r}")
+        if meters != 1:
+            m = np.diag([meters, meters, meters, 1.0]) @ m
+        if np.allclose(m, np.eye(4)):
+            return None
+        return self.builder.add_node({'name': 'root', 'matrix': _gltf_matrix(m)})
+
+    def _emit(self, prim, path, parent, binding):
+        check_deadline(self.deadline, path)
+        if prim.specifier != 'def':
+            return
+        if prim.type_name in SHADING_PRIM_TYPES:
+            return
+        if prim.type_name not in SUPPORTED_PRIM_TYPES:
+            raise UnsupportedUsd(f"{path}: prim type '{prim.type_name}' is not supported")
+        if prim.properties.get('visibility') == 'invisible':
+            return
+        if prim.properties.get('purpose') in ('guide', 'proxy'):
+            return
+
+        binding = prim.properties.get('material:binding', binding)
+
+        node = {'name': prim.name}
+        matrix = local_matrix(prim)
+        if matrix is not None and not np.allclose(matrix, np.eye(4)):
+            node['matrix'] = _gltf_matrix(matrix)
+        if prim.type_name == 'Mesh':
+            node['mesh'] = self._mesh(prim, path, binding)
+
+        index = self.builder.add_node(node, parent)
+        for name, child in prim.children.items():
+            self._emit(child, f"{path}/{name}", index, binding)
+
+    def _mesh(self, prim, path, binding):
+        for child in prim.children.values():
+            if child.type_name == 'GeomSubset':
+                raise UnsupportedUsd(f"{path}: GeomSubsets are not supported")
+
+        positions, normals, indices = mesh_buffers(prim)
+        positions = positions.astype(np.float32)
+        attributes = {'POSITION': self.builder.add_accessor(positions, target=ARRAY_BUFFER, minmax=True)}
+        if normals is not None:
+            attributes['NORMAL'] = self.builder.add_accessor(normals.astype(np.float32), target=ARRAY_BUFFER)
+
+        primitive = {'attributes': attributes, 'indices': self.builder.add_indices(indices), 'mode': 4}
+        material = self._material(prim, binding)
+        if material is not None:
+            primitive['material'] = material
+
+        self.meshes += 1
+        self.triangles += len(indices) // 3
+        return self.builder.add('meshes', {'name': prim.name, 'primitives': [primitive]})
+
+    def _material(self, mesh, binding):
+        double_sided = bool(mesh.properties.get('doubleSided', False))
+        if isinstance(binding, list):
+            binding = binding[0] if binding else None
+
+        if binding is None:
+            color = mesh.properties.get('primvars:displayColor')
+            if color is None:
+                return None
+            if _interpolation(mesh, 'primvars:displayColor', 'constant') != 'constant':
+                raise UnsupportedUsd(f"{mesh.name}: per-vertex displayColor")
+            rgb = np.asarray(color, dtype=np.float64).reshape(-1, 3)[0]
+            key = ('displayColor', tuple(rgb), double_sided)
+            inputs = {'inputs:diffuseColor': tuple(rgb)}
+            name = f"{mesh.name}_displayColor"
+        else:
+            key = (str(binding), double_sided)
+            inputs = self._surface_inputs(binding)
+            name = str(binding).rsplit('/', 1)[-1]
+
+        if key in self._materials:
+            return self._materials[key]
+
+        r, g, b = inputs.get('inputs:diffuseColor', (0.18, 0.18, 0.18))
+        opacity = float(inputs.get('inputs:opacity', 1.0))
+        material = {
+            'name': name,
+            'pbrMetallicRoughness': {
+                'baseColorFactor': [float(r), float(g), float(b), opacity],
+                'metallicFactor': float(inputs.get('inputs:metallic', 0.0)),
+                'roughnessFactor': float(inputs.get('inputs:roughness', 0.5)),
+            },
+        }
+        emissive = inputs.get('inputs:emissiveColor')
+        if emissive and any(emissive):
+            material['emissiveFactor'] = [float(v) for v in emissive]
+        if opacity < 1.0:
+            material['alphaMode'] = 'BLEND'
+        if double_sided:
+            material['doubleSided'] = True
+
+        index = self.builder.add('materials', material)
+        self._materials[key] = index
+        return index
+
+    def _surface_inputs(self, material_path):
+        material = self.stage.prim_at(material_path)
+        if material is None or material.type_name != 'Material':
+            raise UnsupportedUsd(f"Bound material {material_path} not found")
+        connection = material.properties.get('outputs:surface.connect')
+        if isinstance(connection, list):
+            connection = connection[0] if connection else None
+        if not connection:
+            raise UnsupportedUsd(f"{material_path}: no surface shader")
+        shader = self.stage.prim_at(str(connection).split('.', 1)[0])
+        if shader is None or shader.properties.get('info:id') != 'UsdPreviewSurface':
+            raise UnsupportedUsd(f"{material_path}: only UsdPreviewSurface is supported")
+        if any(name.endswith('.connect') for name in shader.properties):
+            raise UnsupportedUsd(f"{material_path}: textured materials are not supported")
+        return shader.properties
+
+
+def convert_usdz_native(archive, glb_path, root_layer, deadline=None):
+    """Convert a USDZ (open UsdzArchive) to GLB; raises UnsupportedUsd to request a fallback
+
+    deadline is a time.monotonic() value; TimeoutError is raised once it passes.
+    """
+    converter = NativeConverter(archive, root_layer, deadline)
+    size = converter.convert(glb_path)
+    return {
+        'glb_size': size,
+        'meshes': converter.meshes,
+        'triangles': converter.triangles,
+        'layers': len(converter.stage.layers_used),
+    }
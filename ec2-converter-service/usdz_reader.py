@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+"""
+In-process USDZ reader
+A USDZ is an uncompressed zip whose entries are 64-byte aligned, so every
+layer can be exposed straight from a memory map as a zero-copy memoryview.
+Files are only written to disk when a backend (e.g. Blender) needs paths.
+"""
+
+import os
+import mmap
+import struct
+import zipfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+LOCAL_HEADER = struct.Struct('<4sHHHHHIIIHH')
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+
+USD_LAYER_EXTENSIONS = ('.usda', '.usdc', '.usd')
+
+
+class UsdzError(Exception):
+    """The file is not a readable USDZ archive"""
+
+
+class UsdzArchive:
+    """Memory-mapped USDZ; use as a context manager"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._zip = zipfile.ZipFile(self._file)
+        except (ValueError, zipfile.BadZipFile) as e:
+            self._file.close()
+            raise UsdzError(f"{path}: {e}")
+
+        # Entries in archive order; the first layer is the USDZ root by spec
+        self.entries = [info for info in self._zip.infolist() if not info.is_dir()]
+        self._by_name = {info.filename: info for info in self.entries}
+        self._offsets = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._zip.close()
+        try:
+            self._map.close()
+        except BufferError:
+            # A caller still holds a memoryview; the map is freed with it
+            pass
+        self._file.close()
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def names(self):
+        return [info.filename for info in self.entries]
+
+    def layer_names(self):
+        return [name for name in self.names() if name.lower().endswith(USD_LAYER_EXTENSIONS)]
+
+    def size(self, name):
+        return self._by_name[name].file_size
+
+    def _data_offset(self, info):
+        offset = self._offsets.get(info.filename)
+        if offset is None:
+            header = LOCAL_HEADER.unpack_from(self._map, info.header_offset)
+            if header[0] != LOCAL_HEADER_SIGNATURE:
+                raise UsdzError(f"Bad local header for {info.filename}")
+            name_length, extra_length = header[9], header[10]
+            offset = info.header_offset + LOCAL_HEADER.size + name_length + extra_length
+            self._offsets[info.filename] = offset
+        return offset
+
+    def view(self, name):
+        """Zero-copy memoryview of an entry (copies only if the entry is compressed)"""
+        info = self._by_name[name]
+        if info.compress_type != zipfile.ZIP_STORED:
+            # Not a spec-compliant USDZ, but readable
+            logger.warning(f"⚠️  {name} is compressed inside the USDZ - reading a copy")
+            return memoryview(self._zip.read(info))
+        start = self._data_offset(info)
+        return memoryview(self._map)[start:start + info.file_size]
+
+    def read_text(self, name, encoding='utf-8'):
+        return str(self.view(name), encoding, errors='replace')
+
+    def extract(self, dest_dir, names=None):
+        """Write entries (all by default) under dest_dir; returns their paths"""
+        real_dest = os.path.realpath(dest_dir)
+        paths = {}
+        for name in (names if names is not None else self.names()):
+            target = os.path.realpath(os.path.join(dest_dir, name))
+            if not target.startswith(real_dest + os.sep):
+                raise UsdzError(f"Unsafe path in archive: {name}")
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(self.view(name))
+            paths[name] = target
+        return paths
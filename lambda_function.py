@@ -2,109 +2,210 @@ import json
 import boto3
 import subprocess
 import os
+import shutil
 import tempfile
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote_plus
 
 s3_client = boto3.client('s3')
 
-def lambda_handler(event, context):
-    print(f"Event received: {json.dumps(event)}")
-    
+# Records converted at once; each holds a USDZ and its GLB in /tmp and a
+# gltf-transform (Node) process in memory
+MAX_CONCURRENCY = int(os.environ.get('MAX_CONCURRENCY', '4'))
+# Space in /tmp reserved per record, as a multiple of the USDZ size
+TMP_SPACE_FACTOR = float(os.environ.get('TMP_SPACE_FACTOR', '3'))
+CONVERSION_TIMEOUT = 300  # seconds
+
+
+class TmpBudget:
+    """Shares the free space of /tmp between concurrent conversions"""
+
+    def __init__(self, path):
+        self.free = shutil.disk_usage(path).free
+        self.condition = threading.Condition()
+        self.running = 0
+
+    def reserve(self, num_bytes):
+        # A record larger than the whole budget still runs, on its own
+        with self.condition:
+            self.condition.wait_for(lambda: self.running == 0 or num_bytes <= self.free)
+            self.free -= num_bytes
+            self.running += 1
+
+    def release(self, num_bytes):
+        with self.condition:
+            self.free += num_bytes
+            self.running -= 1
+            self.condition.notify_all()
+
+
+def s3_records(record):
+    """(bucket, key, size) of each S3 object in a record
+
+    Records come straight from an S3 notification, or as SQS messages
+    whose body is one.
+    """
+    if record.get('eventSource') == 'aws:sqs':
+        body = json.loads(record['body'])
+        records = body.get('Records', [])  # s3:TestEvent has none
+    else:
+        records = [record]
+    return [
+        (
+            r['s3']['bucket']['name'],
+            unquote_plus(r['s3']['object']['key']).strip(),  # Keys are URL-encoded; remove trailing spaces
+            r['s3']['object'].get('size')
+        )
+        for r in records
+    ]
+
+
+def convert_object(bucket, key, file_size, budget, context=None):
+    """Download one USDZ, convert it with gltf-transform and upload the GLB"""
+    # Check if USDZ file
+    if not key.lower().endswith('.usdz'):
+        print(f"File is not USDZ, skipping: {key}")
+        return {'input': key, 'skipped': 'Not a USDZ file'}
+
+    print(f"Processing USDZ file: {bucket}/{key}")
+
+    reserved = int((file_size or 0) * TMP_SPACE_FACTOR)
+    budget.reserve(reserved)
     try:
-        # Get bucket and key
-        bucket = event['Records'][0]['s3']['bucket']['name']
-        key = event['Records'][0]['s3']['object']['key'].strip()  # Remove trailing spaces
-        
-        print(f"Bucket: {bucket}")
-        print(f"Key: {key}")
-        
-        # Check if USDZ file
-        if not key.lower().endswith('.usdz'):
-            print(f"File is not USDZ, skipping: {key}")
-            return {'statusCode': 200, 'body': json.dumps('Not a USDZ file')}
-        
-        print(f"Processing USDZ file: {bucket}/{key}")
-        
         with tempfile.TemporaryDirectory() as temp_dir:
             usdz_path = os.path.join(temp_dir, 'input.usdz')
             glb_path = os.path.join(temp_dir, 'output.glb')
-            
+
             print(f"Downloading from S3: s3://{bucket}/{key}")
-            
+
             # Download USDZ
             try:
                 s3_client.download_file(bucket, key, usdz_path)
                 file_size = os.path.getsize(usdz_path)
-                print(f"✅ Downloaded USDZ file ({file_size} bytes)")
+                print(f"✅ Downloaded USDZ file ({file_size} bytes): {key}")
             except Exception as e:
-                print(f"❌ Failed to download file: {str(e)}")
+                print(f"❌ Failed to download file {key}: {str(e)}")
                 raise
-            
-            # Check if gltf-transform is available
-            print("Checking gltf-transform availability...")
-            check_result = subprocess.run(
-                ['which', 'gltf-transform'],
-                capture_output=True,
-                text=True
-            )
-            print(f"gltf-transform location: {check_result.stdout.strip()}")
-            
-            if check_result.returncode != 0:
-                raise Exception("gltf-transform not found in container")
-            
-            # Convert using gltf-transform
-            print(f"Converting USDZ to GLB...")
+
+            # Convert using gltf-transform, within the time the invocation has left
+            timeout = CONVERSION_TIMEOUT
+            if context is not None:
+                timeout = min(timeout, max(context.get_remaining_time_in_millis() / 1000 - 10, 1))
+            print(f"Converting USDZ to GLB: {key}")
             result = subprocess.run(
                 ['gltf-transform', 'copy', usdz_path, glb_path],
                 capture_output=True,
                 text=True,
-                timeout=300
+                timeout=timeout
             )
-            
-            print(f"Conversion stdout: {result.stdout}")
-            print(f"Conversion stderr: {result.stderr}")
-            print(f"Conversion return code: {result.returncode}")
-            
+
+            print(f"Conversion stdout ({key}): {result.stdout}")
+            print(f"Conversion stderr ({key}): {result.stderr}")
+            print(f"Conversion return code ({key}): {result.returncode}")
+
             if result.returncode != 0:
-                error_msg = f'Conversion failed: {result.stderr}'
-                print(f"❌ {error_msg}")
-                return {'statusCode': 500, 'body': json.dumps(error_msg)}
-            
+                raise Exception(f'Conversion failed: {result.stderr}')
+
             # Check if GLB file was created
             if not os.path.exists(glb_path):
                 raise Exception(f"GLB file was not created at {glb_path}")
-            
+
             glb_size = os.path.getsize(glb_path)
-            print(f"✅ GLB file created ({glb_size} bytes)")
-            
+            print(f"✅ GLB file created ({glb_size} bytes): {key}")
+
             # Upload GLB
             glb_key = key.rsplit('.', 1)[0] + '.glb'
             print(f"Uploading GLB to S3: s3://{bucket}/{glb_key}")
-            
+
             s3_client.upload_file(
-                glb_path, 
-                bucket, 
+                glb_path,
+                bucket,
                 glb_key,
                 ExtraArgs={'ContentType': 'model/gltf-binary'}
             )
-            
+
             print(f"✅ Successfully uploaded GLB: {glb_key}")
-            
+
             return {
-                'statusCode': 200,
-                'body': json.dumps({
-                    'message': 'Conversion successful',
-                    'input': key,
-                    'output': glb_key,
-                    'input_size': file_size,
-                    'output_size': glb_size
-                })
+                'input': key,
+                'output': glb_key,
+                'input_size': file_size,
+                'output_size': glb_size
             }
-            
-    except Exception as e:
-        error_msg = f"Error: {str(e)}\n{traceback.format_exc()}"
+    finally:
+        budget.release(reserved)
+
+
+def process_record(record, budget, context=None):
+    """Convert every object in one record; returns per-object results"""
+    results = []
+    for bucket, key, file_size in s3_records(record):
+        try:
+            results.append(convert_object(bucket, key, file_size, budget, context))
+        except Exception as e:
+            error_msg = f"Error: {str(e)}\n{traceback.format_exc()}"
+            print(f"❌ {key}: {error_msg}")
+            results.append({'input': key, 'error': str(e)})
+    return results
+
+
+def lambda_handler(event, context):
+    print(f"Event received: {json.dumps(event)}")
+
+    records = event.get('Records', [])
+    budget = TmpBudget(tempfile.gettempdir())
+
+    # Check if gltf-transform is available
+    print("Checking gltf-transform availability...")
+    check_result = subprocess.run(
+        ['which', 'gltf-transform'],
+        capture_output=True,
+        text=True
+    )
+    print(f"gltf-transform location: {check_result.stdout.strip()}")
+
+    if check_result.returncode != 0:
+        error_msg = "gltf-transform not found in container"
         print(f"❌ {error_msg}")
+        # Nothing can be converted; report every record so all are retried
         return {
             'statusCode': 500,
-            'body': json.dumps({'error': str(e)})
+            'body': json.dumps({'error': error_msg}),
+            'batchItemFailures': [{'itemIdentifier': r['messageId']} for r in records if 'messageId' in r]
         }
+
+    print(f"Processing {len(records)} record(s), {MAX_CONCURRENCY} at a time")
+
+    results = []
+    failures = []
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_CONCURRENCY, len(records)))) as executor:
+        futures = [executor.submit(process_record, record, budget, context) for record in records]
+        for record, future in zip(records, futures):
+            try:
+                record_results = future.result()
+            except Exception as e:
+                # e.g. an SQS body that is not an S3 notification
+                print(f"❌ Invalid record: {str(e)}\n{traceback.format_exc()}")
+                record_results = [{'error': str(e)}]
+            results.extend(record_results)
+            if any('error' in r for r in record_results):
+                failures.append(record)
+
+    succeeded = sum(1 for r in results if 'output' in r)
+    print(f"✅ {succeeded} converted, {sum(1 for r in results if 'skipped' in r)} skipped, "
+          f"{sum(1 for r in results if 'error' in r)} failed")
+
+    # With an SQS event source mapping (ReportBatchItemFailures), only the
+    # failed messages go back to the queue
+    return {
+        'statusCode': 500 if failures else 200,
+        'body': json.dumps({
+            'message': 'Conversion successful' if not failures else 'Some conversions failed',
+            'results': results
+        }),
+        'batchItemFailures': [
+            {'itemIdentifier': record['messageId']} for record in failures if 'messageId' in record
+        ]
+    }
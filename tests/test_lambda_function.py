@@ -0,0 +1,141 @@
+import json
+import subprocess
+import threading
+
+import pytest
+
+pytest.importorskip('boto3')
+import lambda_function  # noqa: E402
+from lambda_function import TmpBudget, lambda_handler, s3_records  # noqa: E402
+
+
+class StubS3:
+    def __init__(self):
+        self.uploads = []
+
+    def download_file(self, bucket, key, path):
+        if 'missing' in key:
+            raise RuntimeError('404 Not Found')
+        with open(path, 'wb') as f:
+            f.write(b'usdz')
+
+    def upload_file(self, path, bucket, key, ExtraArgs=None):
+        self.uploads.append(key)
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    stub = StubS3()
+    monkeypatch.setattr(lambda_function, 's3_client', stub)
+    return stub
+
+
+@pytest.fixture
+def gltf_transform(monkeypatch):
+    """gltf-transform stand-in: fails on inputs whose key contains "corrupt" """
+    state = {'installed': True, 'keys': []}
+
+    def run(args, **kwargs):
+        if args[0] == 'which':
+            return subprocess.CompletedProcess(args, 0 if state['installed'] else 1, '/usr/bin/gltf-transform', '')
+        key = state['keys'].pop(0)
+        if 'corrupt' in key:
+            return subprocess.CompletedProcess(args, 1, '', 'bad usdz')
+        with open(args[3], 'wb') as f:
+            f.write(b'glTF')
+        return subprocess.CompletedProcess(args, 0, '', '')
+
+    monkeypatch.setattr(lambda_function.subprocess, 'run', run)
+    monkeypatch.setattr(lambda_function, 'MAX_CONCURRENCY', 1)  # Keys are converted in record order
+    return state
+
+
+def s3_record(key, size=100):
+    return {'s3': {'bucket': {'name': 'bucket'}, 'object': {'key': key, 'size': size}}}
+
+
+def sqs_record(message_id, *keys):
+    return {'eventSource': 'aws:sqs', 'messageId': message_id,
+            'body': json.dumps({'Records': [s3_record(key) for key in keys]})}
+
+
+def test_s3_records():
+    assert s3_records(s3_record('scans/My+Room%281%29.usdz ')) == [('bucket', 'scans/My Room(1).usdz', 100)]
+    assert s3_records(sqs_record('m1', 'a.usdz', 'b.usdz')) == [('bucket', 'a.usdz', 100), ('bucket', 'b.usdz', 100)]
+    test_event = {'eventSource': 'aws:sqs', 'messageId': 'm', 'body': json.dumps({'Event': 's3:TestEvent'})}
+    assert s3_records(test_event) == []
+
+
+def test_only_failed_records_are_reported(s3, gltf_transform):
+    gltf_transform['keys'] = ['ok.usdz', 'also-ok.usdz', 'corrupt.usdz', 'fine.usdz']
+    event = {'Records': [
+        sqs_record('good', 'ok.usdz', 'notes.txt'),
+        sqs_record('partly-bad', 'also-ok.usdz', 'corrupt.usdz'),
+        sqs_record('download-failed', 'missing.usdz'),
+        {'eventSource': 'aws:sqs', 'messageId': 'not-s3', 'body': 'not json'},
+        sqs_record('good-too', 'fine.usdz'),
+    ]}
+    response = lambda_handler(event, None)
+
+    assert response['statusCode'] == 500
+    assert response['batchItemFailures'] == [
+        {'itemIdentifier': 'partly-bad'}, {'itemIdentifier': 'download-failed'}, {'itemIdentifier': 'not-s3'}
+    ]
+    assert s3.uploads == ['ok.glb', 'also-ok.glb', 'fine.glb']
+
+
+def test_all_records_succeed(s3, gltf_transform):
+    gltf_transform['keys'] = ['a.usdz', 'b.usdz']
+    response = lambda_handler({'Records': [sqs_record('m1', 'a.usdz'), sqs_record('m2', 'b.usdz')]}, None)
+    assert response['statusCode'] == 200
+    assert response['batchItemFailures'] == []
+
+
+def test_missing_converter_fails_every_record(s3, gltf_transform):
+    gltf_transform['installed'] = False
+    response = lambda_handler({'Records': [sqs_record('m1', 'a.usdz'), sqs_record('m2', 'b.usdz')]}, None)
+    assert response['batchItemFailures'] == [{'itemIdentifier': 'm1'}, {'itemIdentifier': 'm2'}]
+    assert s3.uploads == []
+
+
+def budget(tmp_path, free):
+    budget = TmpBudget(str(tmp_path))
+    budget.free = free
+    return budget
+
+
+def reserve_in_thread(budget, num_bytes):
+    reserved = threading.Event()
+    threading.Thread(target=lambda: (budget.reserve(num_bytes), reserved.set()), daemon=True).start()
+    return reserved
+
+
+def test_budget_holds_a_record_that_does_not_fit(tmp_path):
+    tmp = budget(tmp_path, 100)
+    tmp.reserve(80)
+    held = reserve_in_thread(tmp, 30)
+    assert not held.wait(0.1)  # Only 20 bytes left
+    assert reserve_in_thread(tmp, 20).wait(1)  # A record that fits is not held up behind it
+
+    tmp.release(80)
+    assert held.wait(1)
+    tmp.release(20)
+    assert (tmp.free, tmp.running) == (70, 1)
+
+
+def test_record_larger_than_tmp_runs_alone(tmp_path):
+    tmp = budget(tmp_path, 100)
+    tmp.reserve(500)  # Nothing else running: admitted despite the overdraft
+    assert tmp.free == -400
+    held = reserve_in_thread(tmp, 10)
+    assert not held.wait(0.1)
+    tmp.release(500)
+    assert held.wait(1)
+
+
+def test_failed_conversion_releases_its_space(tmp_path, s3, gltf_transform):
+    gltf_transform['keys'] = ['corrupt.usdz']
+    tmp = budget(tmp_path, 1000)
+    with pytest.raises(Exception, match='Conversion failed'):
+        lambda_function.convert_object('bucket', 'corrupt.usdz', 100, tmp)
+    assert (tmp.free, tmp.running) == (1000, 0)